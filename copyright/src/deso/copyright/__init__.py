@@ -1,7 +1,7 @@
 # __init__.py
 
 #/***************************************************************************
-# *   Copyright (C) 2015 Daniel Mueller (deso@posteo.net)                   *
+# *   Copyright (C) 2015,2026 Daniel Mueller (deso@posteo.net)              *
 # *                                                                         *
 # *   This program is free software: you can redistribute it and/or modify  *
 # *   it under the terms of the GNU General Public License as published by  *
@@ -19,17 +19,46 @@
 
 """A module for automated handling of copyright file headers."""
 
+from deso.copyright.ignore import (
+  IgnoreSet,
+)
 from deso.copyright.normalize import (
+  findChanges,
+  isBinary,
+  iterNormalizeFiles,
   normalizeContent,
   normalizeContentPadded,
+  normalizeData,
+  normalizeFile,
   normalizeFiles,
+  normalizeMany,
+  normalizeStream,
+  Normalizer,
   policyStringToFunction,
+  sniffBinary,
+  Status,
 )
 from deso.copyright.range import (
   Range,
 )
 from deso.copyright.ranges import (
+  flattenRanges,
   normalizeRanges,
+  normalizeRangesBatch,
+  normalizeRangesString,
   parseRanges,
+  RangeSet,
+  scanRanges,
   stringifyRanges,
 )
+from deso.copyright.report import (
+  FileReport,
+  ReportWriter,
+)
+from deso.copyright.walk import (
+  walkFiles,
+)
+from deso.copyright.window import (
+  ScanLimit,
+  scanLimitStringToLimit,
+)
@@ -0,0 +1,323 @@
+# cache.py
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""A persistent cache for the outcome of normalizing files.
+
+  Most files do not change between two runs over a source tree and
+  neither does the outcome of normalizing their copyright headers. The
+  cache remembers this outcome for files that did not need any change,
+  identified by their path and stat information, so that subsequent
+  runs with the same settings can skip them without even opening them.
+
+  The cache is stored as a text file with one line per entry. Updates
+  are merged with the data on disk under a lock and written to a
+  temporary file that atomically replaces the cache, so that concurrent
+  runs never corrupt it.
+"""
+
+from fcntl import (
+  flock,
+  LOCK_EX,
+)
+from itertools import (
+  islice,
+)
+from os import (
+  fsdecode,
+  fstat,
+  getpid,
+  lstat,
+  replace,
+  stat,
+  unlink,
+)
+from os.path import (
+  abspath,
+)
+from threading import (
+  Lock,
+)
+from time import (
+  time_ns,
+)
+
+
+# The magic string identifying a cache file.
+MAGIC = "deso-copyright-cache"
+# The version of the cache file format.
+VERSION = 1
+# Files modified less than this many nanoseconds before the start of a
+# run are not cached. File systems have a limited timestamp resolution
+# and a file modified again within the same tick would otherwise not be
+# recognized as changed.
+RACY_NS = 2 * 10**9
+
+
+def fingerprint(*settings):
+  """Create a fingerprint of the settings influencing cached outcomes.
+
+    The settings are converted into strings, so each of them needs a
+    representation that is stable across processes. The fingerprint is
+    that representation itself, which is free of line breaks. Hashing it
+    would require loading hashlib, which is not cheap, on every run of
+    the pre-commit hook.
+  """
+  return repr(settings)
+
+
+class Cache:
+  """A persistent mapping from keys to values, both strings.
+
+    A cache is bound to a fingerprint of the settings its values depend
+    on. Entries stored with a different fingerprint are discarded. If a
+    capacity is given, the least recently used entries are evicted once
+    the cache grows beyond it. A cache may be used from multiple
+    threads.
+  """
+  def __init__(self, path, fingerprint, capacity=None):
+    """Create a cache stored at the given path and load its entries."""
+    self._path = path
+    self._fingerprint = fingerprint
+    self._capacity = capacity
+    self._lock = Lock()
+    self._entries, self._stamp = self._load()
+    self._updated = {}
+    self._removed = set()
+    self._used = set()
+
+
+  def __enter__(self):
+    """Enter the runtime context of the cache."""
+    return self
+
+
+  def __exit__(self, type_, value, traceback):
+    """Leave the runtime context of the cache, saving it."""
+    self.save()
+
+
+  def __len__(self):
+    """Retrieve the number of entries in the cache."""
+    return len(self._entries)
+
+
+  def _header(self):
+    """Create the first line of a cache file."""
+    return "%s %d %s\n" % (MAGIC, VERSION, self._fingerprint)
+
+
+  def _load(self):
+    """Load the entries from the cache file, if it exists and is valid.
+
+      The function returns a tuple of the entries and a stamp
+      identifying the state of the file they were loaded from.
+    """
+    try:
+      with open(self._path, "r", encoding="utf-8", errors="surrogateescape") as f:
+        st = fstat(f.fileno())
+        stamp = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if f.readline() != self._header():
+          return {}, stamp
+
+        entries = {}
+        for line in f:
+          value, sep, key = line.rstrip("\n").partition("\t")
+          if sep:
+            entries[key] = value
+
+        return entries, stamp
+    except FileNotFoundError:
+      return {}, None
+
+
+  def _fileStamp(self):
+    """Retrieve the stamp of the cache file as it currently is on disk."""
+    try:
+      st = stat(self._path)
+    except FileNotFoundError:
+      return None
+
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+  def get(self, key):
+    """Retrieve the value for a key or None if it is not cached."""
+    with self._lock:
+      value = self._entries.get(key)
+      if value is not None:
+        # Entries are kept in the order in which they were used, so that
+        # the least recently used ones come first.
+        del self._entries[key]
+        self._entries[key] = value
+        self._used.add(key)
+
+      return value
+
+
+  def set(self, key, value):
+    """Set the value for a key."""
+    # Keys and values are stored on a line of their own, so they may
+    # not contain line breaks. Such keys are just not cached.
+    if "\n" in key or "\n" in value or "\t" in value:
+      return
+
+    with self._lock:
+      self._entries.pop(key, None)
+      self._entries[key] = value
+      self._updated.pop(key, None)
+      self._updated[key] = value
+      self._removed.discard(key)
+
+
+  def remove(self, key):
+    """Remove the entry for a key, if any."""
+    with self._lock:
+      self._entries.pop(key, None)
+      self._updated.pop(key, None)
+      self._removed.add(key)
+
+
+  def _evict(self, entries):
+    """Remove stale entries from a dict of entries before it is saved."""
+    if self._capacity is not None:
+      for key in list(islice(entries, max(len(entries) - self._capacity, 0))):
+        del entries[key]
+
+
+  def save(self):
+    """Merge the updated entries into the cache file.
+
+      Entries updated by a concurrent user of the cache file in the
+      meantime are retained, unless they were updated here as well. If
+      no entry was updated, the file is left alone. Entries that were
+      merely used are then not marked as such on disk, but only a save
+      can evict entries in the first place.
+    """
+    with self._lock:
+      self._save()
+
+
+  def _save(self):
+    """Merge the updated entries into the cache file, with the lock held."""
+    if not self._updated and not self._removed:
+      return
+
+    with open(self._path + ".lock", "w") as lock:
+      flock(lock.fileno(), LOCK_EX)
+
+      if self._fileStamp() == self._stamp:
+        # Nobody changed the file since we loaded it, meaning that our
+        # entries are up to date and do not have to be loaded again.
+        entries = self._entries
+      else:
+        entries, _ = self._load()
+        for key in self._used:
+          value = entries.pop(key, None)
+          if value is not None:
+            entries[key] = value
+
+        for key in self._removed:
+          entries.pop(key, None)
+        for key, value in self._updated.items():
+          entries.pop(key, None)
+          entries[key] = value
+
+      self._evict(entries)
+
+      tmp = "%s.%d.tmp" % (self._path, getpid())
+      try:
+        with open(tmp, "w", encoding="utf-8", errors="surrogateescape") as f:
+          f.write(self._header())
+          f.writelines("%s\t%s\n" % (v, k) for k, v in entries.items())
+
+        replace(tmp, self._path)
+        self._stamp = self._fileStamp()
+      except BaseException:
+        try:
+          unlink(tmp)
+        except FileNotFoundError:
+          pass
+        raise
+
+    self._entries = entries
+    self._updated = {}
+    self._removed = set()
+    self._used = set()
+
+
+class FileCache(Cache):
+  """A cache for the outcome of normalizing files.
+
+    Entries are keyed by the absolute path of a file and are only valid
+    as long as its inode, size, and modification time are unchanged.
+    Entries for files that no longer exist are evicted when saving.
+  """
+  def __init__(self, path, fingerprint):
+    """Create a file cache stored at the given path."""
+    super().__init__(path, fingerprint)
+    self._start = time_ns()
+    self._visited = set()
+
+
+  def lookup(self, file_):
+    """Look up the cached value for a file.
+
+      The function returns a tuple of the value, or None if the file is
+      not cached, and a stamp identifying the file's current state, to
+      be used for updating the entry once the file has been processed.
+    """
+    path = abspath(fsdecode(file_))
+    st = stat(path)
+    stamp = "%d %d %d" % (st.st_ino, st.st_size, st.st_mtime_ns)
+    with self._lock:
+      self._visited.add(path)
+
+    entry = self.get(path)
+    if entry is not None:
+      stamp_, _, value = entry.rpartition(" ")
+      if stamp_ == stamp:
+        return value, (path, stamp, st.st_mtime_ns)
+
+    return None, (path, stamp, st.st_mtime_ns)
+
+
+  def update(self, stamp, value):
+    """Update the entry for a file looked up before.
+
+      A value of None removes the entry.
+    """
+    path, stamp, mtime_ns = stamp
+    if value is None or mtime_ns >= self._start - RACY_NS:
+      self.remove(path)
+    else:
+      self.set(path, "%s %s" % (stamp, value))
+
+
+  def _evict(self, entries):
+    """Remove entries for files that no longer exist."""
+    super()._evict(entries)
+
+    for path in list(entries):
+      if path in self._visited:
+        continue
+
+      try:
+        lstat(path)
+      except FileNotFoundError:
+        del entries[path]
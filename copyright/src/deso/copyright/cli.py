@@ -0,0 +1,268 @@
+# cli.py
+
+#/***************************************************************************
+# *   Copyright (C) 2015-2017,2026 Daniel Mueller (deso@posteo.net)         *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""The command line interface of the copyright normalization script."""
+
+from argparse import (
+  ArgumentParser,
+  ArgumentTypeError,
+)
+from collections import (
+  Counter,
+)
+from contextlib import (
+  nullcontext,
+)
+from deso.copyright.ignore import (
+  IgnoreSet,
+)
+from deso.copyright.normalize import (
+  formatStatistics,
+  jobsStringToCount,
+  normalizeContent,
+  normalizeFiles,
+  normalizeStream,
+  plausibleStringToRange,
+  POLICY_MAP,
+  policyStringToFunction,
+)
+from deso.copyright.profiler import (
+  Profiler,
+  ReportTee,
+)
+from deso.copyright.report import (
+  ReportWriter,
+)
+from deso.copyright.util import (
+  listToEnglishEnumeration,
+)
+from deso.copyright.walk import (
+  walkFiles,
+)
+from deso.copyright.window import (
+  scanLimitStringToLimit,
+)
+from os import (
+  cpu_count,
+)
+from os.path import (
+  isdir,
+)
+from sys import (
+  stderr,
+  stdin,
+  stdout,
+)
+
+
+def setupArgumentParser():
+  """Create and initialize an argument parser, ready for use."""
+  parser = ArgumentParser()
+  parser.add_argument(
+    "files", action="store", metavar="files", nargs="*",
+    help="A list of files to check and potentially fix up the copyright "
+         "headers for the current year.",
+  )
+  parser.add_argument(
+    "--recursive", action="store_true", default=False, dest="recursive",
+    help="Walk directories given among the files recursively. Hidden "
+         "files and directories as well as files ignored by .gitignore "
+         "files are skipped. Files are processed as they are found.",
+  )
+  parser.add_argument(
+    "--watch", action="store_true", default=False, dest="watch",
+    help="Instead of processing the given directories once, keep "
+         "watching them recursively and normalize files as they are "
+         "written, until interrupted. Bursts of changes are handled at "
+         "once. Hidden files and directories as well as files ignored "
+         "by .gitignore files are skipped. Only supported on Linux.",
+  )
+  parser.add_argument(
+    "--filter", action="store_true", default=False, dest="filter",
+    help="Instead of working on files, read content from stdin and "
+         "write it with normalized copyright headers to stdout. Data "
+         "are written as they are processed, so that arbitrarily large "
+         "inputs can be handled.",
+  )
+  parser.add_argument(
+    "--policy", action="store", default=normalizeContent,
+    dest="normalization_fn", metavar="policy",
+    type=lambda x: policyStringToFunction(x, ArgumentTypeError),
+    help="Specify a policy to use. A policy influences the way "
+         "normalization is performed. Available options are: %s." %
+         listToEnglishEnumeration(list(POLICY_MAP.keys())),
+  )
+  parser.add_argument(
+    "--year", action="store", default=None, metavar="year", type=int,
+    help="Specify a year to extend the copyright year range by. By "
+         "default the copyright years are just normalizaed, not "
+         "extended.",
+  )
+  parser.add_argument(
+    "--plausible-years", action="store", default=None, dest="plausible",
+    metavar="years",
+    type=lambda x: plausibleStringToRange(x, ArgumentTypeError),
+    help="Only consider years in the given range (e.g., \"1970-2100\") "
+         "as copyright years. Copyright headers containing any other "
+         "year are left alone. By default any number of up to four "
+         "digits is considered a year.",
+  )
+  parser.add_argument(
+    "--ignore", action="append", default=[], metavar="ignore",
+    help="Ignore copyright headers matching a certain pattern. That is, "
+         "if a copyright " "replacement is about to be made it will be "
+         "cancelled if the very match also matches the pattern provided "
+         "via this argment. This option can be supplied multiple times.",
+  )
+  parser.add_argument(
+    "--scan-limit", action="store", default=None, dest="limit",
+    metavar="limit",
+    type=lambda x: scanLimitStringToLimit(x, ArgumentTypeError),
+    help="Only search the given number of lines (e.g., \"50\") or bytes "
+         "(e.g., \"4096b\") at the start of each file for copyright "
+         "headers. The remainder of a file is not even read. By default "
+         "files are searched in their entirety.",
+  )
+  parser.add_argument(
+    "--mmap", action="store_true", default=False, dest="mapped",
+    help="Map files into memory instead of reading them. Copyright "
+         "headers that do not change in length are patched in place, "
+         "writing back only the changed bytes.",
+  )
+  parser.add_argument(
+    "--jobs", action="store", default=cpu_count() or 1, dest="jobs",
+    metavar="jobs",
+    type=lambda x: jobsStringToCount(x, ArgumentTypeError),
+    help="Process the given number of files in parallel, each in a "
+         "separate process. By default one process per CPU is used.",
+  )
+  parser.add_argument(
+    "--cache", action="store", default=None, dest="cache", metavar="cache",
+    help="Cache the outcome for files not requiring a change in the "
+         "given file. Subsequent runs with the same settings skip files "
+         "that have not been modified since without reading them.",
+  )
+  parser.add_argument(
+    "--report", action="store", default=None, dest="report",
+    metavar="report",
+    help="Write a report to the given file, containing a JSON object "
+         "per line for each file processed. Each object describes the "
+         "outcome, the number of bytes read and copyright headers "
+         "found, as well as the time spent reading, normalizing, and "
+         "writing the file.",
+  )
+  parser.add_argument(
+    "--profile", action="store_true", default=False, dest="profile",
+    help="Print a summary of the time spent in and the number of calls "
+         "to the individual phases of processing files, along with the "
+         "peak amount of memory allocated, to stderr.",
+  )
+  parser.add_argument(
+    "--profile-dump", action="store", default=None, dest="profile_dump",
+    metavar="file",
+    help="Profile the run using cProfile and dump the statistics to the "
+         "given file for later analysis with pstats. Implies --profile. "
+         "Note that only the main process is profiled, so --jobs=1 "
+         "should be used for meaningful results.",
+  )
+  parser.add_argument(
+    "--stats", action="store_true", default=False, dest="stats",
+    help="Print statistics about the processed files to stderr.",
+  )
+  return parser
+
+
+def watch(ns, ignore, report):
+  """Normalize files in the watched directories as they change, until interrupted."""
+  # Watching is rarely used, so we only import the module when needed.
+  from deso.copyright.watch import (
+    iterWatchFiles,
+    Watcher,
+  )
+
+  stats = Counter()
+  with Watcher(ns.files) as watcher:
+    results = iterWatchFiles(watcher, normalize_fn=ns.normalization_fn,
+                             year=ns.year, ignore=ignore, limit=ns.limit,
+                             mapped=ns.mapped, report=report,
+                             plausible=ns.plausible)
+    try:
+      for _, status in results:
+        stats[status] += 1
+    except KeyboardInterrupt:
+      # Watching only ever ends by the user interrupting it.
+      pass
+
+  return stats
+
+
+def main(argv):
+  """The main function parses the script's arguments and acts upon them."""
+  parser = setupArgumentParser()
+  ns = parser.parse_args(argv[1:])
+
+  if ns.filter and ns.files:
+    parser.error("no files may be given in filter mode")
+  elif not ns.filter and not ns.files:
+    parser.error("the following arguments are required: files")
+  elif ns.watch and ns.filter:
+    parser.error("filter mode cannot be combined with watching")
+  elif ns.watch and not all(map(isdir, ns.files)):
+    parser.error("only directories can be watched")
+
+  ignore = IgnoreSet(ns.ignore) if ns.ignore else None
+  with Profiler(enabled=ns.profile, dump=ns.profile_dump) as profiler:
+    if ns.filter:
+      with profiler.phase("normalize"):
+        status = normalizeStream(stdin.buffer, stdout.buffer,
+                                 normalize_fn=ns.normalization_fn,
+                                 year=ns.year, ignore=ignore, limit=ns.limit,
+                                 plausible=ns.plausible)
+        stdout.buffer.flush()
+      stats = Counter([status])
+    else:
+      files = walkFiles(ns.files) if ns.recursive else ns.files
+      # When watching, reports are written line by line so that they can
+      # be followed while running.
+      buffering = 1 if ns.watch else -1
+      if ns.report is not None:
+        report_file = open(ns.report, "w", buffering=buffering)
+      else:
+        report_file = nullcontext()
+
+      with report_file as f:
+        report = ReportWriter(f) if f is not None else None
+        if profiler.enabled:
+          # The profiler receives the reports created for each file in
+          # order to account for the time spent in the worker processes.
+          report = ReportTee(report, profiler)
+
+        if ns.watch:
+          stats = watch(ns, ignore, report)
+        else:
+          stats = normalizeFiles(files, normalize_fn=ns.normalization_fn,
+                                 year=ns.year, ignore=ignore, limit=ns.limit,
+                                 mapped=ns.mapped, jobs=ns.jobs,
+                                 cache=ns.cache, report=report,
+                                 plausible=ns.plausible)
+
+  if ns.stats:
+    print(formatStatistics(stats), file=stderr)
+  return 0
+
@@ -0,0 +1,120 @@
+# ignore.py
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Functionality for ignoring copyright headers matching user-provided patterns."""
+
+from re import (
+  compile as regex,
+  UNICODE,
+)
+
+
+class IgnoreSet:
+  """A set of regular expression patterns identifying headers to ignore.
+
+    The patterns are compiled once upon creation. Patterns that can
+    safely be combined are fused into a single alternation, so that
+    checking a string against the set requires only a single search
+    regardless of the number of patterns. Patterns containing groups or
+    global flags cannot be combined without changing their meaning and
+    are kept as separate compiled patterns.
+  """
+  def __init__(self, patterns=None):
+    """Compile the given patterns and create an ignore set from them."""
+    self._patterns = tuple(patterns or ())
+
+    fusable = []
+    self._regexes = []
+
+    for pattern in self._patterns:
+      # Compile each pattern on its own first. That not only tells us
+      # whether it can be fused with others, it also guarantees that
+      # errors are reported for the offending pattern.
+      compiled = regex(pattern)
+      if compiled.groups == 0 and compiled.flags == UNICODE:
+        fusable.append(pattern)
+      else:
+        self._regexes.append(compiled)
+
+    if len(fusable) == 1:
+      self._regexes.insert(0, regex(fusable[0]))
+    elif len(fusable) > 1:
+      fused = "|".join("(?:%s)" % pattern for pattern in fusable)
+      self._regexes.insert(0, regex(fused))
+
+
+  def __repr__(self):
+    """Convert the ignore set into a string."""
+    return "IgnoreSet(%r)" % (list(self._patterns),)
+
+
+  def __reduce__(self):
+    """Reduce the ignore set to its patterns, for pickling.
+
+      The patterns are compiled anew when unpickling, which is cheaper
+      than transferring the compiled regular expressions.
+    """
+    return IgnoreSet, (self._patterns,)
+
+
+  def __len__(self):
+    """Retrieve the number of patterns in the set."""
+    return len(self._patterns)
+
+
+  def __eq__(self, other):
+    """Compare two ignore sets."""
+    return isinstance(other, IgnoreSet) and self._patterns == other._patterns
+
+
+  def __hash__(self):
+    """Hash the ignore set."""
+    return hash(self._patterns)
+
+
+  @property
+  def patterns(self):
+    """Retrieve the patterns the set was created from."""
+    return self._patterns
+
+
+  def matches(self, string):
+    """Check if a string is matched by any of the patterns in the set.
+
+      The string may also be given as bytes, in which case it is decoded
+      as UTF-8. Bytes that are not valid UTF-8 are kept as surrogates,
+      meaning that patterns consisting of ASCII characters still match
+      content in other encodings.
+    """
+    if not isinstance(string, str):
+      string = bytes(string).decode("utf-8", "surrogateescape")
+
+    for regex_ in self._regexes:
+      if regex_.search(string) is not None:
+        return True
+
+    return False
+
+
+def toIgnoreSet(ignore):
+  """Convert a list of patterns into an IgnoreSet, if it is not one already."""
+  if ignore is None or isinstance(ignore, IgnoreSet):
+    return ignore
+
+  return IgnoreSet(ignore)
@@ -1,7 +1,7 @@
 # normalize.py
 
 #/***************************************************************************
-# *   Copyright (C) 2015-2017 Daniel Mueller (deso@posteo.net)              *
+# *   Copyright (C) 2015-2017,2026 Daniel Mueller (deso@posteo.net)         *
 # *                                                                         *
 # *   This program is free software: you can redistribute it and/or modify  *
 # *   it under the terms of the GNU General Public License as published by  *
@@ -19,181 +19,952 @@
 
 """A script able to detect and normalize copyright year strings."""
 
-from argparse import (
-  ArgumentParser,
-  ArgumentTypeError,
+from collections import (
+  Counter,
+  deque,
+)
+from deso.copyright.ignore import (
+  toIgnoreSet,
 )
 from deso.copyright.range import (
   Range,
-  YEAR_SEPARATOR,
 )
 from deso.copyright.ranges import (
-  normalizeRanges,
-  parseRanges,
-  RANGES_SEPARATOR,
-  stringifyRanges,
+  normalizeRangesString,
+)
+from deso.copyright.report import (
+  FileReport,
+  measure,
+)
+from deso.copyright.scanner import (
+  copyrightScanner,
 )
 from deso.copyright.util import (
   listToEnglishEnumeration,
 )
-from re import (
-  compile as regex,
-  escape,
-  IGNORECASE,
-  search,
+from deso.copyright.window import (
+  headerEnd,
+  isContinuation,
+  readHeader,
+)
+from enum import (
+  Enum,
+)
+from mmap import (
+  mmap,
+)
+from os import (
+  fstat,
 )
 from sys import (
   argv as sysargv,
 )
 
 
-ANY_R = r"[^\n\r]"
-TWO_SPACES_RE = regex(r"  ")
-# A regular expression string representing a single year. Note that we
-# deliberately do not require a year to start with a number not equal to
-# zero. Sometimes years are shortened, e.g., 98 could represent 1998 or
-# 07 could stand for 2007, and we want to match those years as well. We
-# might fail because of that, but at least we raise awareness (for a
-# "wrong" [in this program's sense] year representation).
-YEAR_R = r"[0-9]+"
-YEAR_SEP_R = escape(YEAR_SEPARATOR)
-RANGES_SEP_R = escape(RANGES_SEPARATOR)
-# A regular expression string representing copyright years. Note that we
-# consume any trailing range separators here silently.
-CYEARS = r"{y}(?:\s*[{s1}{s2}]\s*{y})*{s2}*"
-CYEARS_R = CYEARS.format(y=YEAR_R, s1=YEAR_SEP_R, s2=RANGES_SEP_R)
-PREFIX = r"copyright(?:{a}(?!{c}))*{a}"
-PREFIX_R = PREFIX.format(a=ANY_R, c=CYEARS_R)
-SUFFIX = r"{a}*"
-SUFFIX_R = SUFFIX.format(a=ANY_R)
-# A regular expression string representing what we expect a line with a
-# copyright reference to look like. Note that the regular expression can
-# not only work on a line-by-line but also a per-file basis. In fact,
-# that is the intended usage because then we do not have to care about
-# different line endings when writing out data.
-COPYRIGHT = r"({p})({c})({s})"
-COPYRIGHT_R = COPYRIGHT.format(p=PREFIX_R, c=CYEARS_R, s=SUFFIX_R)
-# The final regular expression able to capture a copyright line.
-COPYRIGHT_RE = regex(COPYRIGHT_R, IGNORECASE)
-
-
-def _matchesIgnoreList(string, ignore=None):
-  """Check if a string is matched by an element in the ignore list."""
-  if ignore is None:
-    return False
-
-  for item in ignore:
-    m = search(item, string)
-    if m is not None:
+# The keyword every copyright header starts with, in lower case.
+KEYWORD = b"copyright"
+# The size of the chunks in which data is searched for the keyword.
+KEYWORD_CHUNK_SIZE = 64 * 1024
+# The number of files handed to a worker process at once when the
+# files are produced lazily, e.g., by walking a directory.
+STREAM_CHUNK_SIZE = 4
+# The number of bytes at the start of a stream checked for it being
+# binary.
+BINARY_SNIFF_SIZE = 8 * 1024
+
+
+class Status(Enum):
+  """The possible outcomes of normalizing the copyright headers of a file."""
+  # The copyright headers were normalized and the file changed.
+  Changed = 1
+  # The copyright headers were already normalized.
+  Unchanged = 2
+  # No copyright header was found.
+  NoHeader = 3
+  # The file does not even contain the copyright keyword and was ruled
+  # out without a search for actual headers.
+  Prefiltered = 4
+  # The file is a binary file and was skipped.
+  Binary = 5
+
+  def __str__(self):
+    """Convert a Status value into a string."""
+    return str(self.name).lower()
+
+
+def mayContainCopyright(data, end=None):
+  """Check whether binary data could possibly contain a copyright header.
+
+    The check is a case-insensitive search for the copyright keyword. It
+    requires no decoding and is a lot cheaper than a search for actual
+    headers. If it fails, the data cannot contain a header.
+  """
+  end = len(data) if end is None else end
+  # We search in chunks in order to bound the memory required for
+  # converting the data to lower case. Chunks overlap such that a
+  # keyword crossing a chunk boundary is found as well.
+  overlap = len(KEYWORD) - 1
+
+  for start in range(0, end, KEYWORD_CHUNK_SIZE):
+    chunk = bytes(data[start:min(start + KEYWORD_CHUNK_SIZE + overlap, end)])
+    if KEYWORD in chunk.lower():
       return True
 
   return False
 
 
-def _normalizeContent(content, normalize_fn, ignore=None):
-  """Normalize the copyright headers in a string using the given function."""
-  pos = 0
-  found = 0
+def _findReplacements(content, normalize_fn, ignore=None, endpos=None,
+                      plausible=None):
+  """Find all copyright headers in a string and yield their replacements.
 
-  while True:
-    match = COPYRIGHT_RE.search(content, pos=pos)
-    if match is None:
-      # We have scanned the entire content and there are no more
-      # matches.
-      return content, found
+    The result is a sequence of (start, end, replacement) tuples, with
+    the start and end indices referring to the original content. Only
+    headers ending before 'endpos' are considered.
+  """
+  endpos = len(content) if endpos is None else endpos
+  scanner = copyrightScanner(not isinstance(content, str), plausible)
 
-    start = match.start()
-    end = match.end()
-    pos = end
-    string = match.string[start:end]
-    if _matchesIgnoreList(string, ignore):
+  for match in scanner.finditer(content, 0, endpos):
+    if ignore is not None and ignore.matches(match.group(0)):
       # The string is on the ignore list. Just continue with the next
       # occurrence.
       continue
 
-    replacement, matched = COPYRIGHT_RE.subn(normalize_fn, string, count=1)
-    assert matched == 1
+    yield match.start(), match.end(), normalize_fn(match)
+
+
+def _findChanges(content, normalize_fn, ignore=None, limit=None,
+                 plausible=None):
+  """Find the copyright headers in a string that change when normalized.
+
+    The function returns a tuple of a list of (start, end, replacement)
+    tuples, one for each header that changes, and the number of headers
+    found overall. The content may either be a str or a bytes-like
+    object. In the latter case the content is never decoded.
+  """
+  changes = []
+  found = 0
+
+  # The ignore list is typically given as an already compiled IgnoreSet.
+  # For compatibility, we also support a plain list of patterns.
+  ignore = toIgnoreSet(ignore)
+  endpos = headerEnd(content, limit)
+  replacements = _findReplacements(content, normalize_fn, ignore, endpos,
+                                   plausible)
+
+  for start, end, replacement in replacements:
+    found += 1
+    if replacement != content[start:end]:
+      changes.append((start, end, replacement))
+
+  return changes, found
 
-    content = content[:start] + replacement + content[end:]
-    found += matched
 
+def _applyChanges(content, changes, start=0):
+  """Apply a list of changes as found by _findChanges to a string.
 
-def normalizeContent(content, year=None, ignore=None):
-  """Normalize the copyright headers in a string representing a file."""
+    If a start index is given, only the part of the content following it
+    is returned. No change must be located before that index.
+  """
+  if not changes:
+    # Nothing changed. In the common case of an already normalized file
+    # we do not want to create a copy of the content.
+    return content
+
+  # We collect the pieces of the result in a list and join them once at
+  # the end. That way the cost is linear in the size of the content,
+  # regardless of the number of copyright headers changed.
+  chunks = []
+  pos = start
+
+  for start, end, replacement in changes:
+    chunks.append(content[pos:start])
+    chunks.append(replacement)
+    pos = end
+
+  chunks.append(content[pos:])
+  return ("" if isinstance(content, str) else b"").join(chunks)
+
+
+def _normalizeContent(content, normalize_fn, ignore=None, limit=None,
+                      plausible=None):
+  """Normalize the copyright headers in a string using the given function."""
+  # We scan the content only once, no matter how many headers we find.
+  changes, found = _findChanges(content, normalize_fn, ignore, limit,
+                                plausible)
+  return _applyChanges(content, changes), found
+
+
+def _toString(string):
+  """Convert a copyright year string as matched into a str."""
+  # Copyright years consist of ASCII characters only, so for binary data
+  # the conversion is trivial.
+  return string if isinstance(string, str) else string.decode("ascii")
+
+
+def _fromString(string, like):
+  """Convert a str into the type of a given string."""
+  return string if isinstance(like, str) else string.encode("ascii")
+
+
+def _normalizeCopyrightYearsFn(year=None):
+  """Create a function normalizing the copyright years of a match."""
   def normalizeCopyrightYears(match):
     """Parse the copyright year string and normalize it."""
     prefix, range_string, suffix = match.groups()
-    ranges = parseRanges(range_string)
     # Not only do we want to normalize the existing copyright year
     # string, we potentially want to extend it with a given year if that
     # is not already included.
-    if year is not None:
-      ranges.append(Range(year, year))
-
-    normalizeRanges(ranges)
+    new_range_string = normalizeRangesString(_toString(range_string), year)
+    return prefix + _fromString(new_range_string, prefix) + suffix
 
-    return prefix + stringifyRanges(ranges) + suffix
+  return normalizeCopyrightYears
 
-  return _normalizeContent(content, normalizeCopyrightYears,
-                           ignore=ignore)
 
-
-def normalizeContentPadded(content, year=None, ignore=None):
+def normalizeContent(content, year=None, ignore=None, limit=None,
+                     plausible=None):
   """Normalize the copyright headers in a string representing a file.
 
-    This function normalizes the copyright headers in a string. It also
-    tries to fix any whitespace paddings, for instance, in case the text
-    is framed at a fixed width.
+    The content may be a str or a bytes-like object, i.e., bytes,
+    bytearray, or memoryview. Binary content is not decoded; only the
+    ASCII copyright years are touched. If 'plausible' is given, it is a
+    Range of the years considered plausible and headers containing any
+    other year are left alone.
   """
-  def removeSpace(_):
-    """Replace a two space match with a single space."""
-    return " "
+  return _normalizeContent(content, _normalizeCopyrightYearsFn(year),
+                           ignore=ignore, limit=limit, plausible=plausible)
+
 
+def _normalizeCopyrightYearsPaddedFn(year=None):
+  """Create a function normalizing the copyright years of a match, fixing paddings."""
   def normalizeCopyrightYearsPadded(match):
     """Parse the copyright year string and normalize it."""
     prefix, range_string, suffix = match.groups()
 
-    ranges = parseRanges(range_string)
-    if year is not None:
-      ranges.append(Range(year, year))
-
-    normalizeRanges(ranges)
-
-    new_range_string = stringifyRanges(ranges)
+    new_range_string = normalizeRangesString(_toString(range_string), year)
+    new_range_string = _fromString(new_range_string, prefix)
     increase = len(new_range_string) - len(range_string)
+    two_spaces = _fromString("  ", suffix)
 
     if increase > 0:
       # If the copyright year string got longer we remove that many
       # spaces from the following suffix (if possible).
-      new_suffix = TWO_SPACES_RE.sub(removeSpace, suffix, count=increase)
+      new_suffix = suffix.replace(two_spaces, two_spaces[:1], increase)
     elif increase < 0:
       # If the copyright year string got actually smaller (because we
       # were able to merge years), we insert as many spaces into the
       # suffix as we removed characters.
-      spaces = "  " + " " * -increase
-      new_suffix = TWO_SPACES_RE.sub(spaces, suffix, count=1)
+      spaces = _fromString("  " + " " * -increase, suffix)
+      new_suffix = suffix.replace(two_spaces, spaces, 1)
     else:
       new_suffix = suffix
 
     return prefix + new_range_string + new_suffix
 
-  return _normalizeContent(content, normalizeCopyrightYearsPadded,
-                           ignore=ignore)
+  return normalizeCopyrightYearsPadded
+
+
+def normalizeContentPadded(content, year=None, ignore=None, limit=None,
+                           plausible=None):
+  """Normalize the copyright headers in a string representing a file.
+
+    This function normalizes the copyright headers in a string. It also
+    tries to fix any whitespace paddings, for instance, in case the text
+    is framed at a fixed width. Just like normalizeContent it works on
+    str as well as bytes-like objects.
+  """
+  return _normalizeContent(content, _normalizeCopyrightYearsPaddedFn(year),
+                           ignore=ignore, limit=limit, plausible=plausible)
+
+
+# A mapping from content normalization functions to the functions
+# creating the per-match normalization functions they use.
+MATCH_FN_MAP = {
+  normalizeContent: _normalizeCopyrightYearsFn,
+  normalizeContentPadded: _normalizeCopyrightYearsPaddedFn,
+}
+
+
+class Normalizer:
+  """A normalization of copyright headers prepared for repeated use.
+
+    A Normalizer is created once from a content normalization function
+    (i.e., a policy), a year, a list of patterns to ignore, and
+    optionally a Range of plausible years. The
+    ignore patterns are compiled and the per-match normalization
+    function is created upon construction, so that none of that work
+    is repeated for each file or string normalized. Normalizers are
+    immutable and can be shared among threads. When pickled, e.g., for
+    transfer to a worker process, only the parameters they were created
+    from are stored.
+  """
+  def __init__(self, normalize_fn=normalizeContent, year=None, ignore=None,
+               plausible=None):
+    """Create a Normalizer using the given function, year, and ignore patterns."""
+    self._normalize_fn = normalize_fn
+    self._year = year
+    self._ignore = toIgnoreSet(ignore)
+    self._plausible = plausible
+
+    create_fn = MATCH_FN_MAP.get(normalize_fn)
+    # For normalization functions we do not know we cannot prepare
+    # anything and have to invoke them as they are.
+    self._match_fn = create_fn(year) if create_fn is not None else None
+
+
+  def __repr__(self):
+    """Convert the Normalizer into a string."""
+    return "Normalizer(%s, year=%r, ignore=%r, plausible=%r)" % (
+      self._normalize_fn.__name__, self._year, self._ignore, self._plausible
+    )
+
+
+  def __reduce__(self):
+    """Reduce the Normalizer to the parameters it was created from, for pickling."""
+    return Normalizer, (self._normalize_fn, self._year, self._ignore,
+                        self._plausible)
+
+
+  @property
+  def normalize_fn(self):
+    """Retrieve the content normalization function used."""
+    return self._normalize_fn
+
+
+  @property
+  def year(self):
+    """Retrieve the year copyright years are extended with, if any."""
+    return self._year
+
+
+  @property
+  def ignore(self):
+    """Retrieve the IgnoreSet of headers to leave alone, if any."""
+    return self._ignore
+
+
+  @property
+  def plausible(self):
+    """Retrieve the Range of years considered plausible, if any."""
+    return self._plausible
+
+
+  def normalize(self, content, limit=None):
+    """Normalize the copyright headers in a str or bytes-like object.
+
+      The function returns a tuple of the normalized content and the
+      number of copyright headers found, just like normalizeContent.
+    """
+    if self._match_fn is None:
+      # Normalization functions not knowing about plausible years can
+      # still be used as long as none are given.
+      kwargs = {} if self._plausible is None else {"plausible": self._plausible}
+      return self._normalize_fn(content, year=self._year, ignore=self._ignore,
+                                limit=limit, **kwargs)
+
+    return _normalizeContent(content, self._match_fn, ignore=self._ignore,
+                             limit=limit, plausible=self._plausible)
+
+
+  def normalizeData(self, data, limit=None):
+    """Normalize the copyright headers in the binary content of a file.
+
+      In contrast to normalize, data that do not even contain the
+      copyright keyword are ruled out without a search for headers.
+    """
+    if not mayContainCopyright(data, headerEnd(data, limit)):
+      return data, 0
+
+    return self.normalize(data, limit=limit)
+
+
+  def findChanges(self, content, limit=None):
+    """Find the changes normalization would make to a string.
+
+      The function returns a tuple of a list of (start, end,
+      replacement) tuples, one for each copyright header that changes,
+      and the number of headers found.
+    """
+    if self._match_fn is None:
+      # We do not know how the normalization function works internally.
+      # The best we can do is to treat its result as a single change.
+      new_content, found = self.normalize(content, limit=limit)
+      if new_content is content:
+        return [], found
 
+      return [(0, len(content), new_content)], found
 
-def normalizeFiles(files, normalize_fn=normalizeContent, year=None, ignore=None):
-  """Normalize the copyright headers of a list of files."""
-  for file_ in files:
-    with open(file_, "r+") as f:
-      content = f.read()
-      new_content, found = normalize_fn(content, year=year, ignore=ignore)
-      if found > 0 and new_content != content:
-        f.seek(0)
-        f.write(new_content)
-        # Remove potentially remaining data. We might just have merged
-        # some years together so the new content might be smaller than
-        # the previous one.
-        f.truncate()
+    return _findChanges(content, self._match_fn, ignore=self._ignore,
+                        limit=limit, plausible=self._plausible)
+
+
+  def normalizeFile(self, path, limit=None, mapped=False, report=None):
+    """Normalize the copyright headers of a file.
+
+      See the normalizeFile function for a description of the
+      parameters and the result.
+    """
+    fn = _normalizeMappedFile if mapped else _normalizeReadFile
+    with open(path, "rb+") as f:
+      status = fn(f, self, limit=limit, report=report)
+
+    if report is not None:
+      report.status = status
+
+    return status
+
+
+def findChanges(content, normalize_fn=normalizeContent, year=None,
+                ignore=None, limit=None, plausible=None):
+  """Find the changes normalization with the given function would make.
+
+    The function returns a tuple of a list of (start, end, replacement)
+    tuples, one for each copyright header that changes, and the number
+    of headers found. The content is searched in place, meaning that any
+    object supporting the buffer protocol, such as an mmap object, can
+    be used.
+  """
+  normalizer = Normalizer(normalize_fn, year, ignore, plausible)
+  return normalizer.findChanges(content, limit)
+
+
+def isBinary(data, end=None):
+  """Check whether binary data represent the content of a binary file.
+
+    Similar to git, we consider data containing a NUL byte to be binary.
+    Text in any of the common ASCII compatible encodings never contains
+    one. The data may be any object providing a find method, such as
+    bytes, bytearray, or mmap.
+  """
+  end = len(data) if end is None else end
+  return data.find(b"\0", 0, end) >= 0
+
+
+def sniffBinary(file_):
+  """Check whether a file's content is binary based on its beginning only.
+
+    The file has to be a buffered binary file object. At most the first
+    BINARY_SNIFF_SIZE bytes are looked at and none of them is consumed.
+    That allows for ruling out binary files of arbitrary size at
+    constant cost, before their content is read. Note that a negative
+    result is no guarantee that the content is not binary: data
+    following the sniffed part may still contain a NUL byte.
+  """
+  return isBinary(file_.peek(BINARY_SNIFF_SIZE)[:BINARY_SNIFF_SIZE])
+
+
+def normalizeData(data, normalize_fn=normalizeContent, year=None,
+                  ignore=None, limit=None, plausible=None):
+  """Normalize the copyright headers in the binary content of a file.
+
+    Only the scan window as defined by the given limit is searched for
+    copyright headers. No decoding takes place and all data besides the
+    copyright years is passed through unchanged.
+  """
+  normalizer = Normalizer(normalize_fn, year, ignore, plausible)
+  return normalizer.normalizeData(data, limit)
+
+
+def _normalizeMappedFile(file_, normalizer, limit=None, report=None):
+  """Normalize the copyright headers of an open file by mapping it into memory.
+
+    The file is searched in place. Changes that keep the length of the
+    changed headers (the common case of a year being bumped) are patched
+    directly into the mapping, causing only the affected pages to be
+    written back. Otherwise the file is rewritten starting at the first
+    change.
+  """
+  if fstat(file_.fileno()).st_size == 0:
+    # Empty files cannot be mapped. They do not contain a header either.
+    return Status.Prefiltered
+
+  with mmap(file_.fileno(), 0) as data:
+    with measure(report, "read"):
+      endpos = headerEnd(data, limit)
+      if report is not None:
+        report.bytes_read = endpos
+
+      if isBinary(data, endpos):
+        return Status.Binary
+
+      if not mayContainCopyright(data, endpos):
+        return Status.Prefiltered
+
+    with measure(report, "normalize"):
+      changes, found = normalizer.findChanges(data, limit=limit)
+      if report is not None:
+        report.found = found
+
+      if found == 0:
+        return Status.NoHeader
+
+      if not changes:
+        return Status.Unchanged
+
+    with measure(report, "write"):
+      if all(len(replacement) == end - start for start, end, replacement in changes):
+        for start, end, replacement in changes:
+          data[start:end] = replacement
+
+        return Status.Changed
+
+      # At least one header changed in size, so everything following
+      # it has to be moved. We retrieve the new content starting at the
+      # first change before unmapping the file and writing it back.
+      first = changes[0][0]
+      tail = _applyChanges(data, changes, start=first)
+
+  with measure(report, "write"):
+    file_.seek(first)
+    file_.write(tail)
+    file_.truncate()
+
+  return Status.Changed
+
+
+def _normalizeReadFile(file_, normalizer, limit=None, report=None):
+  """Normalize the copyright headers of an open file by reading its scan window."""
+  with measure(report, "read"):
+    # Rule out binary files before reading potentially large amounts
+    # of data.
+    if sniffBinary(file_):
+      return Status.Binary
+
+    header, _, _ = readHeader(file_, limit)
+    if report is not None:
+      report.bytes_read = len(header)
+
+    if isBinary(header):
+      return Status.Binary
+
+  with measure(report, "normalize"):
+    # Most files either contain no copyright header at all or only
+    # one that is already normalized. Rule out the former as cheaply as
+    # possible.
+    if not mayContainCopyright(header):
+      return Status.Prefiltered
+
+    new_header, found = normalizer.normalize(header)
+    if report is not None:
+      report.found = found
+
+    if found == 0:
+      return Status.NoHeader
+
+    if new_header is header:
+      return Status.Unchanged
+
+  with measure(report, "write"):
+    if len(new_header) == len(header):
+      file_.seek(0)
+      file_.write(new_header)
+    else:
+      # The header changed in size, so everything following it has to
+      # be moved as well.
+      file_.seek(len(header))
+      remainder = file_.read()
+      if report is not None:
+        report.bytes_read += len(remainder)
+
+      file_.seek(0)
+      file_.write(new_header)
+      file_.write(remainder)
+      # Remove potentially remaining data. We might just have merged
+      # some years together so the new content might be smaller than
+      # the previous one.
+      file_.truncate()
+
+  return Status.Changed
+
+
+def normalizeFile(path, normalize_fn=normalizeContent, year=None,
+                  ignore=None, limit=None, mapped=False, report=None,
+                  plausible=None):
+  """Normalize the copyright headers of a file.
+
+    If a scan limit is given only the window at the start of the file is
+    read and searched for copyright headers. If 'mapped' is True, the
+    file is mapped into memory instead of being read, and only the
+    changed bytes are written back. The function returns a Status value
+    describing the outcome. If a FileReport is given, it is filled in
+    with details about the processing of the file.
+  """
+  normalizer = Normalizer(normalize_fn, year, ignore, plausible)
+  return normalizer.normalizeFile(path, limit=limit, mapped=mapped,
+                                  report=report)
+
+
+def _iterBlocks(lines, size=KEYWORD_CHUNK_SIZE):
+  """Group lines into blocks that can be normalized independently.
+
+    Copyright years may continue on the lines following the copyright
+    keyword. A block containing the keyword is hence only finished once
+    a line is encountered that cannot possibly continue them. Other
+    blocks are finished once they reach the given size.
+  """
+  block = []
+  length = 0
+  keyword = False
+  for line in lines:
+    if keyword:
+      if not isContinuation(line):
+        yield b"".join(block)
+        block = []
+        length = 0
+        keyword = False
+    elif length >= size:
+      yield b"".join(block)
+      block = []
+      length = 0
+
+    block.append(line)
+    length += len(line)
+    keyword = keyword or KEYWORD in line.lower()
+
+  if block:
+    yield b"".join(block)
+
+
+def normalizeStream(input_, output, normalize_fn=normalizeContent, year=None,
+                    ignore=None, limit=None, plausible=None):
+  """Normalize the copyright headers of a stream, writing the result to another.
+
+    The input has to be a buffered binary file object and the output a
+    binary one. Data are written out incrementally: with a scan limit
+    only the window at the start of the input is held in memory and the
+    remainder is copied verbatim, otherwise the input is processed line
+    by line. In the latter case whether the input is binary is decided
+    based on its first BINARY_SNIFF_SIZE bytes. The function returns a
+    Status value describing the outcome.
+  """
+  from shutil import (
+    copyfileobj,
+  )
+
+  normalizer = Normalizer(normalize_fn, year, ignore, plausible)
+
+  if limit is not None:
+    header, rest, _ = readHeader(input_, limit)
+    if isBinary(header):
+      status = Status.Binary
+      new_header = header
+    else:
+      new_header, found = normalizer.normalizeData(header)
+      if not found:
+        status = Status.NoHeader if mayContainCopyright(header) else Status.Prefiltered
+      else:
+        status = Status.Unchanged if new_header is header else Status.Changed
+
+    output.write(new_header)
+    # Data read beyond the scan window have to be written out as well,
+    # before copying what is left of the input.
+    output.write(rest)
+    copyfileobj(input_, output)
+    return status
+
+  if sniffBinary(input_):
+    copyfileobj(input_, output)
+    return Status.Binary
+
+  keyword = False
+  found = 0
+  changed = False
+  for block in _iterBlocks(input_):
+    new_block, count = normalizer.normalizeData(block)
+    keyword = keyword or count > 0 or mayContainCopyright(block)
+    found += count
+    changed = changed or new_block is not block
+    output.write(new_block)
+
+  if changed:
+    return Status.Changed
+  elif found:
+    return Status.Unchanged
+  elif keyword:
+    return Status.NoHeader
+  else:
+    return Status.Prefiltered
+
+
+# The normalization parameters of a worker process in a pool as used by
+# iterNormalizeFiles and normalizeMany. They are transferred only once
+# per worker, so that just the items to process and their results have
+# to pass between processes.
+_WORKER_PARAMETERS = None
+
+
+def _initWorker(parameters):
+  """Initialize a worker process with the normalization parameters to use."""
+  global _WORKER_PARAMETERS
+  _WORKER_PARAMETERS = parameters
+
+
+def _createPool(jobs, parameters):
+  """Create a pool of worker processes using the given normalization parameters."""
+  # Importing multiprocessing takes a considerable amount of time. Most
+  # notably the pre-commit hook never uses a pool, so we only import it
+  # when actually needed.
+  from multiprocessing import (
+    Pool,
+  )
+  return Pool(jobs, _initWorker, (parameters,))
+
+
+def _normalizeFile(file_, normalizer, kwargs, reporting):
+  """Normalize a single file, creating a report for it if requested."""
+  report = FileReport(file_) if reporting else None
+  status = normalizer.normalizeFile(file_, report=report, **kwargs)
+  return file_, status, report
+
+
+def _normalizeFileInWorker(file_):
+  """Normalize a single file in a worker process."""
+  return _normalizeFile(file_, *_WORKER_PARAMETERS)
+
+
+def _iterNormalizeFiles(files, normalizer, kwargs, jobs, reporting):
+  """Normalize a sequence of files, optionally using a pool of processes.
+
+    The files may also be given as an iterator, in which case they are
+    handed to the worker processes as they are produced. The function
+    yields (file, status, report) tuples, with the report being None
+    unless 'reporting' is True.
+  """
+  try:
+    count = len(files)
+    jobs = min(jobs, count)
+  except TypeError:
+    count = None
+
+  if jobs <= 1:
+    for file_ in files:
+      yield _normalizeFile(file_, normalizer, kwargs, reporting)
+    return
+
+  # Hand out files in small batches to keep the inter process
+  # communication overhead low while still distributing load evenly.
+  if count is None:
+    chunksize = STREAM_CHUNK_SIZE
+  else:
+    chunksize = max(1, min(16, count // (jobs * 4)))
+
+  parameters = (normalizer, kwargs, reporting)
+  with _createPool(jobs, parameters) as pool:
+    yield from pool.imap_unordered(_normalizeFileInWorker, files, chunksize)
+
+
+def _normalizePrepared(content, normalizer, limit=None):
+  """Normalize a single str or bytes-like content using a Normalizer."""
+  if isinstance(content, str):
+    return normalizer.normalize(content, limit=limit)
+
+  # Binary content can be ruled out cheaply if it does not contain the
+  # copyright keyword.
+  return normalizer.normalizeData(content, limit=limit)
+
+
+def _normalizeContentInWorker(content):
+  """Normalize a single content in a worker process."""
+  return _normalizePrepared(content, *_WORKER_PARAMETERS)
+
+
+def normalizeMany(contents, normalize_fn=normalizeContent, year=None,
+                  ignore=None, limit=None, jobs=1, plausible=None):
+  """Normalize the copyright headers of many strings at once.
+
+    Contents may be given as str or bytes-like objects, just like for
+    normalizeContent. The function returns a list of (content, found)
+    tuples in the order of the input. Setup work, such as compiling the
+    ignore patterns and creating the per-match normalization function,
+    is done only once for all contents. Using 'jobs' they can be spread
+    over multiple worker processes.
+  """
+  normalizer = Normalizer(normalize_fn, year, ignore, plausible)
+  contents = list(contents)
+
+  jobs = min(jobs, len(contents))
+  if jobs <= 1:
+    return [_normalizePrepared(c, normalizer, limit) for c in contents]
+
+  chunksize = max(1, min(64, len(contents) // (jobs * 4)))
+  parameters = (normalizer, limit)
+  with _createPool(jobs, parameters) as pool:
+    return pool.map(_normalizeContentInWorker, contents, chunksize)
+
+
+def normalizerFingerprint(normalizer, limit=None):
+  """Create a fingerprint of the settings of a Normalizer, e.g., for use with a cache."""
+  # The cache is optional, so we only import it when actually used.
+  from deso.copyright.cache import (
+    fingerprint,
+  )
+
+  normalize_fn = normalizer.normalize_fn
+  return fingerprint(
+    "%s.%s" % (normalize_fn.__module__, normalize_fn.__qualname__),
+    normalizer.year,
+    normalizer.ignore.patterns if normalizer.ignore is not None else (),
+    limit,
+    normalizer.plausible,
+  )
+
+
+# The outcomes of normalizing a file that are remembered in a cache. All
+# of them imply that the file was left untouched.
+CACHED_STATUSES = {
+  Status.Unchanged,
+  Status.NoHeader,
+  Status.Prefiltered,
+  Status.Binary,
+}
+
+
+def _iterCachedNormalizeFiles(files, normalizer, kwargs, jobs, cache,
+                              reporting):
+  """Normalize a sequence of files, skipping those cached as not requiring a change."""
+  from deso.copyright.cache import (
+    FileCache,
+  )
+
+  settings = normalizerFingerprint(normalizer, kwargs["limit"])
+  with FileCache(cache, settings) as cache:
+    stamps = {}
+    hits = deque()
+
+    # Note that with multiple jobs the generator below runs in a thread
+    # of the pool while results are processed in this one. The cache is
+    # safe to use from multiple threads. A file's stamp is stored before
+    # the file is handed to the pool and hence before its result can
+    # arrive, and appending to and popping from a deque are thread-safe.
+    def uncached():
+      """Look up the files in the cache, yielding those not cached."""
+      for file_ in files:
+        value, stamp = cache.lookup(file_)
+        if value is not None:
+          status = Status(int(value))
+          report = None
+          if reporting:
+            report = FileReport(file_)
+            report.status = status
+            report.cached = True
+
+          hits.append((file_, status, report))
+        else:
+          stamps[file_] = stamp
+          yield file_
+
+    # Cached files are reported as they are found while the others are
+    # handed to the workers, so that lazily produced files are never
+    # collected up front.
+    results = _iterNormalizeFiles(uncached(), normalizer, kwargs, jobs,
+                                  reporting)
+    for file_, status, report in results:
+      while hits:
+        yield hits.popleft()
+
+      value = str(status.value) if status in CACHED_STATUSES else None
+      cache.update(stamps[file_], value)
+      yield file_, status, report
+
+    while hits:
+      yield hits.popleft()
+
+
+def iterNormalizeFiles(files, normalize_fn=normalizeContent, year=None,
+                       ignore=None, limit=None, mapped=False, jobs=1,
+                       cache=None, report=None, plausible=None):
+  """Normalize the copyright headers of a list of files, one after the other.
+
+    The function returns an iterator over (file, status) tuples which
+    are produced as soon as a file has been processed. With more than
+    one job the files are spread over a pool of worker processes and
+    the tuples arrive in the order the files are finished, not the
+    order in which they were provided. An error raised while processing
+    a file is propagated once that file's result is reached.
+
+    If 'cache' is the path to a cache file, files that did not need a
+    change in a previous run with the same settings, and that have not
+    been modified since, are skipped without being opened.
+
+    If 'report' is given, it has to be an object such as a ReportWriter
+    with a write method, which is invoked with a FileReport for every
+    file processed.
+  """
+  # Prepare the normalization only once for all files.
+  normalizer = Normalizer(normalize_fn, year, ignore, plausible)
+  kwargs = {"limit": limit, "mapped": mapped}
+  reporting = report is not None
+
+  if cache is None:
+    results = _iterNormalizeFiles(files, normalizer, kwargs, jobs, reporting)
+  else:
+    results = _iterCachedNormalizeFiles(files, normalizer, kwargs, jobs,
+                                        cache, reporting)
+
+  for file_, status, file_report in results:
+    if reporting:
+      report.write(file_report)
+
+    yield file_, status
+
+
+def normalizeFiles(files, normalize_fn=normalizeContent, year=None,
+                   ignore=None, limit=None, mapped=False, jobs=1, cache=None,
+                   report=None, plausible=None):
+  """Normalize the copyright headers of a list of files.
+
+    The function returns a Counter mapping each Status to the number of
+    files for which it was the outcome. Using 'jobs', the files can be
+    processed by the given number of worker processes in parallel.
+    'cache' may specify the path to a file caching outcomes across runs
+    and 'report' an object receiving a FileReport for each file.
+  """
+  stats = Counter()
+  results = iterNormalizeFiles(files, normalize_fn, year=year, ignore=ignore,
+                               limit=limit, mapped=mapped, jobs=jobs,
+                               cache=cache, report=report,
+                               plausible=plausible)
+  for _, status in results:
+    stats[status] += 1
+
+  return stats
+
+
+def jobsStringToCount(string, ErrorType=ValueError):
+  """Convert a job count string into a positive integer."""
+  try:
+    jobs = int(string)
+  except ValueError:
+    jobs = 0
+
+  if jobs <= 0:
+    error = "\"{jobs}\" is not a valid number of jobs. It must be a "\
+            "positive integer"
+    raise ErrorType(error.format(jobs=string))
+
+  return jobs
+
+
+def plausibleStringToRange(string, ErrorType=ValueError):
+  """Convert a string such as '1970-2100' into a Range of plausible years."""
+  try:
+    return Range.parse(string)
+  except ValueError as e:
+    error = "\"{years}\" is not a valid range of plausible years: {error}"
+    raise ErrorType(error.format(years=string, error=e)) from None
+
+
+def formatStatistics(stats):
+  """Convert the statistics gathered by normalizeFiles into a string."""
+  s = "{total} files: {changed} changed, {unchanged} already normalized, "\
+      "{no_header} without copyright header, {prefiltered} ruled out by "\
+      "keyword search, {binary} binary"
+  return s.format(total=sum(stats.values()),
+                  changed=stats[Status.Changed],
+                  unchanged=stats[Status.Unchanged],
+                  no_header=stats[Status.NoHeader],
+                  prefiltered=stats[Status.Prefiltered],
+                  binary=stats[Status.Binary])
 
 
 # A mapping from policy strings to content normalization functions.
@@ -203,9 +974,20 @@ POLICY_MAP = {
 }
 
 
-def policyStringToFunction(policy, ErrorType=ArgumentTypeError):
-  """Map a policy string to a normalization function using this policy."""
+def policyStringToFunction(policy, ErrorType=None):
+  """Map a policy string to a normalization function using this policy.
+
+    Unless another 'ErrorType' is given, an unsupported policy results in
+    an ArgumentTypeError.
+  """
   if not policy in POLICY_MAP:
+    if ErrorType is None:
+      # Importing argparse is expensive and most users never hit this
+      # path, so we only do so when the error actually occurs.
+      from argparse import (
+        ArgumentTypeError as ErrorType,
+      )
+
     policies = listToEnglishEnumeration(list(POLICY_MAP.keys()))
     error = "Unsupported policy: \"{policy}\". Supported policies are: {policies}"
     error = error.format(policy=policy, policies=policies)
@@ -214,47 +996,15 @@ def policyStringToFunction(policy, ErrorType=ArgumentTypeError):
   return POLICY_MAP[policy]
 
 
-def setupArgumentParser():
-  """Create and initialize an argument parser, ready for use."""
-  parser = ArgumentParser()
-  parser.add_argument(
-    "files", action="store", metavar="files", nargs="+",
-    help="A list of files to check and potentially fix up the copyright "
-         "headers for the current year.",
-  )
-  parser.add_argument(
-    "--policy", action="store", default=normalizeContent,
-    dest="normalization_fn", metavar="policy",
-    type=policyStringToFunction,
-    help="Specify a policy to use. A policy influences the way "
-         "normalization is performed. Available options are: %s." %
-         listToEnglishEnumeration(list(POLICY_MAP.keys())),
-  )
-  parser.add_argument(
-    "--year", action="store", default=None, metavar="year", type=int,
-    help="Specify a year to extend the copyright year range by. By "
-         "default the copyright years are just normalizaed, not "
-         "extended.",
-  )
-  parser.add_argument(
-    "--ignore", action="append", default=[], metavar="ignore",
-    help="Ignore copyright headers matching a certain pattern. That is, "
-         "if a copyright " "replacement is about to be made it will be "
-         "cancelled if the very match also matches the pattern provided "
-         "via this argment. This option can be supplied multiple times.",
-  )
-  return parser
-
-
 def main(argv):
   """The main function parses the script's arguments and acts upon them."""
-  parser = setupArgumentParser()
-  ns = parser.parse_args(argv[1:])
-
-  normalizeFiles(ns.files, normalize_fn=ns.normalization_fn,
-                 year=ns.year, ignore=ns.ignore)
-  return 0
-
+  # The command line interface is kept in a module of its own, so that
+  # users of the library, such as the pre-commit hook, do not have to
+  # pay for importing it.
+  from deso.copyright.cli import (
+    main as main_,
+  )
+  return main_(argv)
 
 if __name__ == "__main__":
   exit(main(sysargv))
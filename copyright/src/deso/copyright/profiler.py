@@ -0,0 +1,205 @@
+# profiler.py
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Functionality for finding out where time is spent.
+
+  A profiler accumulates the time spent in and the number of calls to
+  named phases of processing. Upon completion it prints a summary table
+  along with the peak amount of memory allocated by Python and may dump
+  the statistics of a cProfile run for analysis with pstats.
+"""
+
+from contextlib import (
+  contextmanager,
+  nullcontext,
+)
+from functools import (
+  wraps,
+)
+from sys import (
+  stderr,
+)
+from time import (
+  perf_counter,
+)
+
+
+# The name of the pseudo phase covering the entire run.
+TOTAL = "total"
+
+
+class Profiler:
+  """A profiler recording cumulative time and call counts per phase.
+
+    A disabled profiler does not record anything and causes no overhead
+    beyond a function call per phase. A profiler is started and stopped
+    by using it as a context manager. When stopped, the summary is
+    written to the given output and, if a path to dump to is given, the
+    cProfile statistics are saved there.
+  """
+  def __init__(self, enabled=True, dump=None, output=stderr):
+    """Create a new profiler."""
+    self._enabled = enabled or dump is not None
+    self._dump = dump
+    self._output = output
+    self._phases = {}
+    self._profile = None
+    self._start = None
+    self._peak = None
+
+
+  def __enter__(self):
+    """Start the profiler."""
+    if self._enabled:
+      # Profilers are typically disabled. We only import the modules
+      # required for profiling when actually used, to not slow down
+      # start up in the common case.
+      from tracemalloc import (
+        start as startTracing,
+      )
+
+      startTracing()
+      if self._dump is not None:
+        from cProfile import (
+          Profile,
+        )
+
+        self._profile = Profile()
+        self._profile.enable()
+
+      self._start = perf_counter()
+    return self
+
+
+  def __exit__(self, type_, value, traceback):
+    """Stop the profiler and report the results."""
+    if not self._enabled:
+      return
+
+    from tracemalloc import (
+      get_traced_memory,
+      stop as stopTracing,
+    )
+
+    self.add(TOTAL, perf_counter() - self._start)
+    _, self._peak = get_traced_memory()
+    stopTracing()
+
+    if self._profile is not None:
+      self._profile.disable()
+      self._profile.dump_stats(self._dump)
+
+    if self._output is not None:
+      print(self.summary(), file=self._output)
+
+
+  @property
+  def enabled(self):
+    """Check whether the profiler is enabled."""
+    return self._enabled
+
+
+  @property
+  def phases(self):
+    """Retrieve a dict mapping phase names to (time, calls) tuples."""
+    return {name: tuple(value) for name, value in self._phases.items()}
+
+
+  def add(self, name, elapsed, calls=1):
+    """Add the given time and number of calls to a phase."""
+    value = self._phases.setdefault(name, [0.0, 0])
+    value[0] += elapsed
+    value[1] += calls
+
+
+  @contextmanager
+  def _measure(self, name):
+    """Measure the time spent in a phase."""
+    start = perf_counter()
+    try:
+      yield
+    finally:
+      self.add(name, perf_counter() - start)
+
+
+  def phase(self, name):
+    """Create a context manager measuring the time spent in a phase."""
+    return self._measure(name) if self._enabled else nullcontext()
+
+
+  def profiled(self, name):
+    """Create a decorator attributing the time spent in a function to a phase."""
+    def decorator(function):
+      """Wrap a function such that the time spent in it is measured."""
+      if not self._enabled:
+        return function
+
+      @wraps(function)
+      def wrapper(*args, **kwargs):
+        """Invoke the wrapped function, measuring it."""
+        with self._measure(name):
+          return function(*args, **kwargs)
+
+      return wrapper
+
+    return decorator
+
+
+  def write(self, report):
+    """Record the phase times of a FileReport.
+
+      A profiler can act as the receiver of reports as created by
+      normalizeFiles. That way, the time spent in worker processes is
+      accounted for as well.
+    """
+    for phase, elapsed in report.times.items():
+      if elapsed > 0:
+        self.add(phase, elapsed)
+
+
+  def summary(self):
+    """Create a table summarizing the recorded phases."""
+    width = max([len(name) for name in self._phases] + [len("phase")])
+    row = "{name:<{width}}  {calls:>8}  {time:>12}"
+    lines = [row.format(name="phase", width=width, calls="calls", time="time [s]")]
+
+    # Phases are listed in the order they were first recorded, except for
+    # the total, which always comes last.
+    phases = sorted(self._phases.items(), key=lambda x: x[0] == TOTAL)
+    for name, (elapsed, calls) in phases:
+      lines.append(row.format(name=name, width=width, calls=calls,
+                              time="%.6f" % elapsed))
+
+    if self._peak is not None:
+      lines.append("peak memory: %.1f KiB" % (self._peak / 1024))
+
+    return "\n".join(lines)
+
+
+class ReportTee:
+  """A receiver of reports forwarding each of them to a number of others."""
+  def __init__(self, *receivers):
+    """Create a tee forwarding reports to the given receivers."""
+    self._receivers = [r for r in receivers if r is not None]
+
+
+  def write(self, report):
+    """Forward a report to all receivers."""
+    for receiver in self._receivers:
+      receiver.write(report)
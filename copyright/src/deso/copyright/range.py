@@ -22,10 +22,32 @@
 from collections import (
   namedtuple,
 )
+from functools import (
+  lru_cache,
+)
+from re import (
+  compile as regex,
+  escape,
+)
 
 
 # The character separating two years in a range.
 YEAR_SEPARATOR = "-"
+# A regular expression string matching the years of a range, i.e., a
+# single year optionally followed by the separator and another year.
+# Whitespace is allowed around the separator and after the last year.
+# The first and (optional) last year are captured in groups.
+YEARS = r"([0-9]+)\s*(?:{s}\s*([0-9]+)\s*)?"
+YEARS_R = YEARS.format(s=escape(YEAR_SEPARATOR))
+# A regular expression string matching a range string in its entirety,
+# when used with fullmatch.
+RANGE_R = r"\s*" + YEARS_R
+
+
+@lru_cache(maxsize=None)
+def _rangeRegex():
+  """Retrieve the compiled RANGE_R, compiling it on first use only."""
+  return regex(RANGE_R)
 
 
 class Range(namedtuple("Range", ["first", "last"])):
@@ -77,20 +99,12 @@ class Range(namedtuple("Range", ["first", "last"])):
   @staticmethod
   def parse(string):
     """Parse a range from a string."""
-    try:
-      # A range of years can be represented in two ways. If it is a single
-      # year, we can convert it into an integer directly.
-      year = int(string)
-      return Range(year, year)
-    except ValueError:
-      # If this cast did not work we must have gotten a "true" range, e.g.,
-      # 2010-2012.
-      try:
-         # We might not have enough elements in the list, too many, or we might
-         # again fail to convert them to integers. In any case a ValueError is
-         # raised.
-        first, last = list(map(int, string.split(YEAR_SEPARATOR)))
-      except ValueError:
-        raise ValueError("Not a valid range: \"%s\"" % string)
-
-      return Range(first, last)
+    # A range of years can be represented in two ways: as a single year
+    # or as a "true" range, e.g., 2010-2012.
+    match = _rangeRegex().fullmatch(string)
+    if match is None:
+      raise ValueError("Not a valid range: \"%s\"" % string)
+
+    first, last = match.group(1, 2)
+    first = int(first)
+    return Range(first, int(last) if last is not None else first)
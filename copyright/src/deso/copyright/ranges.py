@@ -21,20 +21,180 @@
 
 from deso.copyright.range import (
   Range,
+  YEAR_SEPARATOR,
+)
+from bisect import (
+  bisect_right,
+)
+from functools import (
+  lru_cache,
+)
+from re import (
+  compile as regex,
+  escape,
 )
 
 
 # The character separating two ranges from each other.
 RANGES_SEPARATOR = ","
+# The maximum number of normalized range strings remembered.
+RANGES_CACHE_SIZE = 4096
+# The largest integer the vectorized batch normalization can work with.
+INT64_MAX = 2 ** 63 - 1
+# A regular expression matching the longest prefix of a range that
+# could still be completed into a valid one. It is used for locating
+# errors only.
+PARTIAL_RANGE = r"\s*(?:[0-9]+\s*(?:{s}\s*(?:[0-9]+\s*)?)?)?"
+PARTIAL_RANGE_R = PARTIAL_RANGE.format(s=escape(YEAR_SEPARATOR))
+
+
+def _isYear(string):
+  """Check whether a string consists of ASCII digits only."""
+  return string.isdigit() and string.isascii()
+
+
+def _rangesError(ranges_string, start, string):
+  """Create an error for an invalid range found at the given index."""
+  pos = start + regex(PARTIAL_RANGE_R).match(string).end()
+  if pos < len(ranges_string):
+    what = "\"%s\"" % ranges_string[pos]
+  else:
+    what = "end of string"
+
+  error = "Not a valid range string: \"{s}\" (unexpected {w} at position {p})"
+  return ValueError(error.format(s=ranges_string, w=what, p=pos))
+
+
+def scanRanges(ranges_string):
+  """Parse a range string into a list of (first, last) tuples.
+
+    The string is scanned range by range without exceptions being
+    raised along the way. Whitespace around years and separators as
+    well as empty ranges (e.g., as caused by a trailing separator) are
+    permitted. A ValueError describing the position of the problem is
+    raised for malformed strings.
+  """
+  pairs = []
+  start = 0
+
+  for string in ranges_string.split(RANGES_SEPARATOR):
+    if _isYear(string):
+      # The by far most common case is a single year without any
+      # whitespace, which we check for first.
+      year = int(string)
+      pairs.append((year, year))
+    else:
+      first, separator, last = string.partition(YEAR_SEPARATOR)
+      first = first.strip()
+      last = last.strip()
+
+      if _isYear(first) and (not separator or _isYear(last)):
+        first = int(first)
+        last = int(last) if separator else first
+        if first > last:
+          pos = start + len(string) - len(string.lstrip())
+          error = "First year ({first}) is greater than second year "\
+                  "({last}) at position {p}"
+          raise ValueError(error.format(first=first, last=last, p=pos))
+
+        pairs.append((first, last))
+      elif first or separator:
+        raise _rangesError(ranges_string, start, string)
+
+    start += len(string) + len(RANGES_SEPARATOR)
+
+  return pairs
 
 
 def parseRanges(ranges_string):
   """Parse a range string into a sequence of Range objects."""
-  # We want to be very permissive with respect to whitespaces between
-  # the individual years/ranges, so strip each supposed range string
-  # before trying to parse it.
-  ranges_string_list = map(str.strip, ranges_string.split(RANGES_SEPARATOR))
-  return list(map(Range.parse, filter(lambda x: len(x) > 0, ranges_string_list)))
+  return [Range(first, last) for first, last in scanRanges(ranges_string)]
+
+
+class RangeSet:
+  """A set of years, represented as a sorted list of disjoint ranges.
+
+    Ranges in the set neither overlap nor adjoin each other, meaning
+    that iterating over a RangeSet yields the ranges in normalized form.
+    Creating a set from a list of ranges takes a sort followed by a
+    single linear sweep merging them. Individual years are added in
+    place, locating the affected ranges using binary search.
+  """
+  def __init__(self, ranges=()):
+    """Create a RangeSet containing the years of the given ranges."""
+    # We keep the first and last years in separate lists in order to be
+    # able to bisect the former directly.
+    self._firsts = []
+    self._lasts = []
+
+    for first, last in sorted(ranges):
+      if self._lasts and first <= self._lasts[-1] + 1:
+        # The range overlaps with or adjoins the previous one, which
+        # hence has to be extended (if it does not contain it already).
+        if last > self._lasts[-1]:
+          self._lasts[-1] = last
+      else:
+        self._firsts.append(first)
+        self._lasts.append(last)
+
+
+  def __repr__(self):
+    """Convert the RangeSet into a string representation."""
+    return "RangeSet(%r)" % (list(self),)
+
+
+  def __str__(self):
+    """Convert the RangeSet into a range string."""
+    return stringifyRanges(self)
+
+
+  def __eq__(self, other):
+    """Compare two range sets."""
+    return isinstance(other, RangeSet) and \
+           self._firsts == other._firsts and \
+           self._lasts == other._lasts
+
+
+  def __len__(self):
+    """Retrieve the number of ranges in the set."""
+    return len(self._firsts)
+
+
+  def __iter__(self):
+    """Iterate over the ranges in the set, in increasing order."""
+    for first, last in zip(self._firsts, self._lasts):
+      yield Range(first, last)
+
+
+  def __contains__(self, year):
+    """Check whether a year is contained in the set."""
+    i = bisect_right(self._firsts, year)
+    return i > 0 and year <= self._lasts[i - 1]
+
+
+  def add(self, year):
+    """Add a year to the set."""
+    # The index of the first range starting after the year. The range
+    # before it is the only one that can contain or be extended by it.
+    i = bisect_right(self._firsts, year)
+    if i > 0 and year <= self._lasts[i - 1]:
+      return
+
+    extends_lower = i > 0 and self._lasts[i - 1] + 1 == year
+    extends_upper = i < len(self._firsts) and self._firsts[i] - 1 == year
+
+    if extends_lower and extends_upper:
+      # The year closes the gap between two ranges.
+      self._lasts[i - 1] = self._lasts[i]
+      del self._firsts[i]
+      del self._lasts[i]
+    elif extends_lower:
+      self._lasts[i - 1] = year
+    elif extends_upper:
+      self._firsts[i] = year
+    else:
+      self._firsts.insert(i, year)
+      self._lasts.insert(i, year)
 
 
 def normalizeRanges(ranges):
@@ -45,36 +205,163 @@ def normalizeRanges(ranges):
     increasing order. Second, ranges that subsume other ones are merged
     together.
   """
-  # We require a sorted list of ranges to work on. Otherwise we would
-  # require multiple passes of the merge loop below.
-  ranges.sort()
-  # We start off with the last element in the list of ranges.
-  i = len(ranges) - 1
-
-  # We loop from back to front because we remove ranges in the middle
-  # and do not want our indexes to become invalid.
-  while i > 0:
-    range1 = ranges[i - 1]
-    range2 = ranges[i]
-
-    assert range1 <= range2, (range1, range2)
-
-    # Check if the "smaller" range actually subsumes (contains) the
-    # "larger" one. If so, merge them into a single one.
-    if range2.first in range1 or range1.extendedBy(range2.first):
-      del ranges[i]
-      ranges[i - 1] = Range(range1.first, max(range1.last, range2.last))
-
-      # We just removed an element. If there are no "greater" elements
-      # behind us we can just decrease our index. Otherwise we need to
-      # check if it is possible to merge at the same index again because
-      # now we have a new element there.
-      if i >= len(ranges):
-        i -= 1
-    else:
-      i -= 1
+  ranges[:] = RangeSet(ranges)
 
 
 def stringifyRanges(ranges):
   """Convert a list of ranges into a string."""
   return RANGES_SEPARATOR.join(map(str, ranges))
+
+
+@lru_cache(maxsize=RANGES_CACHE_SIZE)
+def normalizeRangesString(ranges_string, year=None):
+  """Normalize a range string, optionally extending it by a year.
+
+    Across a source tree the same few range strings are encountered over
+    and over again. Results are hence memoized in a bounded LRU cache.
+    Statistics about its effectiveness are available through
+    normalizeRangesString.cache_info().
+  """
+  ranges = RangeSet(scanRanges(ranges_string))
+  if year is not None:
+    ranges.add(year)
+
+  return str(ranges)
+
+
+def flattenRanges(range_lists):
+  """Flatten lists of Range objects into the arrays used by normalizeRangesBatch.
+
+    The function returns a tuple of three lists (firsts, lasts, owners)
+    with one entry for each range, the owner being the index of the list
+    the range belongs to.
+  """
+  firsts = []
+  lasts = []
+  owners = []
+  for owner, ranges in enumerate(range_lists):
+    for first, last in ranges:
+      firsts.append(first)
+      lasts.append(last)
+      owners.append(owner)
+
+  return firsts, lasts, owners
+
+
+def _mergeRangesPython(firsts, lasts, owners, count, year):
+  """Merge the ranges of each owner, one range after the other."""
+  triples = list(zip(owners, firsts, lasts))
+  if year is not None:
+    triples.extend((owner, year, year) for owner in range(count))
+
+  triples.sort()
+  merged = []
+  for owner, first, last in triples:
+    # The ranges are sorted, so a range can only ever be merged into
+    # the one directly preceding it.
+    if merged and merged[-1][0] == owner and first <= merged[-1][2] + 1:
+      merged[-1][2] = max(merged[-1][2], last)
+    else:
+      merged.append([owner, first, last])
+
+  return merged
+
+
+def _mergeRangesNumpy(firsts, lasts, owners, count, year):
+  """Merge the ranges of each owner using vectorized operations.
+
+    The function returns None if the years are too large to be handled.
+    An ImportError is raised if NumPy is not available.
+  """
+  from numpy import (
+    arange,
+    asarray,
+    concatenate,
+    empty,
+    flatnonzero,
+    full,
+    int64,
+    lexsort,
+    maximum,
+  )
+
+  try:
+    firsts = asarray(firsts, dtype=int64)
+    lasts = asarray(lasts, dtype=int64)
+    owners = asarray(owners, dtype=int64)
+  except OverflowError:
+    return None
+
+  if year is not None:
+    firsts = concatenate((firsts, full(count, year, dtype=int64)))
+    lasts = concatenate((lasts, full(count, year, dtype=int64)))
+    owners = concatenate((owners, arange(count, dtype=int64)))
+
+  if len(firsts) == 0:
+    return []
+
+  order = lexsort((lasts, firsts, owners))
+  firsts = firsts[order]
+  lasts = lasts[order]
+  owners = owners[order]
+
+  # We need the running maximum of the last years within each owner's
+  # ranges. Offsetting each owner's (shifted) last years by a multiple
+  # of their span makes a single running maximum over all of them do
+  # just that, because the values of an owner are all greater than those
+  # of the owners before it.
+  low = int(lasts.min())
+  span = int(lasts.max()) - low + 2
+  if (int(owners[-1]) + 1) * span > INT64_MAX:
+    return None
+
+  offsets = owners * span
+  reach = maximum.accumulate(offsets + (lasts - low)) - offsets + low
+
+  # A range starts a new merged range if it belongs to a different owner
+  # than the one before it or if it neither overlaps nor adjoins any of
+  # the ranges before it.
+  starts = empty(len(firsts), dtype=bool)
+  starts[0] = True
+  starts[1:] = (owners[1:] != owners[:-1]) | (firsts[1:] > reach[:-1] + 1)
+  indices = flatnonzero(starts)
+
+  return list(zip(owners[indices].tolist(),
+                  firsts[indices].tolist(),
+                  maximum.reduceat(lasts, indices).tolist()))
+
+
+def normalizeRangesBatch(firsts, lasts, owners, count=None, year=None):
+  """Normalize many lists of ranges at once and convert them into strings.
+
+    The ranges are given as three flat sequences (e.g., NumPy arrays or
+    lists as created by flattenRanges) of the first and last years of
+    each range and the index of the list it belongs to. The function
+    returns a list of 'count' range strings, one for each list, that
+    are the same normalizeRanges and stringifyRanges would produce. If
+    a year is given, each list is extended by it.
+
+    If NumPy is available, sorting and merging happen in vectorized
+    operations. Otherwise, or for years too large to be represented as
+    64 bit integers, a pure Python implementation is used. NumPy is only
+    imported once this function is called.
+  """
+  if count is None:
+    count = max(owners) + 1 if len(owners) > 0 else 0
+
+  try:
+    merged = _mergeRangesNumpy(firsts, lasts, owners, count, year)
+  except ImportError:
+    merged = None
+
+  if merged is None:
+    merged = _mergeRangesPython(firsts, lasts, owners, count, year)
+
+  strings = [[] for _ in range(count)]
+  for owner, first, last in merged:
+    if first == last:
+      strings[owner].append("%d" % first)
+    else:
+      strings[owner].append("%d%s%d" % (first, YEAR_SEPARATOR, last))
+
+  return [RANGES_SEPARATOR.join(s) for s in strings]
@@ -0,0 +1,101 @@
+# report.py
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Functionality for reporting details about the processing of files.
+
+  A report consists of one JSON object per line, each describing the
+  outcome of processing a single file along with the amount of data
+  read and the time spent in the individual phases of processing it.
+"""
+
+from contextlib import (
+  contextmanager,
+  nullcontext,
+)
+from os import (
+  fsdecode,
+)
+from time import (
+  perf_counter,
+)
+
+
+# The phases of processing a file the time spent in is measured.
+PHASES = ("read", "normalize", "write")
+
+
+class FileReport:
+  """A report about the processing of a single file."""
+  def __init__(self, path):
+    """Create an empty report for the file at the given path."""
+    self.path = fsdecode(path)
+    self.status = None
+    self.cached = False
+    self.bytes_read = 0
+    self.found = 0
+    self.times = dict.fromkeys(PHASES, 0.0)
+
+
+  @contextmanager
+  def measure(self, phase):
+    """Measure the time spent in the given phase, adding it to the report."""
+    start = perf_counter()
+    try:
+      yield
+    finally:
+      self.times[phase] += perf_counter() - start
+
+
+  def toDict(self):
+    """Convert the report into a dict suitable for serialization."""
+    data = {
+      "path": self.path,
+      "status": str(self.status) if self.status is not None else None,
+      "cached": self.cached,
+      "bytes_read": self.bytes_read,
+      "found": self.found,
+    }
+    for phase in PHASES:
+      data["%s_time" % phase] = round(self.times[phase], 6)
+
+    return data
+
+
+def measure(report, phase):
+  """Measure the time spent in a phase if a report is given at all."""
+  return report.measure(phase) if report is not None else nullcontext()
+
+
+class ReportWriter:
+  """A writer emitting reports as JSON lines into a text file object."""
+  def __init__(self, file_):
+    """Create a report writer writing to the given file object."""
+    # The json module is only needed once reports are actually written,
+    # which is not the case for most runs.
+    from json import (
+      dumps,
+    )
+
+    self._file = file_
+    self._dumps = dumps
+
+
+  def write(self, report):
+    """Write a single report."""
+    self._file.write(self._dumps(report.toDict(), sort_keys=True) + "\n")
@@ -0,0 +1,311 @@
+# scanner.py
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""A linear time scanner for copyright headers.
+
+  A copyright header is described by COPYRIGHT_R: the keyword
+  "copyright", followed by at least one more character and then the
+  copyright years on the same line, with the remainder of the line
+  forming the suffix. The regular expression checks for copyright years
+  following at every single character of a line, though, and retries
+  that for every occurrence of the keyword. For long lines containing
+  the keyword but no years, that is quadratic in the length of the line.
+
+  The scanner in this module finds exactly the same matches, but it
+  assembles them from a few simple searches that never backtrack,
+  resulting in a run time linear in the size of the input.
+
+  Regular expressions are compiled only once they are first used, as
+  loading this module is part of the start up of the pre-commit hook.
+"""
+
+from deso.copyright.range import (
+  YEAR_SEPARATOR,
+)
+from deso.copyright.ranges import (
+  RANGES_SEPARATOR,
+)
+from functools import (
+  lru_cache,
+)
+from re import (
+  compile as regex,
+  escape,
+  IGNORECASE,
+)
+
+
+ANY_R = r"[^\n\r]"
+# A regular expression string representing a single year. Note that we
+# deliberately do not require a year to start with a number not equal to
+# zero. Sometimes years are shortened, e.g., 98 could represent 1998 or
+# 07 could stand for 2007, and we want to match those years as well. We
+# might fail because of that, but at least we raise awareness (for a
+# "wrong" [in this program's sense] year representation). A year has
+# at most YEAR_DIGITS digits, though, and a longer run of digits (as
+# found in hexadecimal numbers, hashes, or phone numbers) does not
+# contain a year at all. Not only are such runs no plausible years,
+# converting them to integers takes time quadratic in their length
+# and, beyond a certain length, raises an error.
+YEAR_DIGITS = 4
+YEAR = r"(?<![0-9])[0-9]{{1,{n}}}(?![0-9])"
+YEAR_R = YEAR.format(n=YEAR_DIGITS)
+YEAR_SEP_R = escape(YEAR_SEPARATOR)
+RANGES_SEP_R = escape(RANGES_SEPARATOR)
+# A regular expression string representing a list of years separated by
+# range separators or separators between ranges.
+YEAR_LIST = r"{y}(?:\s*[{s1}{s2}]\s*{y})*"
+YEAR_LIST_R = YEAR_LIST.format(y=YEAR_R, s1=YEAR_SEP_R, s2=RANGES_SEP_R)
+# A regular expression string representing copyright years. Note that we
+# consume any trailing range separators here silently. Years followed by
+# a separator and digits not forming a year, such as a digit run too
+# long to be one, are no copyright years: they could not be normalized
+# without merging the new years into these digits.
+CYEARS = r"{l}(?!\s*[{s1}{s2}][\s{s1}{s2}]*[0-9]){s2}*"
+CYEARS_R = CYEARS.format(l=YEAR_LIST_R, s1=YEAR_SEP_R, s2=RANGES_SEP_R)
+KEYWORD_R = r"copyright"
+PREFIX = r"{k}(?:{a}(?!{c}))*{a}"
+PREFIX_R = PREFIX.format(k=KEYWORD_R, a=ANY_R, c=CYEARS_R)
+SUFFIX = r"{a}*"
+SUFFIX_R = SUFFIX.format(a=ANY_R)
+# A regular expression string representing what we expect a line with a
+# copyright reference to look like. Note that the regular expression can
+# not only work on a line-by-line but also a per-file basis. In fact,
+# that is the intended usage because then we do not have to care about
+# different line endings when writing out data.
+COPYRIGHT = r"({p})({c})({s})"
+COPYRIGHT_R = COPYRIGHT.format(p=PREFIX_R, c=CYEARS_R, s=SUFFIX_R)
+# A regular expression string matching either the first digit of the
+# copyright years or the end of the line.
+YEAR_OR_EOL_R = r"[0-9\n\r]"
+EOL_R = r"[\n\r]"
+DIGITS_R = r"[0-9]+"
+
+
+def _compile(pattern, binary, flags=0):
+  """Compile a pattern for str or, if 'binary' is True, for bytes-like objects.
+
+    All of the patterns above are pure ASCII, which means that they
+    match the same characters in an ASCII compatible encoding.
+  """
+  return regex(pattern.encode("ascii") if binary else pattern, flags)
+
+
+@lru_cache(maxsize=None)
+def copyrightRegex(binary=False):
+  """Retrieve the regular expression able to capture a copyright line.
+
+    It serves as the reference definition of what the scanner matches.
+  """
+  return _compile(COPYRIGHT_R, binary, IGNORECASE)
+
+
+class ScanMatch:
+  """A match of a copyright header as found by CopyrightScanner.
+
+    A match provides a subset of the interface of a regular expression
+    match object. Group 1 is the prefix, group 2 the copyright years,
+    and group 3 the suffix, just as for copyrightRegex.
+  """
+  __slots__ = ("string", "_spans")
+
+  def __init__(self, string, start, years, suffix, end):
+    """Create a new match from the indices of its groups."""
+    self.string = string
+    self._spans = (start, years, suffix, end)
+
+
+  def __repr__(self):
+    """Convert the match into a string."""
+    return "<ScanMatch span=%r match=%r>" % (self.span(), self.group(0))
+
+
+  def start(self, group=0):
+    """Retrieve the start index of a group."""
+    return self.span(group)[0]
+
+
+  def end(self, group=0):
+    """Retrieve the end index of a group."""
+    return self.span(group)[1]
+
+
+  def span(self, group=0):
+    """Retrieve the (start, end) indices of a group."""
+    start, years, suffix, end = self._spans
+    if group == 0:
+      return start, end
+    elif group == 1:
+      return start, years
+    elif group == 2:
+      return years, suffix
+    elif group == 3:
+      return suffix, end
+    else:
+      raise IndexError("no such group")
+
+
+  def group(self, group=0):
+    """Retrieve the string matched by a group."""
+    start, end = self.span(group)
+    return self._slice(start, end)
+
+
+  def groups(self):
+    """Retrieve a tuple of the prefix, copyright years, and suffix strings."""
+    start, years, suffix, end = self._spans
+    slice_ = self._slice
+    return slice_(start, years), slice_(years, suffix), slice_(suffix, end)
+
+
+  def _slice(self, start, end):
+    """Retrieve part of the scanned string as a str or bytes object."""
+    string = self.string[start:end]
+    return string if isinstance(string, (str, bytes)) else bytes(string)
+
+
+class CopyrightScanner:
+  """A scanner for copyright headers with guaranteed linear run time.
+
+    By default any run of up to YEAR_DIGITS digits is a year. If a
+    Range of plausible years is given, only years within it count and
+    a year has at most as many digits as the last plausible one.
+    Copyright years containing another year are left alone, just as if
+    they were followed by a digit run too long to be a year.
+  """
+  def __init__(self, binary=False, plausible=None):
+    """Create a scanner for str or, if 'binary' is True, for bytes-like objects."""
+    if plausible is None:
+      year_list, years = YEAR_LIST_R, CYEARS_R
+    else:
+      year = YEAR.format(n=len(str(plausible.last)))
+      year_list = YEAR_LIST.format(y=year, s1=YEAR_SEP_R, s2=RANGES_SEP_R)
+      years = CYEARS.format(l=year_list, s1=YEAR_SEP_R, s2=RANGES_SEP_R)
+
+    self._keyword = _compile(KEYWORD_R, binary, IGNORECASE)
+    self._year_or_eol = _compile(YEAR_OR_EOL_R, binary)
+    self._eol = _compile(EOL_R, binary)
+    self._digits = _compile(DIGITS_R, binary)
+    self._year_list = _compile(year_list, binary)
+    self._years = _compile(years, binary)
+    self._keyword_length = len(KEYWORD_R)
+    self._plausible = plausible
+
+
+  def _endOfLine(self, string, pos, endpos):
+    """Find the end of the line containing the given position."""
+    match = self._eol.search(string, pos, endpos)
+    return endpos if match is None else match.start()
+
+
+  def _isPlausible(self, string, pos, end):
+    """Check whether all years between two indices are plausible ones."""
+    if self._plausible is None:
+      return True
+
+    first, last = self._plausible
+    for digits in self._digits.finditer(string, pos, end):
+      year = digits.group(0)
+      year = int(year if isinstance(year, (str, bytes)) else bytes(year))
+      if not first <= year <= last:
+        return False
+
+    return True
+
+
+  def _skipYears(self, string, pos, end):
+    """Skip years that are no copyright years, but not the end of their line."""
+    # Years may extend over multiple lines, but the prefix preceding
+    # the copyright years may not.
+    return self._endOfLine(string, pos, end)
+
+
+  def search(self, string, pos=0, endpos=None):
+    """Find the first copyright header in a string."""
+    endpos = len(string) if endpos is None else endpos
+
+    while True:
+      keyword = self._keyword.search(string, pos, endpos)
+      if keyword is None:
+        return None
+
+      # The keyword must be followed by at least one more character on
+      # the same line, after which the copyright years begin with the
+      # first digit we encounter.
+      start = keyword.start()
+      pos = keyword.end()
+      if pos >= endpos or self._eol.match(string, pos, endpos):
+        continue
+
+      pos += 1
+      while True:
+        year = self._year_or_eol.search(string, pos, endpos)
+        if year is None:
+          return None
+
+        years = year.start()
+        if not year.group(0).isdigit():
+          break
+
+        # Note that the copyright years may extend over multiple lines.
+        match = self._years.match(string, years, endpos)
+        if match is not None:
+          if self._isPlausible(string, years, match.end()):
+            end = self._endOfLine(string, match.end(), endpos)
+            return ScanMatch(string, start, years, match.end(), end)
+
+          pos = self._skipYears(string, years, match.end())
+          continue
+
+        year_list = self._year_list.match(string, years, endpos)
+        if year_list is not None:
+          # The years are followed by a separator and digits not forming
+          # a year. The same is true for any year of the list, so we can
+          # skip all of them.
+          pos = self._skipYears(string, years, year_list.end())
+          continue
+
+        # The digit is part of a run too long to be a year. We skip the
+        # entire run without ever converting it and continue looking
+        # for the copyright years on the same line.
+        pos = self._digits.match(string, years, endpos).end()
+
+      # There are no copyright years on this line. That is true for any
+      # other occurrence of the keyword on this line as well, so we can
+      # continue our search on the next one.
+      pos = years
+
+
+  def finditer(self, string, pos=0, endpos=None):
+    """Find all copyright headers in a string, in order."""
+    endpos = len(string) if endpos is None else endpos
+
+    while True:
+      match = self.search(string, pos, endpos)
+      if match is None:
+        return
+
+      yield match
+      pos = match.end()
+
+
+@lru_cache(maxsize=None)
+def copyrightScanner(binary=False, plausible=None):
+  """Retrieve the scanner for str or, if 'binary' is True, for bytes-like objects."""
+  return CopyrightScanner(binary, plausible)
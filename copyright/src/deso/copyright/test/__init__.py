@@ -1,7 +1,7 @@
 # __init__.py
 
 #/***************************************************************************
-# *   Copyright (C) 2015 Daniel Mueller (deso@posteo.net)                   *
+# *   Copyright (C) 2015,2026 Daniel Mueller (deso@posteo.net)              *
 # *                                                                         *
 # *   This program is free software: you can redistribute it and/or modify  *
 # *   it under the terms of the GNU General Public License as published by  *
@@ -31,13 +31,35 @@ from unittest import (
 def allTests():
   """Retrieve a test suite containing all tests."""
   tests = [
+    "testCache.py",
+    "testIgnore.py",
     "testNormalize.py",
+    "testProfiler.py",
     "testRange.py",
     "testRanges.py",
+    "testScanner.py",
     "testUtil.py",
+    "testWalk.py",
+    "testWatch.py",
+    "testWindow.py",
   ]
 
   loader = TestLoader()
   directory = dirname(__file__)
   suites = [loader.discover(directory, pattern=test) for test in tests]
   return TestSuite(suites)
+
+
+def allBenchmarks():
+  """Retrieve a test suite containing all benchmarks."""
+  benchmarks = [
+    "benchNormalize.py",
+    "benchRanges.py",
+    "benchScanner.py",
+    "benchSuite.py",
+  ]
+
+  loader = TestLoader()
+  directory = dirname(__file__)
+  suites = [loader.discover(directory, pattern=bench) for bench in benchmarks]
+  return TestSuite(suites)
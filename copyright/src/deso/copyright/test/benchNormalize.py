@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Benchmarks for the copyright year string normalization."""
+
+from deso.copyright import (
+  IgnoreSet,
+  normalizeContent,
+  normalizeContentPadded,
+)
+from deso.copyright.test.benchmark import (
+  assertLinear,
+  measure,
+)
+from unittest import (
+  main,
+  TestCase,
+)
+
+
+NOTICE_LINE = "Copyright (C) 2009,2010,2011 Contributor {i} <contributor{i}@example.com>\n"
+
+
+def makeNotice(count):
+  """Create the content of a NOTICE file with the given number of headers."""
+  return "".join(NOTICE_LINE.format(i=i) for i in range(count))
+
+
+class BenchNormalize(TestCase):
+  """Benchmarks for the copyright year string normalization."""
+  def testNormalizeScalesLinearlyWithMatches(self):
+    """Verify that normalization time is linear in the number of headers."""
+    for normalize_fn in (normalizeContent, normalizeContentPadded):
+      assertLinear(self, lambda c: normalize_fn(c, year=2015), makeNotice)
+
+
+  def testNormalizeNormalizedScalesLinearly(self):
+    """Verify that checking already normalized headers is linear as well."""
+    def makeNormalizedNotice(count):
+      """Create a NOTICE file that requires no changes."""
+      content, _ = normalizeContent(makeNotice(count), year=2015)
+      return content
+
+    assertLinear(self, lambda c: normalizeContent(c, year=2015),
+                 makeNormalizedNotice)
+
+
+  def testManyIgnorePatternsAddLittleCost(self):
+    """Verify that a large ignore set barely influences normalization time."""
+    content = makeNotice(4000)
+    patterns = [r"vendor{i}@example\.org".format(i=i) for i in range(500)]
+    patterns += [r"Foundation {i}$".format(i=i) for i in range(500)]
+    ignore = IgnoreSet(patterns)
+
+    time_plain = measure(normalizeContent, content, year=2015)
+    time_ignore = measure(normalizeContent, content, year=2015, ignore=ignore)
+    self.assertLess(time_ignore, time_plain * 2)
+
+
+if __name__ == "__main__":
+  main()
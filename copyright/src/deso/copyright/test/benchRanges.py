@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Benchmarks for the range sequence handling functionality."""
+
+from deso.copyright import (
+  normalizeRanges,
+  Range,
+  scanRanges,
+)
+from deso.copyright.range import (
+  YEAR_SEPARATOR,
+)
+from deso.copyright.ranges import (
+  RANGES_SEPARATOR,
+)
+from deso.copyright.test.benchmark import (
+  assertLinear,
+  measure,
+)
+from unittest import (
+  main,
+  TestCase,
+)
+
+
+def makeSparseRanges(count):
+  """Create a list of every other year, none of which can be merged."""
+  return [Range(1000 + 2 * i, 1000 + 2 * i) for i in range(count)]
+
+
+def makeDenseRanges(count):
+  """Create a list of consecutive years in reverse order, all of which are merged."""
+  return [Range(1000 + i, 1000 + i) for i in reversed(range(count))]
+
+
+def makeMixedRanges(count):
+  """Create a list of consecutive years followed by every other year."""
+  half = count // 2
+  dense = [Range(1000 + i, 1000 + i) for i in range(half)]
+  sparse = [Range(1000 + half + 2 * i, 1000 + half + 2 * i) for i in range(1, half)]
+  return dense + sparse
+
+
+def splitRanges(ranges_string):
+  """Parse a range string by splitting it, as was done before scanRanges existed."""
+  pairs = []
+  for string in ranges_string.split(RANGES_SEPARATOR):
+    string = string.strip()
+    if string:
+      try:
+        year = int(string)
+        pairs.append((year, year))
+      except ValueError:
+        first, last = map(int, string.split(YEAR_SEPARATOR))
+        pairs.append((first, last))
+
+  return pairs
+
+
+def makeRangeString(count):
+  """Create a range string with the given number of ranges, most of them "true" ranges."""
+  ranges = ["%d-%d" % (1000 + 3 * i, 1001 + 3 * i) if i % 4 else "%d" % (1000 + 3 * i)
+            for i in range(count)]
+  return ", ".join(ranges)
+
+
+class BenchRanges(TestCase):
+  """Benchmarks for the range sequence handling functionality."""
+  def testNormalizeRangesScalesLinearly(self):
+    """Verify that normalizing long lists of ranges takes linear time."""
+    for make_input in (makeSparseRanges, makeDenseRanges, makeMixedRanges):
+      assertLinear(self, lambda r: normalizeRanges(list(r)), make_input,
+                   sizes=(1250, 10000))
+
+
+  def testScanRanges(self):
+    """Verify that scanning range strings is not slower than splitting them."""
+    for count in (1, 4, 1000):
+      string = makeRangeString(count)
+      self.assertEqual(scanRanges(string), splitRanges(string))
+
+      repeat = 10000 // count
+      time_scan = measure(lambda: [scanRanges(string) for _ in range(repeat)])
+      time_split = measure(lambda: [splitRanges(string) for _ in range(repeat)])
+      self.assertLess(time_scan, time_split * 1.5)
+
+
+if __name__ == "__main__":
+  main()
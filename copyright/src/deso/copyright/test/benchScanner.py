@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Benchmarks for the copyright scanner on adversarial input."""
+
+from deso.copyright import (
+  normalizeContent,
+)
+from deso.copyright.scanner import (
+  copyrightScanner,
+)
+from deso.copyright.test.benchmark import (
+  assertLinear,
+  measure,
+)
+from unittest import (
+  main,
+  TestCase,
+)
+
+
+def scanAll(content):
+  """Find all copyright headers in a string or bytes object."""
+  scanner = copyrightScanner(not isinstance(content, str))
+  return sum(1 for _ in scanner.finditer(content))
+
+
+def makeKeywords(count):
+  """Create a single line repeating the keyword without any years."""
+  return "copyright x " * count
+
+
+def makeDigits(count):
+  """Create a single line of keywords each followed by digit runs."""
+  return "Copyright 1 2 3 4 5 6 7 8 9 0 " * count
+
+
+def makeSeparators(count):
+  """Create a single line with an overly long and broken range list."""
+  return "Copyright " + "2013-, " * count + "x"
+
+
+def makeLongDigits(count):
+  """Create a single line with a digit run way too long to be a year."""
+  return "Copyright " + "1234567890" * count + " 2013"
+
+
+def makeHexDigits(count):
+  """Create a single line of keywords each followed by a long hex number."""
+  return "Copyright 0x1234567890abcdef " * count
+
+
+def makeMinified(count):
+  """Create a minified JavaScript like line with embedded keywords."""
+  chunk = 'var copyright=function(a){return a+"(c)"+2013-2014,copyright};'
+  return chunk * count
+
+
+class BenchScanner(TestCase):
+  """Benchmarks for the copyright scanner on adversarial input."""
+  def testKeywordsScaleLinearly(self):
+    """Verify that repeated keywords without years are scanned in linear time."""
+    assertLinear(self, scanAll, makeKeywords, sizes=(2000, 16000))
+
+
+  def testDigitsScaleLinearly(self):
+    """Verify that lots of digits after keywords are scanned in linear time."""
+    assertLinear(self, scanAll, makeDigits, sizes=(2000, 16000))
+
+
+  def testSeparatorsScaleLinearly(self):
+    """Verify that a broken range list is scanned in linear time."""
+    assertLinear(self, scanAll, makeSeparators, sizes=(2000, 16000))
+
+
+  def testLongDigitsScaleLinearly(self):
+    """Verify that overly long digit runs are rejected in linear time."""
+    for make_input in (makeLongDigits, makeHexDigits):
+      assertLinear(self, scanAll, make_input, sizes=(2000, 16000))
+      assertLinear(self, lambda c: normalizeContent(c, year=2015), make_input,
+                   sizes=(2000, 16000))
+
+
+  def testMinifiedScalesLinearly(self):
+    """Verify that minified code is scanned and normalized in linear time."""
+    assertLinear(self, scanAll, makeMinified, sizes=(2000, 16000))
+    assertLinear(self, lambda c: normalizeContent(c, year=2015), makeMinified,
+                 sizes=(2000, 16000))
+
+
+  def testHugeLine(self):
+    """Verify that a single line of ten megabytes is scanned quickly."""
+    content = makeKeywords(10 * 1024 * 1024 // len(makeKeywords(1)))
+    self.assertEqual(scanAll(content), 0)
+    self.assertEqual(scanAll(content.encode("ascii")), 0)
+    self.assertLess(measure(scanAll, content, repeat=1), 10)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,393 @@
+#!/usr/bin/env python
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""A benchmark suite producing results that can be compared across commits.
+
+  The suite runs a fixed set of benchmarks on synthetic corpora and
+  emits the results in a stable JSON format. Results of a previous run
+  can be passed in as a baseline, in which case benchmarks that got
+  slower by more than a given factor are reported as regressions:
+
+    $ python -m deso.copyright.test.benchSuite --output=base.json
+    $ python -m deso.copyright.test.benchSuite --baseline=base.json
+"""
+
+from argparse import (
+  ArgumentParser,
+)
+from deso.copyright import (
+  flattenRanges,
+  normalizeContent,
+  normalizeContentPadded,
+  normalizeFiles,
+  normalizeMany,
+  normalizeRanges,
+  normalizeRangesBatch,
+  parseRanges,
+  Range,
+  stringifyRanges,
+)
+from deso.copyright.test.benchmark import (
+  measure,
+)
+from io import (
+  StringIO,
+)
+from json import (
+  dumps,
+  load,
+  loads,
+)
+from os.path import (
+  join,
+)
+from platform import (
+  python_version,
+)
+from sys import (
+  argv as sysargv,
+  stderr,
+  stdout,
+)
+from tempfile import (
+  NamedTemporaryFile,
+  TemporaryDirectory,
+)
+from unittest import (
+  TestCase,
+)
+from unittest.mock import (
+  patch,
+)
+
+
+# The version of the result format. It is to be bumped whenever results
+# are no longer comparable with those of earlier versions.
+FORMAT = 1
+# The year used for normalization throughout the suite.
+YEAR = 2015
+# The slowdown factor beyond which a benchmark counts as regressed.
+THRESHOLD = 1.25
+
+TINY_FILE = "// Copyright (C) 2013-2015 Daniel Mueller (deso@posteo.net)\nint x;\n"
+NOTICE_LINE = "Copyright (C) 2009,2010,2011 Contributor {i} <contributor{i}@example.com>\n"
+SOURCE_LINE = "  return calculate(value, {i}) + offset; /* a comment */\n"
+MINIFIED_CHUNK = 'var copyright=function(a){return a+"(c)"+2013-2014,copyright};'
+
+
+def makeTinyFiles(scale):
+  """Create the contents of many tiny source files."""
+  return [TINY_FILE] * int(10000 * scale)
+
+
+def makeHugeFiles(scale):
+  """Create the contents of a few huge source files with a single header."""
+  lines = int(200000 * scale)
+  body = "".join(SOURCE_LINE.format(i=i % 1000) for i in range(lines))
+  return ["// Copyright (C) 2012,2013 Someone\n" + body] * 3
+
+
+def makeNotices(scale):
+  """Create the contents of NOTICE files with thousands of headers."""
+  count = int(5000 * scale)
+  return ["".join(NOTICE_LINE.format(i=i) for i in range(count))]
+
+
+def makeLongLines(scale):
+  """Create the contents of files consisting of pathologically long lines."""
+  count = int(20000 * scale)
+  return [MINIFIED_CHUNK * count, "copyright x " * count * 4]
+
+
+def makeYearList(scale):
+  """Create a long, unsorted, and overlapping list of years."""
+  count = int(2000 * scale)
+  years = ["%d" % (1000 + (i * 7919) % count) for i in range(count)]
+  years += ["%d-%d" % (1000 + i, 1003 + i) for i in range(0, count, 5)]
+  return ",".join(years)
+
+
+def normalizeAll(normalize_fn, contents):
+  """Normalize a list of contents using the given function."""
+  for content in contents:
+    normalize_fn(content, year=YEAR)
+
+
+def normalizeBatch(normalize_fn, contents):
+  """Normalize a list of contents in a single batch."""
+  normalizeMany(contents, normalize_fn, year=YEAR)
+
+
+def parseAndNormalizeRanges(string):
+  """Parse a year list and normalize the resulting ranges."""
+  ranges = parseRanges(string)
+  normalizeRanges(ranges)
+
+
+def makeMixedYearList(scale):
+  """Create a year list of consecutive years followed by every other year."""
+  half = int(5000 * scale)
+  years = ["%d" % (1000 + i) for i in range(half)]
+  years += ["%d" % (1000 + half + 2 * i) for i in range(1, half)]
+  return ",".join(years)
+
+
+def makeRangeLists(scale):
+  """Create many short lists of ranges, as found in a source tree."""
+  count = int(20000 * scale)
+  return [parseRanges("%d,%d-%d,2015" % (2000 + i % 7, 2003 + i % 5, 2010 + i % 3))
+          for i in range(count)]
+
+
+def normalizeRangeLists(range_lists):
+  """Normalize many lists of ranges one after the other."""
+  for ranges in range_lists:
+    ranges = ranges + [Range(YEAR, YEAR)]
+    normalizeRanges(ranges)
+    stringifyRanges(ranges)
+
+
+def normalizeRangeListsBatch(range_lists):
+  """Normalize many lists of ranges in a single batch."""
+  firsts, lasts, owners = flattenRanges(range_lists)
+  normalizeRangesBatch(firsts, lasts, owners, len(range_lists), YEAR)
+
+
+def contentBenchmarks(scale):
+  """Create the benchmarks normalizing content in memory."""
+  corpora = [
+    ("tiny", makeTinyFiles(scale)),
+    ("huge", makeHugeFiles(scale)),
+    ("notice", makeNotices(scale)),
+    ("long-lines", makeLongLines(scale)),
+  ]
+  for corpus, contents in corpora:
+    size = sum(len(c) for c in contents)
+    for normalize_fn in (normalizeContent, normalizeContentPadded):
+      name = "%s/%s" % (normalize_fn.__name__, corpus)
+      yield name, size, len(contents), normalizeAll, (normalize_fn, contents)
+
+  # Batching only makes a difference if there are many contents.
+  contents = corpora[0][1]
+  size = sum(len(c) for c in contents)
+  yield "normalizeMany/tiny", size, len(contents), normalizeBatch, (normalizeContent, contents)
+
+
+def rangeBenchmarks(scale):
+  """Create the benchmarks parsing and normalizing year lists."""
+  string = makeYearList(scale)
+  count = string.count(",") + 1
+  yield "parseRanges/long", len(string), count, parseRanges, (string,)
+  yield "normalizeRanges/long", len(string), count, parseAndNormalizeRanges, (string,)
+
+  string = makeMixedYearList(scale)
+  count = string.count(",") + 1
+  yield "normalizeRanges/mixed", len(string), count, parseAndNormalizeRanges, (string,)
+
+  range_lists = makeRangeLists(scale)
+  count = len(range_lists)
+  yield "normalizeRanges/many", 0, count, normalizeRangeLists, (range_lists,)
+  yield "normalizeRangesBatch/many", 0, count, normalizeRangeListsBatch, (range_lists,)
+
+
+def runFilesBenchmark(scale, repeat):
+  """Run the benchmark normalizing many small files on disk."""
+  contents = makeTinyFiles(scale / 4)
+  with TemporaryDirectory() as directory:
+    files = []
+    for i, content in enumerate(contents):
+      path = join(directory, "file%d.c" % i)
+      with open(path, "w") as f:
+        f.write(content)
+      files.append(path)
+
+    seconds = measure(normalizeFiles, files, year=YEAR, repeat=repeat)
+    return seconds, sum(len(c) for c in contents), len(files)
+
+
+def runSuite(scale=1.0, repeat=3, select=None):
+  """Run all benchmarks and return the results as a dict.
+
+    The results map each benchmark's name to a dict containing the best
+    time measured in seconds as well as the number of bytes and items
+    processed. If 'select' is given, only benchmarks containing it in
+    their name are run.
+  """
+  results = {}
+
+  def record(name, seconds, size, items):
+    """Record the result of a single benchmark."""
+    results[name] = {
+      "seconds": round(seconds, 6),
+      "bytes": size,
+      "items": items,
+    }
+
+  benchmarks = list(contentBenchmarks(scale)) + list(rangeBenchmarks(scale))
+  for name, size, items, function, args in benchmarks:
+    if select is None or select in name:
+      record(name, measure(function, *args, repeat=repeat), size, items)
+
+  name = "normalizeFiles/tiny"
+  if select is None or select in name:
+    record(name, *runFilesBenchmark(scale, repeat))
+
+  return {
+    "format": FORMAT,
+    "python": python_version(),
+    "scale": scale,
+    "results": results,
+  }
+
+
+def compareResults(baseline, current):
+  """Compare the results of two runs.
+
+    The function returns a list of (name, ratio) tuples, one for each
+    benchmark present in both runs, with 'ratio' being the current time
+    divided by the baseline time. An error is raised if the results are
+    not comparable.
+  """
+  if baseline["format"] != current["format"] or baseline["scale"] != current["scale"]:
+    raise ValueError("Results were created with different formats or scales")
+
+  ratios = []
+  for name, result in sorted(current["results"].items()):
+    base = baseline["results"].get(name)
+    if base is not None:
+      ratios.append((name, result["seconds"] / max(base["seconds"], 1e-9)))
+
+  return ratios
+
+
+def formatComparison(ratios, threshold=THRESHOLD):
+  """Format the outcome of compareResults as a table."""
+  width = max([len(name) for name, _ in ratios] + [len("benchmark")])
+  lines = ["{:<{w}}  {:>7}".format("benchmark", "ratio", w=width)]
+  for name, ratio in ratios:
+    marker = "  REGRESSION" if ratio > threshold else ""
+    lines.append("{:<{w}}  {:>7.2f}{}".format(name, ratio, marker, w=width))
+
+  return "\n".join(lines)
+
+
+def setupArgumentParser():
+  """Create and initialize an argument parser, ready for use."""
+  parser = ArgumentParser()
+  parser.add_argument(
+    "--output", action="store", default=None, metavar="file",
+    help="Write the results to the given file instead of stdout.",
+  )
+  parser.add_argument(
+    "--baseline", action="store", default=None, metavar="file",
+    help="Compare the results against those stored in the given file "
+         "and fail if any benchmark regressed.",
+  )
+  parser.add_argument(
+    "--threshold", action="store", default=THRESHOLD, type=float,
+    metavar="factor",
+    help="The slowdown factor beyond which a benchmark is considered "
+         "regressed (default: %.2f)." % THRESHOLD,
+  )
+  parser.add_argument(
+    "--scale", action="store", default=1.0, type=float, metavar="scale",
+    help="Scale the size of the corpora by the given factor.",
+  )
+  parser.add_argument(
+    "--repeat", action="store", default=3, type=int, metavar="count",
+    help="Run each benchmark the given number of times and report the "
+         "best run.",
+  )
+  parser.add_argument(
+    "--select", action="store", default=None, metavar="name",
+    help="Only run benchmarks containing the given string in their name.",
+  )
+  return parser
+
+
+def main(argv):
+  """Run the benchmark suite and report the results."""
+  ns = setupArgumentParser().parse_args(argv[1:])
+  results = runSuite(scale=ns.scale, repeat=ns.repeat, select=ns.select)
+  output = dumps(results, indent=2, sort_keys=True) + "\n"
+
+  if ns.output is not None:
+    with open(ns.output, "w") as f:
+      f.write(output)
+  else:
+    stdout.write(output)
+
+  if ns.baseline is not None:
+    with open(ns.baseline) as f:
+      baseline = load(f)
+
+    ratios = compareResults(baseline, results)
+    print(formatComparison(ratios, ns.threshold), file=stderr)
+    if any(ratio > ns.threshold for _, ratio in ratios):
+      return 1
+
+  return 0
+
+
+class BenchSuite(TestCase):
+  """Verify that the benchmark suite works, using tiny corpora."""
+  def testSuite(self):
+    """Verify that results are produced and can be compared."""
+    results = runSuite(scale=0.01, repeat=1)
+    self.assertEqual(results["format"], FORMAT)
+    self.assertIn("normalizeContent/notice", results["results"])
+    self.assertIn("normalizeContentPadded/long-lines", results["results"])
+    self.assertIn("normalizeRanges/long", results["results"])
+    self.assertIn("normalizeFiles/tiny", results["results"])
+    self.assertIn("normalizeMany/tiny", results["results"])
+
+    # The results must survive a round trip through JSON unchanged.
+    self.assertEqual(loads(dumps(results)), results)
+
+    slower = loads(dumps(results))
+    for result in slower["results"].values():
+      result["seconds"] = result["seconds"] * 2 + 1
+
+    ratios = dict(compareResults(results, slower))
+    self.assertTrue(all(ratio > THRESHOLD for ratio in ratios.values()))
+    self.assertIn("REGRESSION", formatComparison(list(ratios.items())))
+
+
+  def testMain(self):
+    """Verify that the suite can be run from the command line."""
+    with NamedTemporaryFile("r") as f:
+      args = ["benchSuite", "--scale=0.01", "--repeat=1", "--select=Ranges"]
+      self.assertEqual(main(args + ["--output=%s" % f.name]), 0)
+      # The comparison table is printed to stderr. Capture it, so that it
+      # does not clutter the output of the test run.
+      with patch("%s.stderr" % __name__, new=StringIO()) as err:
+        self.assertEqual(main(args + ["--output=/dev/null",
+                                      "--baseline=%s" % f.name,
+                                      "--threshold=1000"]), 0)
+
+      self.assertIn("normalizeRanges/long", err.getvalue())
+      self.assertNotIn("REGRESSION", err.getvalue())
+      self.assertEqual(set(load(f)["results"]),
+                       {"parseRanges/long", "normalizeRanges/long",
+                        "normalizeRanges/mixed", "normalizeRanges/many",
+                        "normalizeRangesBatch/many"})
+
+
+if __name__ == "__main__":
+  exit(main(sysargv))
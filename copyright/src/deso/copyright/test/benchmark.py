@@ -0,0 +1,65 @@
+# benchmark.py
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Helper functionality for benchmarking."""
+
+from time import (
+  perf_counter,
+)
+
+
+def measure(function, *args, repeat=3, **kwargs):
+  """Measure the time it takes to invoke a function, in seconds.
+
+    The function is invoked 'repeat' times and the best of these runs is
+    reported, which is the value least influenced by other activity on
+    the system.
+  """
+  best = None
+  for _ in range(repeat):
+    start = perf_counter()
+    function(*args, **kwargs)
+    elapsed = perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+
+  return best
+
+
+def assertLinear(test, function, make_input, sizes=(1000, 8000), slack=2.5):
+  """Assert that the run time of a function grows linearly with its input.
+
+    The function is invoked with the input created by make_input for
+    each of the two given sizes. The ratio of the measured times must
+    not exceed the ratio of the sizes by more than the given slack
+    factor. A quadratic algorithm would exceed it by the size ratio
+    itself.
+  """
+  small, large = sizes
+  input_small = make_input(small)
+  input_large = make_input(large)
+
+  time_small = measure(function, input_small)
+  time_large = measure(function, input_large)
+
+  ratio = time_large / max(time_small, 1e-9)
+  limit = large / small * slack
+  msg = "Run time grew by a factor of {r:.1f} for a {s:.1f} times larger input"
+  msg = msg.format(r=ratio, s=large / small)
+  test.assertLess(ratio, limit, msg)
+  return time_small, time_large
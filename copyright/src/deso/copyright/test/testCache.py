@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Tests for the persistent cache functionality."""
+
+from deso.copyright.cache import (
+  Cache,
+  FileCache,
+  fingerprint,
+  RACY_NS,
+)
+from deso.copyright.normalize import (
+  normalizeFiles,
+  Status,
+)
+from os import (
+  stat,
+  unlink,
+  utime,
+)
+from os.path import (
+  join,
+)
+from tempfile import (
+  TemporaryDirectory,
+)
+from time import (
+  time_ns,
+)
+from unittest import (
+  main,
+  TestCase,
+)
+from unittest.mock import (
+  Mock,
+)
+
+
+def writeFile(path, content, age=10 * RACY_NS):
+  """Write a file and make it appear as if it was last modified a while ago."""
+  with open(path, "w") as f:
+    f.write(content)
+
+  mtime_ns = time_ns() - age
+  utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestCache(TestCase):
+  """Tests for the persistent cache functionality."""
+  def setUp(self):
+    """Create a temporary directory for the test to work in."""
+    self._directory = TemporaryDirectory()
+    self._path = join(self._directory.name, "cache")
+
+
+  def tearDown(self):
+    """Remove the temporary directory."""
+    self._directory.cleanup()
+
+
+  def testRoundTrip(self):
+    """Verify that saved entries are loaded again."""
+    with Cache(self._path, "1") as cache:
+      cache.set("a", "x")
+      cache.set("b c\td", "y z")
+      cache.set("e\nf", "w")
+
+    cache = Cache(self._path, "1")
+    self.assertEqual(cache.get("a"), "x")
+    self.assertEqual(cache.get("b c\td"), "y z")
+    self.assertIsNone(cache.get("e\nf"))
+
+    # A different fingerprint invalidates all entries.
+    self.assertIsNone(Cache(self._path, "2").get("a"))
+
+
+  def testConcurrentUpdates(self):
+    """Verify that updates of concurrent users of a cache are merged."""
+    cache1 = Cache(self._path, "1")
+    cache2 = Cache(self._path, "1")
+
+    cache1.set("a", "1")
+    cache1.set("b", "1")
+    cache1.save()
+
+    cache2.set("b", "2")
+    cache2.set("c", "2")
+    cache2.remove("a")
+    cache2.save()
+
+    cache = Cache(self._path, "1")
+    self.assertIsNone(cache.get("a"))
+    self.assertEqual(cache.get("b"), "2")
+    self.assertEqual(cache.get("c"), "2")
+
+
+  def testCapacity(self):
+    """Verify that the least recently set entries are evicted first."""
+    with Cache(self._path, "1", capacity=2) as cache:
+      cache.set("a", "1")
+      cache.set("b", "1")
+      cache.set("c", "1")
+      cache.set("a", "2")
+
+    cache = Cache(self._path, "1")
+    self.assertEqual(len(cache), 2)
+    self.assertEqual(cache.get("a"), "2")
+    self.assertIsNone(cache.get("b"))
+    self.assertEqual(cache.get("c"), "1")
+
+
+  def testCapacityKeepsUsedEntries(self):
+    """Verify that entries recently retrieved are not evicted."""
+    with Cache(self._path, "1", capacity=2) as cache:
+      cache.set("a", "1")
+      cache.set("b", "1")
+
+    with Cache(self._path, "1", capacity=2) as cache:
+      self.assertEqual(cache.get("a"), "1")
+      cache.set("c", "1")
+
+    cache = Cache(self._path, "1")
+    self.assertEqual(cache.get("a"), "1")
+    self.assertIsNone(cache.get("b"))
+    self.assertEqual(cache.get("c"), "1")
+
+
+  def testSaveWithoutUpdates(self):
+    """Verify that the cache file is not rewritten if nothing was updated."""
+    with Cache(self._path, "1") as cache:
+      cache.set("a", "1")
+
+    before = stat(self._path)
+    with Cache(self._path, "1") as cache:
+      self.assertEqual(cache.get("a"), "1")
+
+    after = stat(self._path)
+    self.assertEqual((after.st_ino, after.st_mtime_ns),
+                     (before.st_ino, before.st_mtime_ns))
+
+
+  def testFileCache(self):
+    """Verify that file entries are invalidated once a file changes."""
+    path = join(self._directory.name, "file")
+    writeFile(path, "content")
+
+    with FileCache(self._path, "1") as cache:
+      value, stamp = cache.lookup(path)
+      self.assertIsNone(value)
+      cache.update(stamp, "2")
+
+    value, _ = FileCache(self._path, "1").lookup(path)
+    self.assertEqual(value, "2")
+
+    writeFile(path, "other content")
+    value, _ = FileCache(self._path, "1").lookup(path)
+    self.assertIsNone(value)
+
+
+  def testFileCacheSkipsRecentlyModifiedFiles(self):
+    """Verify that files modified just now are not cached."""
+    path = join(self._directory.name, "file")
+    writeFile(path, "content", age=0)
+
+    with FileCache(self._path, "1") as cache:
+      _, stamp = cache.lookup(path)
+      cache.update(stamp, "2")
+
+    value, _ = FileCache(self._path, "1").lookup(path)
+    self.assertIsNone(value)
+
+
+  def testFileCacheEviction(self):
+    """Verify that entries for deleted files are evicted."""
+    path1 = join(self._directory.name, "file1")
+    path2 = join(self._directory.name, "file2")
+    writeFile(path1, "content")
+    writeFile(path2, "content")
+
+    with FileCache(self._path, "1") as cache:
+      for path in (path1, path2):
+        _, stamp = cache.lookup(path)
+        cache.update(stamp, "2")
+
+    unlink(path2)
+    # Entries are only evicted when the cache is actually written, i.e.,
+    # when any entry was updated.
+    with FileCache(self._path, "1") as cache:
+      _, stamp = cache.lookup(path1)
+      cache.update(stamp, "3")
+
+    cache = Cache(self._path, "1")
+    self.assertIsNotNone(cache.get(path1))
+    self.assertIsNone(cache.get(path2))
+
+
+  def testNormalizeFilesWithCache(self):
+    """Verify that normalizeFiles skips files cached as needing no change."""
+    header = join(self._directory.name, "header")
+    plain = join(self._directory.name, "plain")
+    writeFile(header, "# Copyright 2013 deso\n")
+    writeFile(plain, "int main() { return 0; }\n")
+
+    stats = normalizeFiles([header, plain], year=2015, cache=self._path)
+    self.assertEqual(stats[Status.Changed], 1)
+    self.assertEqual(stats[Status.Prefiltered], 1)
+
+    # The changed file is not cached, because it was just written.
+    settings = fingerprint("deso.copyright.normalize.normalizeContent", 2015,
+                           (), None, None)
+    self.assertEqual(len(FileCache(self._path, settings)), 1)
+
+    # Replace the content of the cached file behind the cache's back,
+    # keeping its stat information intact. The cached outcome has to be
+    # reported nevertheless.
+    st = stat(plain)
+    with open(plain, "w") as f:
+      f.write("// Copyright 2013 deso!!\n")
+    utime(plain, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    stats = normalizeFiles([header, plain], year=2015, cache=self._path)
+    self.assertEqual(stats[Status.Prefiltered], 1)
+
+    # With a different year the cache is not used.
+    stats = normalizeFiles([plain], year=2016, cache=self._path)
+    self.assertEqual(stats[Status.Changed], 1)
+
+
+  def testNormalizeFilesWithCacheAndJobs(self):
+    """Verify that the cache works with files processed in parallel."""
+    paths = [join(self._directory.name, "file%d" % i) for i in range(64)]
+    for path in paths:
+      writeFile(path, "int main() { return 0; }\n")
+
+    for expected in (0, len(paths)):
+      reports = []
+      report = Mock(write=reports.append)
+      stats = normalizeFiles(paths, year=2015, cache=self._path, jobs=3,
+                             report=report)
+      self.assertEqual(stats[Status.Prefiltered], len(paths))
+      self.assertEqual(sum(r.cached for r in reports), expected)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Tests for the ignore pattern functionality."""
+
+from deso.copyright import (
+  IgnoreSet,
+)
+from deso.copyright.ignore import (
+  toIgnoreSet,
+)
+from re import (
+  error as RegexError,
+)
+from unittest import (
+  main,
+  TestCase,
+)
+
+
+class TestIgnore(TestCase):
+  """Tests for the ignore pattern functionality."""
+  def testEmptySetMatchesNothing(self):
+    """Verify that an empty ignore set does not match anything."""
+    ignore = IgnoreSet()
+    self.assertEqual(len(ignore), 0)
+    self.assertFalse(ignore.matches(""))
+    self.assertFalse(ignore.matches("Copyright (C) 2015 deso"))
+
+
+  def testMatching(self):
+    """Verify that a string is matched if any of the patterns matches."""
+    ignore = IgnoreSet([r"foo", r"b[a]r", r"^Copyright \(C\) 2015 baz$"])
+
+    self.assertTrue(ignore.matches("Copyright (C) 2015 foo"))
+    self.assertTrue(ignore.matches("Copyright (C) 2015 bar"))
+    self.assertTrue(ignore.matches("Copyright (C) 2015 baz"))
+    self.assertFalse(ignore.matches("Copyright (C) 2015 baz inc."))
+    self.assertFalse(ignore.matches("Copyright (C) 2015 deso"))
+
+
+  def testPatternsWithGroupsAndFlags(self):
+    """Verify that patterns that cannot be fused keep their meaning."""
+    ignore = IgnoreSet([
+      r"(?i)VMWARE",
+      r"(\d+)-\1",
+      r"(?P<x>a)(?P=x)",
+      r"deso|bar",
+    ])
+
+    self.assertTrue(ignore.matches("Copyright 2015 VMware, Inc."))
+    self.assertTrue(ignore.matches("Copyright 2015-2015"))
+    self.assertFalse(ignore.matches("Copyright 2014-2015"))
+    self.assertTrue(ignore.matches("Copyright 2015 aa"))
+    self.assertTrue(ignore.matches("Copyright 2015 bar"))
+    self.assertFalse(ignore.matches("Copyright 2015 foo"))
+
+
+  def testInvalidPattern(self):
+    """Verify that an invalid pattern is reported upon creation."""
+    with self.assertRaises(RegexError):
+      IgnoreSet([r"foo", r"(bar"])
+
+
+  def testConversion(self):
+    """Test the conversion of pattern lists into ignore sets."""
+    ignore = IgnoreSet(["foo"])
+
+    self.assertIsNone(toIgnoreSet(None))
+    self.assertIs(toIgnoreSet(ignore), ignore)
+    self.assertEqual(toIgnoreSet(["foo"]), ignore)
+    self.assertNotEqual(toIgnoreSet(["bar"]), ignore)
+
+
+if __name__ == "__main__":
+  main()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 
 #/***************************************************************************
-# *   Copyright (C) 2015,2017 Daniel Mueller (deso@posteo.net)              *
+# *   Copyright (C) 2015,2017,2026 Daniel Mueller (deso@posteo.net)         *
 # *                                                                         *
 # *   This program is free software: you can redistribute it and/or modify  *
 # *   it under the terms of the GNU General Public License as published by  *
@@ -19,8 +19,46 @@
 
 """Test suite for the copyright year string normalization script."""
 
+from argparse import (
+  ArgumentTypeError,
+)
 from deso.copyright.normalize import (
+  BINARY_SNIFF_SIZE,
+  findChanges,
+  iterNormalizeFiles,
+  KEYWORD_CHUNK_SIZE,
   main as normalizeMain,
+  mayContainCopyright,
+  normalizeContent,
+  normalizeContentPadded,
+  normalizeFiles,
+  normalizeMany,
+  normalizeStream,
+  Normalizer,
+  plausibleStringToRange,
+  policyStringToFunction,
+  sniffBinary,
+  Status,
+)
+from deso.copyright.range import (
+  Range,
+)
+from deso.copyright.window import (
+  scanLimitStringToLimit,
+)
+from io import (
+  BufferedReader,
+  BytesIO,
+)
+from json import (
+  loads,
+)
+from os.path import (
+  getsize,
+)
+from pickle import (
+  dumps,
+  loads as unpickle,
 )
 from sys import (
   argv as sysargv,
@@ -171,10 +209,11 @@ COPYRIGHT_WITH_CONTENT_LINE_FIXED = """\
 class TestNormalize(TestCase):
   """Tests for the copyright year string normalization script."""
   def writeRunReadVerify(self, content, expected, policy=None,
-                         year=None, ignore=None):
+                         year=None, ignore=None, limit=None,
+                         encoding="utf-8", mapped=False):
     """Write some data into a temporary file, run normalize, and verify expected result."""
     with NamedTemporaryFile(buffering=0) as f:
-      f.write(content.encode("utf-8"))
+      f.write(content.encode(encoding))
       f.seek(0)
 
       argv = [sysargv[0], f.name]
@@ -184,9 +223,13 @@ class TestNormalize(TestCase):
         argv += ["--year=%d" % year]
       if ignore is not None:
         argv += ["--ignore=%s" % s for s in ignore]
+      if limit is not None:
+        argv += ["--scan-limit=%s" % limit]
+      if mapped:
+        argv += ["--mmap"]
 
       normalizeMain(argv)
-      self.assertEqual(f.read(), expected.encode("utf-8"))
+      self.assertEqual(f.read(), expected.encode(encoding))
 
 
   def testNormalizeCopyrightYears(self):
@@ -279,5 +322,486 @@ class TestNormalize(TestCase):
     self.writeRunReadVerify(content, expected, policy="pad", year=2015, ignore=ignore)
 
 
+  def testNormalizeWithScanLimit(self):
+    """Verify that only headers within the scan window are normalized."""
+    content = "\n".join([
+      COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE,
+      COPYRIGHT_MSFT_TEMPLATE % COPYRIGHT_MSFT_LINE,
+    ])
+    expected = "\n".join([
+      COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE_FIXED,
+      COPYRIGHT_MSFT_TEMPLATE % COPYRIGHT_MSFT_LINE,
+    ])
+
+    self.writeRunReadVerify(content, expected, year=2015, limit="2")
+    self.writeRunReadVerify(content, expected, year=2015, limit="80b")
+    # A window cutting through a header must not cause a change.
+    self.writeRunReadVerify(content, content, year=2015, limit="40b")
+
+
+  def testNormalizeWithScanLimitContinuedYears(self):
+    """Verify that the scan window does not cut through years continuing on the next line."""
+    content = "Copyright (C) 2010,\n\n 2012 -\n 2013 Foo\nint x;\n"
+    expected = "Copyright (C) 2010,2012-2013,2015 Foo\nint x;\n"
+    self.assertEqual(normalizeContent(content, year=2015), (expected, 1))
+
+    for limit in ("1", "20b", "25b"):
+      self.writeRunReadVerify(content, expected, year=2015, limit=limit)
+      self.writeRunReadVerify(content, expected, year=2015, limit=limit,
+                              mapped=True)
+
+      limit = scanLimitStringToLimit(limit)
+      self.assertEqual(normalizeContent(content, year=2015, limit=limit),
+                       (expected, 1))
+
+      output = BytesIO()
+      normalizeStream(BufferedReader(BytesIO(content.encode())), output,
+                      year=2015, limit=limit)
+      self.assertEqual(output.getvalue(), expected.encode())
+
+    # Lines that cannot continue the years are not included.
+    content = "Copyright (C) 2010,\nfoo 2012\n"
+    limit = scanLimitStringToLimit("1")
+    self.assertEqual(normalizeContent(content, year=2015, limit=limit),
+                     ("Copyright (C) 2010,2015\nfoo 2012\n", 1))
+
+
+  def testNormalizeKeepsLineEndings(self):
+    """Verify that Windows line endings are preserved."""
+    content = (COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE).replace("\n", "\r\n")
+    expected = (COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE_FIXED).replace("\n", "\r\n")
+
+    self.writeRunReadVerify(content, expected, year=2015, limit="1")
+
+
+  def testNormalizeLatin1File(self):
+    """Verify that files not encoded in UTF-8 are normalized correctly."""
+    content = "/* Copyright (C) 2012,2013 D\xe4niel M\xfcller \xa9 */\n"
+    expected = "/* Copyright (C) 2012-2013,2015 D\xe4niel M\xfcller \xa9 */\n"
+    # Ignore patterns are matched against the header as decoded from
+    # UTF-8. Other bytes can only be matched by wildcards.
+    ignore = [r"D.niel M.ller"]
+
+    self.writeRunReadVerify(content, expected, year=2015, encoding="latin-1")
+    self.writeRunReadVerify(content, content, year=2015, encoding="latin-1",
+                            ignore=ignore)
+
+
+  def testNormalizeBytesLikeContent(self):
+    """Verify that bytes-like objects are normalized just like strings."""
+    content = COPYRIGHT_DESO_TEMPLATE % COPYRIGHT_DESO_LINE1
+    data = content.encode("utf-8")
+
+    for normalize_fn in (normalizeContent, normalizeContentPadded):
+      expected, expected_found = normalize_fn(content, year=2015)
+      for data_like in (data, bytearray(data), memoryview(data)):
+        new_data, found = normalize_fn(data_like, year=2015)
+        self.assertEqual(found, expected_found)
+        self.assertEqual(bytes(new_data), expected.encode("utf-8"))
+
+      # Binary content that needs no change is handed back as is.
+      expected = expected.encode("utf-8")
+      new_data, _ = normalize_fn(expected, year=2015)
+      self.assertIs(new_data, expected)
+
+
+  def testNormalizeMappedFile(self):
+    """Verify that normalization of files mapped into memory works correctly."""
+    MSFT = (COPYRIGHT_MSFT_TEMPLATE % COPYRIGHT_MSFT_LINE,
+            COPYRIGHT_MSFT_TEMPLATE % COPYRIGHT_MSFT_LINE_FIXED)
+    GENTOO = (COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE,
+              COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE_FIXED)
+    DESO1 = (COPYRIGHT_DESO_TEMPLATE % COPYRIGHT_DESO_LINE1,
+             COPYRIGHT_DESO_TEMPLATE % COPYRIGHT_DESO_LINE1_FIXED)
+    MULTI = ("%s\n%s" % (MSFT[0], GENTOO[0]), "%s\n%s" % (MSFT[1], GENTOO[1]))
+
+    for content, expected in (MSFT, GENTOO, MULTI):
+      self.writeRunReadVerify(content, expected, year=2015, mapped=True)
+      self.writeRunReadVerify(content, expected, year=2015, mapped=True,
+                              limit="20")
+
+    self.writeRunReadVerify(DESO1[0], DESO1[1], policy="pad", year=2015,
+                            mapped=True)
+    self.writeRunReadVerify("", "", year=2015, mapped=True)
+    self.writeRunReadVerify("\0Copyright 2013", "\0Copyright 2013",
+                            year=2015, mapped=True)
+
+
+  def testFindChanges(self):
+    """Verify that only the changed headers are reported as changes."""
+    content = COPYRIGHT_MSFT_LINE_FIXED + "\n" + COPYRIGHT_GENTOO_LINE + "\n"
+    # A match starts with the copyright keyword, the comment characters
+    # are not part of it.
+    start = len(COPYRIGHT_MSFT_LINE_FIXED) + 1 + len("# ")
+    end = len(COPYRIGHT_MSFT_LINE_FIXED) + 1 + len(COPYRIGHT_GENTOO_LINE)
+    replacement = COPYRIGHT_GENTOO_LINE_FIXED[len("# "):]
+
+    for normalize_fn in (normalizeContent, normalizeContentPadded):
+      changes, found = findChanges(content, normalize_fn, year=2015)
+      self.assertEqual(found, 2)
+      self.assertEqual(changes, [(start, end, replacement)])
+
+      changes, found = findChanges(content.encode(), normalize_fn, year=2015)
+      self.assertEqual(found, 2)
+      self.assertEqual(changes, [(start, end, replacement.encode())])
+
+
+  def testNormalizeContentManyHeaders(self):
+    """Verify that many headers in a single string are all normalized."""
+    content = COPYRIGHT_GENTOO_LINE + "\n" + COPYRIGHT_MSFT_LINE + "\n"
+    expected = COPYRIGHT_GENTOO_LINE_FIXED + "\n" + COPYRIGHT_MSFT_LINE_FIXED + "\n"
+
+    new_content, found = normalizeContent(content * 100, year=2015)
+    self.assertEqual(found, 200)
+    self.assertEqual(new_content, expected * 100)
+
+    # Content requiring no changes should be handed back as is.
+    new_content, found = normalizeContent(expected, year=2015)
+    self.assertEqual(found, 2)
+    self.assertIs(new_content, expected)
+
+
+  def testNormalizeContentLongDigitRuns(self):
+    """Verify that runs of digits too long to be years are left alone."""
+    digits = "1234567890" * 1000
+    content = "Copyright #%s (c) deso 2013\n" % digits
+    expected = "Copyright #%s (c) deso 2013,2015\n" % digits
+
+    new_content, found = normalizeContent(content, year=2015)
+    self.assertEqual(found, 1)
+    self.assertEqual(new_content, expected)
+
+    content = "Copyright %s, 2013\n" % digits
+    new_content, found = normalizeContent(content, year=2015)
+    self.assertEqual(found, 1)
+    self.assertEqual(new_content, "Copyright %s, 2013,2015\n" % digits)
+
+    for content in ("Copyright %s\n" % digits, "Copyright 20131\n"):
+      new_content, found = normalizeContent(content, year=2015)
+      self.assertEqual(found, 0)
+      self.assertIs(new_content, content)
+
+
+  def testNormalizeContentYearsFollowedByLongDigitRuns(self):
+    """Verify that years followed by a separator and a long digit run are left alone."""
+    for content in ("Copyright 2010,2011,12345 Foo\n",
+                    "Copyright 2010,12345678 Foo\n",
+                    "Copyright (c) 2010-20111 Foo\n"):
+      for normalize_fn in (normalizeContent, normalizeContentPadded):
+        for year in (None, 2020):
+          new_content, found = normalize_fn(content, year=year)
+          self.assertEqual(found, 0)
+          self.assertIs(new_content, content)
+
+
+  def testNormalizeContentPlausibleYears(self):
+    """Verify that only headers with plausible years are normalized."""
+    plausible = Range(1970, 2100)
+    content = "// Copyright 2010-2012 a\n// Copyright 98 b\n// Copyright 2010,5 c\n"
+    expected = "// Copyright 2010-2012,2020 a\n// Copyright 98 b\n// Copyright 2010,5 c\n"
+
+    for normalize_fn in (normalizeContent, normalizeContentPadded):
+      new_content, found = normalize_fn(content, year=2020, plausible=plausible)
+      self.assertEqual(found, 1)
+      self.assertEqual(new_content, expected)
+
+    # Years may have more than four digits if plausible.
+    content = "Copyright 10000-10001 deso\n"
+    new_content, _ = normalizeContent(content, year=10002,
+                                      plausible=Range(1970, 99999))
+    self.assertEqual(new_content, "Copyright 10000-10002 deso\n")
+
+    normalizer = Normalizer(normalizeContent, year=2020, plausible=plausible)
+    self.assertEqual(normalizer.normalizeData(b"Copyright 98 b\n"),
+                     (b"Copyright 98 b\n", 0))
+    copy = unpickle(dumps(normalizer))
+    self.assertEqual(copy.plausible, plausible)
+
+    self.assertEqual(plausibleStringToRange("1970-2100"), plausible)
+    for string in ("2100-1970", "1970-", "x"):
+      with self.assertRaises(ValueError):
+        plausibleStringToRange(string)
+
+
+  def testPolicyParsing(self):
+    """Verify that policy strings are mapped to normalization functions."""
+    self.assertIs(policyStringToFunction("plain"), normalizeContent)
+    self.assertIs(policyStringToFunction("pad"), normalizeContentPadded)
+
+    with self.assertRaises(ArgumentTypeError):
+      policyStringToFunction("fancy")
+
+    with self.assertRaises(ValueError) as e:
+      policyStringToFunction("fancy", ValueError)
+
+    self.assertNotIsInstance(e.exception, ArgumentTypeError)
+
+
+  def testKeywordPrefilter(self):
+    """Verify that the keyword search finds the keyword in any case and place."""
+    self.assertFalse(mayContainCopyright(b""))
+    self.assertFalse(mayContainCopyright(b"int main() { return 0; }"))
+    self.assertFalse(mayContainCopyright(b"copyrigh t"))
+    self.assertTrue(mayContainCopyright(b"// Copyright 2015"))
+    self.assertTrue(mayContainCopyright(b"COPYRIGHT"))
+    self.assertTrue(mayContainCopyright(b"\xff\xfe copyRight"))
+    self.assertFalse(mayContainCopyright(b"// Copyright 2015", end=10))
+
+    # The keyword must be found even if it crosses a chunk boundary.
+    for offset in range(1, 10):
+      data = b"x" * (KEYWORD_CHUNK_SIZE - offset) + b"Copyright"
+      self.assertTrue(mayContainCopyright(data))
+      self.assertTrue(mayContainCopyright(memoryview(data)))
+
+
+  def testSniffBinary(self):
+    """Verify that binary content is detected based on its beginning only."""
+    def sniff(data):
+      """Sniff the given data and check that nothing got consumed."""
+      stream = BufferedReader(BytesIO(data))
+      result = sniffBinary(stream)
+      self.assertEqual(stream.read(), data)
+      return result
+
+    self.assertFalse(sniff(b""))
+    self.assertFalse(sniff(b"// Copyright 2015"))
+    self.assertFalse(sniff(b"\xe4\xfc"))
+    self.assertTrue(sniff(b"\0Copyright 2015"))
+    self.assertTrue(sniff(b"x" * (BINARY_SNIFF_SIZE - 1) + b"\0"))
+    self.assertFalse(sniff(b"x" * BINARY_SNIFF_SIZE + b"\0"))
+
+    # A NUL byte following the sniffed part is still detected once the
+    # content is looked at.
+    with NamedTemporaryFile() as f:
+      f.write(b"x" * BINARY_SNIFF_SIZE + b"\0Copyright 2013")
+      f.flush()
+      self.assertEqual(normalizeFiles([f.name], year=2015)[Status.Binary], 1)
+
+
+  def testNormalizeFilesStatistics(self):
+    """Verify that normalizeFiles reports the outcome for the files processed."""
+    contents = [
+      COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE,
+      COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE_FIXED,
+      "int main() { return 0; }",
+      "// This file is not copyrighted.",
+      "",
+      "\0Copyright (C) 2013\0",
+    ]
+    files = [NamedTemporaryFile() for _ in contents]
+    try:
+      for f, content in zip(files, contents):
+        f.write(content.encode("utf-8"))
+        f.flush()
+
+      stats = normalizeFiles([f.name for f in files], year=2015)
+      self.assertEqual(stats[Status.Changed], 1)
+      self.assertEqual(stats[Status.Unchanged], 1)
+      self.assertEqual(stats[Status.NoHeader], 1)
+      self.assertEqual(stats[Status.Prefiltered], 2)
+      self.assertEqual(stats[Status.Binary], 1)
+
+      # The second time around all copyright headers are normalized.
+      stats = normalizeFiles([f.name for f in files], year=2015)
+      self.assertEqual(stats[Status.Changed], 0)
+      self.assertEqual(stats[Status.Unchanged], 2)
+    finally:
+      for f in files:
+        f.close()
+
+
+  def testNormalizeFilesInParallel(self):
+    """Verify that files can be normalized by multiple processes."""
+    contents = [COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE] * 5
+    contents += ["int main() { return 0; }"] * 3
+    files = [NamedTemporaryFile() for _ in contents]
+    try:
+      for f, content in zip(files, contents):
+        f.write(content.encode("utf-8"))
+        f.flush()
+
+      paths = [f.name for f in files]
+      results = list(iterNormalizeFiles(paths, year=2015, jobs=3))
+      self.assertEqual(sorted(path for path, _ in results), sorted(paths))
+
+      statuses = dict(results)
+      for f, content in zip(files, contents):
+        expected = Status.Changed if "Copyright" in content else Status.Prefiltered
+        self.assertEqual(statuses[f.name], expected)
+
+        f.seek(0)
+        if expected == Status.Changed:
+          expected = COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE_FIXED
+        else:
+          expected = content
+        self.assertEqual(f.read().decode("utf-8"), expected)
+
+      stats = normalizeFiles(paths, year=2015, jobs=2)
+      self.assertEqual(stats[Status.Unchanged], 5)
+      self.assertEqual(stats[Status.Prefiltered], 3)
+    finally:
+      for f in files:
+        f.close()
+
+
+  def testNormalizeFilesReport(self):
+    """Verify that a JSON-lines report is written for the processed files."""
+    contents = [
+      COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE,
+      "int main() { return 0; }",
+    ]
+    files = [NamedTemporaryFile() for _ in contents]
+    try:
+      for f, content in zip(files, contents):
+        f.write(content.encode("utf-8"))
+        f.flush()
+
+      for mapped in (False, True):
+        with NamedTemporaryFile("r") as report:
+          args = [f.name for f in files] + ["--report=%s" % report.name]
+          args += ["--mmap"] if mapped else []
+          size = getsize(files[0].name)
+          normalizeMain(["normalize", "--year=2015", "--jobs=2"] + args)
+
+          reports = {r["path"]: r for r in map(loads, report)}
+          changed = reports[files[0].name]
+          prefiltered = reports[files[1].name]
+
+          expected = "changed" if not mapped else "unchanged"
+          self.assertEqual(changed["status"], expected)
+          self.assertEqual(changed["found"], 1)
+          self.assertEqual(changed["bytes_read"], size)
+          self.assertFalse(changed["cached"])
+          self.assertGreater(changed["normalize_time"], 0)
+
+          self.assertEqual(prefiltered["status"], "prefiltered")
+          self.assertEqual(prefiltered["found"], 0)
+          self.assertEqual(prefiltered["write_time"], 0)
+    finally:
+      for f in files:
+        f.close()
+
+
+  def testNormalizeFilesInParallelError(self):
+    """Verify that errors in worker processes are propagated."""
+    with NamedTemporaryFile() as f:
+      paths = [f.name, f.name + ".does-not-exist"]
+      with self.assertRaises(FileNotFoundError):
+        normalizeFiles(paths, jobs=2)
+
+
+  def testNormalizeMany(self):
+    """Verify that many contents are normalized at once, in order."""
+    contents = [
+      COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE,
+      COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE_FIXED,
+      "int main() { return 0; }",
+      "# Copyright 2011,\n#\n\n 2012 - 2013 deso\nx\n",
+    ] * 20
+    contents += [c.encode("utf-8") for c in contents]
+
+    for policy in (normalizeContent, normalizeContentPadded):
+      expected = [policy(c, year=2015, ignore=["deso"]) for c in contents]
+      for jobs in (1, 3):
+        results = normalizeMany(contents, policy, year=2015, ignore=["deso"],
+                                jobs=jobs)
+        self.assertEqual(results, expected)
+
+    # Unknown normalization functions are supported as well.
+    def normalizeNothing(content, year=None, ignore=None, limit=None):
+      """A normalization function not changing anything."""
+      return content, 0
+
+    self.assertEqual(normalizeMany(contents[:2], normalizeNothing),
+                     [(c, 0) for c in contents[:2]])
+
+
+  def testNormalizer(self):
+    """Verify that a Normalizer can be reused and pickled."""
+    content = "# Copyright 2013-2014 deso\n# Copyright 2012,2013 foo\n"
+    normalizer = Normalizer(normalizeContent, year=2015, ignore=["deso"])
+    for _ in range(2):
+      self.assertEqual(normalizer.normalize(content),
+                       normalizeContent(content, year=2015, ignore=["deso"]))
+
+    data = content.encode()
+    expected = (content.replace("2012,2013", "2012-2013,2015").encode(), 1)
+    self.assertEqual(normalizer.normalizeData(data), expected)
+    self.assertEqual(normalizer.normalizeData(b"int x;"), (b"int x;", 0))
+
+    copy = unpickle(dumps(normalizer))
+    self.assertIs(copy.normalize_fn, normalizeContent)
+    self.assertEqual(copy.year, 2015)
+    self.assertEqual(copy.ignore, normalizer.ignore)
+    self.assertEqual(copy.normalize(content), normalizer.normalize(content))
+
+    def normalizeUpper(content, year=None, ignore=None, limit=None):
+      """A normalization function unknown to the Normalizer."""
+      return content.upper(), 1
+
+    normalizer = Normalizer(normalizeUpper, year=2015)
+    self.assertEqual(normalizer.normalize("a"), ("A", 1))
+    self.assertEqual(normalizer.findChanges("a"), ([(0, 1, "A")], 1))
+
+
+  def testNormalizeStream(self):
+    """Verify that streams are normalized just like content in memory."""
+    contents = [
+      COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE,
+      COPYRIGHT_GENTOO_TEMPLATE % COPYRIGHT_GENTOO_LINE_FIXED,
+      "# Copyright 2011,\n#\n\n 2012 - 2013 deso\nx\n",
+      "Copyright (C) 2012,\r\n2013\r\nCopyright 2013\n\n,2014 x",
+      "Copyright (c)\n2013\nint main() { return 0; }\n",
+      "int main() { return 0; }",
+      "",
+    ]
+    for policy in (normalizeContent, normalizeContentPadded):
+      for content in contents:
+        data = content.encode("utf-8")
+        expected, found = policy(data, year=2015)
+        output = BytesIO()
+        status = normalizeStream(BufferedReader(BytesIO(data)), output,
+                                 policy, year=2015)
+
+        self.assertEqual(output.getvalue(), expected)
+        if expected != data:
+          self.assertEqual(status, Status.Changed)
+        elif found:
+          self.assertEqual(status, Status.Unchanged)
+        else:
+          self.assertIn(status, (Status.NoHeader, Status.Prefiltered))
+
+
+  def testNormalizeStreamWithScanLimit(self):
+    """Verify that only the scan window of a stream is normalized."""
+    data = b"# Copyright 2013 a\n# Copyright 2013 b\n" * 3
+    output = BytesIO()
+    status = normalizeStream(BufferedReader(BytesIO(data)), output,
+                             year=2015, limit=scanLimitStringToLimit("1"))
+
+    self.assertEqual(status, Status.Changed)
+    self.assertEqual(output.getvalue(), b"# Copyright 2013,2015 a\n" + data[19:])
+
+    # With a limit in bytes the window ends within a line. The data read
+    # beyond it must not get lost.
+    data = b"// Copyright 2013 a\nint x = 1;\n"
+    output = BytesIO()
+    status = normalizeStream(BufferedReader(BytesIO(data)), output,
+                             year=2015, limit=scanLimitStringToLimit("25b"))
+
+    self.assertEqual(status, Status.Changed)
+    self.assertEqual(output.getvalue(), b"// Copyright 2013,2015 a\nint x = 1;\n")
+
+
+  def testNormalizeStreamBinary(self):
+    """Verify that binary streams are passed through unchanged."""
+    data = b"\0Copyright 2013\n"
+    output = BytesIO()
+    status = normalizeStream(BufferedReader(BytesIO(data)), output, year=2015)
+
+    self.assertEqual(status, Status.Binary)
+    self.assertEqual(output.getvalue(), data)
+
+
 if __name__ == "__main__":
   main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Tests for the profiling functionality."""
+
+from deso.copyright.normalize import (
+  main as normalizeMain,
+)
+from deso.copyright.profiler import (
+  Profiler,
+  TOTAL,
+)
+from deso.copyright.report import (
+  FileReport,
+)
+from io import (
+  StringIO,
+)
+from os.path import (
+  join,
+)
+from pstats import (
+  Stats,
+)
+from tempfile import (
+  TemporaryDirectory,
+)
+from unittest import (
+  main,
+  TestCase,
+)
+
+
+class TestProfiler(TestCase):
+  """Tests for the profiling functionality."""
+  def testPhases(self):
+    """Verify that time and calls are recorded per phase."""
+    output = StringIO()
+    with Profiler(output=output) as profiler:
+      @profiler.profiled("b")
+      def function(x):
+        """A function to profile."""
+        return x + 1
+
+      with profiler.phase("a"):
+        self.assertEqual(function(1), 2)
+        self.assertEqual(function(2), 3)
+
+      report = FileReport("file")
+      report.times["read"] = 0.5
+      profiler.write(report)
+
+    phases = profiler.phases
+    self.assertEqual(phases["a"][1], 1)
+    self.assertEqual(phases["b"][1], 2)
+    self.assertLessEqual(phases["b"][0], phases["a"][0])
+    self.assertEqual(phases["read"], (0.5, 1))
+    self.assertNotIn("write", phases)
+    self.assertEqual(phases[TOTAL][1], 1)
+
+    lines = output.getvalue().splitlines()
+    self.assertRegex(lines[0], r"^phase +calls +time \[s\]$")
+    # Phase "b" is recorded first, because it is finished first.
+    self.assertRegex(lines[1], r"^b +2 +[0-9.]+$")
+    self.assertRegex(lines[2], r"^a +1 +[0-9.]+$")
+    self.assertRegex(lines[-2], r"^total +1 +[0-9.]+$")
+    self.assertRegex(lines[-1], r"^peak memory: [0-9.]+ KiB$")
+
+
+  def testDisabled(self):
+    """Verify that a disabled profiler records nothing."""
+    def function():
+      """A function that is not to be profiled."""
+      pass
+
+    output = StringIO()
+    with Profiler(enabled=False, output=output) as profiler:
+      self.assertIs(profiler.profiled("a")(function), function)
+      with profiler.phase("b"):
+        pass
+
+    self.assertEqual(profiler.phases, {})
+    self.assertEqual(output.getvalue(), "")
+
+
+  def testMainDump(self):
+    """Verify that the script dumps cProfile statistics if requested."""
+    with TemporaryDirectory() as directory:
+      path = join(directory, "file")
+      dump = join(directory, "dump")
+      with open(path, "w") as f:
+        f.write("// Copyright 2013")
+
+      normalizeMain(["normalize", "--jobs=1", "--profile-dump=%s" % dump, path])
+      stats = Stats(dump)
+      functions = [name for _, _, name in stats.stats]
+      self.assertIn("normalizeFile", functions)
+
+
+if __name__ == "__main__":
+  main()
@@ -20,15 +20,34 @@
 """A test suite for the range sequence handling functionality."""
 
 from deso.copyright import (
+  flattenRanges,
   normalizeRanges,
+  normalizeRangesBatch,
+  normalizeRangesString,
   parseRanges,
   Range,
+  RangeSet,
+  scanRanges,
+  stringifyRanges,
+)
+from deso.copyright.ranges import (
+  _mergeRangesNumpy,
+  _mergeRangesPython,
+)
+from random import (
+  Random,
 )
 from unittest import (
   main,
+  skipIf,
   TestCase,
 )
 
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
 
 class TestRanges(TestCase):
   """Tests for the range sequence handling functionality."""
@@ -112,5 +131,136 @@ class TestRanges(TestCase):
     doTest("2012_2013")
 
 
+  def testScanRanges(self):
+    """Verify that range strings are scanned into pairs of years."""
+    self.assertEqual(scanRanges(""), [])
+    self.assertEqual(scanRanges(" , ,"), [])
+    self.assertEqual(scanRanges("2013"), [(2013, 2013)])
+    self.assertEqual(scanRanges(" 2011 -2012 ,2014,,  2015- 2016 , "),
+                     [(2011, 2012), (2014, 2014), (2015, 2016)])
+
+    def doTest(ranges_string, regex):
+      """Check that scanning fails with the expected error."""
+      with self.assertRaisesRegex(ValueError, regex):
+        scanRanges(ranges_string)
+
+    doTest("2012_2013", r"unexpected \"_\" at position 4")
+    doTest("2013 2014", r"unexpected \"2\" at position 5")
+    doTest("2011,2013-", r"unexpected end of string at position 10")
+    doTest("2011, x", r"unexpected \"x\" at position 6")
+    doTest("2011,2015-2013", r"greater than second year \(2013\) at position 5")
+
+
+  def testNormalizeRangesString(self):
+    """Verify that range strings are normalized and results are memoized."""
+    normalizeRangesString.cache_clear()
+
+    self.assertEqual(normalizeRangesString("2015, 2013,2014 "), "2013-2015")
+    self.assertEqual(normalizeRangesString("2013", 2015), "2013,2015")
+    self.assertEqual(normalizeRangesString("2013", 2014), "2013-2014")
+    self.assertEqual(normalizeRangesString("2013", 2015), "2013,2015")
+
+    info = normalizeRangesString.cache_info()
+    self.assertEqual(info.hits, 1)
+    self.assertEqual(info.misses, 3)
+
+    # Errors are reported for each invocation.
+    for _ in range(2):
+      with self.assertRaises(ValueError):
+        normalizeRangesString("2015-2011", 2015)
+
+
+  def testRangeSet(self):
+    """Verify that a RangeSet keeps its ranges normalized."""
+    ranges = RangeSet([Range(2014, 2015), Range(2010, 2010), Range(2011, 2012),
+                       Range(2005, 2007), Range(2006, 2006)])
+    self.assertEqual(list(ranges), [Range(2005, 2007), Range(2010, 2012),
+                                    Range(2014, 2015)])
+    self.assertEqual(len(ranges), 3)
+    self.assertIn(2006, ranges)
+    self.assertNotIn(2008, ranges)
+    self.assertNotIn(2004, ranges)
+
+    def doTest(year, expected):
+      """Add a year to the set and check the resulting range string."""
+      ranges.add(year)
+      self.assertEqual(str(ranges), expected)
+
+    doTest(2011, "2005-2007,2010-2012,2014-2015")
+    doTest(2017, "2005-2007,2010-2012,2014-2015,2017")
+    doTest(2001, "2001,2005-2007,2010-2012,2014-2015,2017")
+    doTest(2008, "2001,2005-2008,2010-2012,2014-2015,2017")
+    doTest(2009, "2001,2005-2012,2014-2015,2017")
+    doTest(2004, "2001,2004-2012,2014-2015,2017")
+    doTest(2016, "2001,2004-2012,2014-2017")
+    doTest(2013, "2001,2004-2017")
+
+    random = Random(3)
+    for _ in range(50):
+      years = set()
+      ranges = RangeSet()
+      for _ in range(30):
+        year = random.randrange(2000, 2040)
+        years.add(year)
+        ranges.add(year)
+
+      self.assertEqual(ranges, RangeSet(Range(y, y) for y in years))
+      self.assertEqual({y for r in ranges for y in range(r.first, r.last + 1)},
+                       years)
+
+
+  def testNormalizeRangesBatch(self):
+    """Verify that batch normalization matches normalizeRanges."""
+    random = Random(1)
+    range_lists = []
+    for _ in range(200):
+      ranges = []
+      for _ in range(random.randrange(0, 8)):
+        first = random.randrange(2000, 2020)
+        ranges.append(Range(first, first + random.choice([0, 0, 1, 3])))
+      range_lists.append(ranges)
+
+    for year in (None, 2015):
+      expected = []
+      for ranges in range_lists:
+        ranges = list(ranges)
+        if year is not None:
+          ranges.append(Range(year, year))
+        normalizeRanges(ranges)
+        expected.append(stringifyRanges(ranges))
+
+      firsts, lasts, owners = flattenRanges(range_lists)
+      count = len(range_lists)
+      self.assertEqual(normalizeRangesBatch(firsts, lasts, owners, count, year),
+                       expected)
+
+      merged = _mergeRangesPython(firsts, lasts, owners, count, year)
+      self.assertEqual(len(merged), sum(s.count(",") + 1 for s in expected if s))
+
+    self.assertEqual(normalizeRangesBatch([], [], []), [])
+    self.assertEqual(normalizeRangesBatch([], [], [], 2, 2015), ["2015", "2015"])
+    self.assertEqual(normalizeRangesBatch([2013, 2011], [2014, 2012], [1, 1]),
+                     ["", "2011-2014"])
+    # Years exceeding 64 bit integers are supported as well.
+    self.assertEqual(normalizeRangesBatch([2 ** 70], [2 ** 70], [0], year=1),
+                     ["1,%d" % 2 ** 70])
+
+
+  @skipIf(numpy is None, "NumPy is not available")
+  def testNormalizeRangesBatchNumpy(self):
+    """Verify that the vectorized merge matches the pure Python one."""
+    random = Random(2)
+    firsts = [random.randrange(1990, 2020) for _ in range(1000)]
+    lasts = [first + random.randrange(0, 3) for first in firsts]
+    owners = sorted(random.randrange(0, 100) for _ in range(1000))
+    random.shuffle(owners)
+
+    for year in (None, 2010):
+      args = (numpy.array(firsts), numpy.array(lasts), numpy.array(owners), 100,
+              year)
+      self.assertEqual(_mergeRangesNumpy(*args),
+                       [tuple(m) for m in _mergeRangesPython(*args)])
+
+
 if __name__ == "__main__":
   main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Tests for the copyright header scanner."""
+
+from deso.copyright.scanner import (
+  copyrightRegex,
+  copyrightScanner,
+)
+from deso.copyright.range import (
+  Range,
+)
+from random import (
+  Random,
+)
+from unittest import (
+  main,
+  TestCase,
+)
+
+
+COPYRIGHT_RE = copyrightRegex()
+COPYRIGHT_BYTES_RE = copyrightRegex(binary=True)
+COPYRIGHT_SCANNER = copyrightScanner()
+COPYRIGHT_BYTES_SCANNER = copyrightScanner(binary=True)
+# Fragments from which we assemble inputs for the scanner. They are
+# chosen to cover all the corner cases of the copyright header syntax.
+FRAGMENTS = [
+  "copyright", "CopyRight", "copyrigh", " ", "  ", "\t", "\n", "\r",
+  "1", "2013", "-", ",", " , ", "9-", "x", "(C)", "x123456", "12345",
+]
+
+
+def matches(pattern, string, endpos=None):
+  """Retrieve the spans and groups of all matches of a pattern in a string."""
+  endpos = len(string) if endpos is None else endpos
+  return [(m.span(), m.groups()) for m in pattern.finditer(string, 0, endpos)]
+
+
+class TestScanner(TestCase):
+  """Tests for the copyright header scanner."""
+  def testMatch(self):
+    """Verify that a match provides the expected groups."""
+    string = "// Copyright (C) 2013, 2015 deso\n"
+    match = COPYRIGHT_SCANNER.search(string)
+
+    self.assertEqual(match.span(), (3, 32))
+    self.assertEqual(match.group(0), "Copyright (C) 2013, 2015 deso")
+    self.assertEqual(match.groups(), ("Copyright (C) ", "2013, 2015", " deso"))
+    self.assertEqual(match.span(2), (17, 27))
+    self.assertEqual(match.group(3), " deso")
+
+    with self.assertRaises(IndexError):
+      match.group(4)
+
+
+  def testNoMatch(self):
+    """Verify that strings without a proper header are not matched."""
+    for string in ("", "copyright", "Copyright\n2013",
+                   "Copyright (C) deso\n2013", "copyright x" * 10):
+      self.assertIsNone(COPYRIGHT_SCANNER.search(string), string)
+
+
+  def testEquivalenceWithRegularExpression(self):
+    """Verify that the scanner finds exactly the matches COPYRIGHT_RE finds."""
+    random = Random(0)
+
+    for _ in range(20000):
+      count = random.randint(0, 14)
+      string = "".join(random.choice(FRAGMENTS) for _ in range(count))
+      endpos = random.randint(0, len(string))
+
+      self.assertEqual(matches(COPYRIGHT_SCANNER, string),
+                       matches(COPYRIGHT_RE, string), string)
+      self.assertEqual(matches(COPYRIGHT_SCANNER, string, endpos),
+                       matches(COPYRIGHT_RE, string, endpos), string)
+
+      data = string.encode("ascii")
+      self.assertEqual(matches(COPYRIGHT_BYTES_SCANNER, data),
+                       matches(COPYRIGHT_BYTES_RE, data), data)
+
+
+  def testLongDigitRuns(self):
+    """Verify that digit runs longer than a year are not matched as years."""
+    string = "Copyright 123456789 x20131 2013-2015\n"
+    match = COPYRIGHT_SCANNER.search(string)
+    self.assertEqual(match.groups(), ("Copyright 123456789 x20131 ", "2013-2015", ""))
+
+    self.assertIsNone(COPYRIGHT_SCANNER.search("Copyright 12345\n2013"))
+
+
+  def testYearsFollowedByLongDigitRuns(self):
+    """Verify that years followed by a separator and a long digit run are no match."""
+    for string in ("Copyright 2010,2011,12345 Foo\n",
+                   "Copyright 2010,12345678 Foo\n",
+                   "Copyright (c) 2010-20111 Foo\n",
+                   "Copyright 2010, 2011 -\n 20111 Foo\n",
+                   "Copyright 2010,,12345 Foo\n"):
+      self.assertIsNone(COPYRIGHT_SCANNER.search(string), string)
+      self.assertIsNone(COPYRIGHT_RE.search(string), string)
+
+    # Later years on the same line are found nevertheless, but not those
+    # on the following line.
+    string = "Copyright 2010-20111 Foo 2013\n"
+    match = COPYRIGHT_SCANNER.search(string)
+    self.assertEqual(match.groups(), ("Copyright 2010-20111 Foo ", "2013", ""))
+
+    string = "Copyright 2010,\n2011,12345 Foo 2013\n"
+    self.assertIsNone(COPYRIGHT_SCANNER.search(string))
+    self.assertIsNone(COPYRIGHT_RE.search(string))
+
+
+  def testPlausibleYears(self):
+    """Verify that a scanner can be restricted to plausible years."""
+    scanner = copyrightScanner(plausible=Range(1970, 2100))
+    self.assertIsNone(scanner.search("Copyright 98\n"))
+    self.assertIsNone(scanner.search("Copyright 1960-2013 deso\n"))
+
+    match = scanner.search("Copyright 1960 x 2013, 2014 deso\n")
+    self.assertEqual(match.groups(), ("Copyright 1960 x ", "2013, 2014", " deso"))
+
+    data = memoryview(b"Copyright 2013-2014 deso\n")
+    scanner = copyrightScanner(binary=True, plausible=Range(1970, 2100))
+    self.assertEqual(scanner.search(data).group(2), b"2013-2014")
+
+
+  def testBytesLikeObjects(self):
+    """Verify that the binary scanner works on all bytes-like objects."""
+    data = b"# Copyright 2013-2014 deso\r\n"
+    expected = [((2, 26), (b"Copyright ", b"2013-2014", b" deso"))]
+
+    for data_like in (data, bytearray(data), memoryview(data)):
+      self.assertEqual(matches(COPYRIGHT_BYTES_SCANNER, data_like), expected)
+
+
+if __name__ == "__main__":
+  main()
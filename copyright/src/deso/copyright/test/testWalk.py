@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Tests for the directory walking functionality."""
+
+from deso.copyright.normalize import (
+  main as normalizeMain,
+)
+from deso.copyright.walk import (
+  IgnoreRule,
+  isIgnored,
+  parseIgnoreFile,
+  walkDirectories,
+  walkTree,
+  walkFiles,
+)
+from os import (
+  makedirs,
+  symlink,
+)
+from os.path import (
+  dirname,
+  join,
+  relpath,
+)
+from tempfile import (
+  TemporaryDirectory,
+)
+from unittest import (
+  main,
+  TestCase,
+)
+
+
+class TestWalk(TestCase):
+  """Tests for the directory walking functionality."""
+  def setUp(self):
+    """Create a temporary directory for the test to work in."""
+    self._directory = TemporaryDirectory()
+
+
+  def tearDown(self):
+    """Remove the temporary directory."""
+    self._directory.cleanup()
+
+
+  def write(self, path, content=""):
+    """Write a file below the temporary directory."""
+    path = join(self._directory.name, path)
+    makedirs(dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+      f.write(content)
+
+
+  def walk(self, *paths):
+    """Walk the given paths below the temporary directory."""
+    root = self._directory.name
+    paths = [join(root, path) for path in paths] if paths else [root]
+    return sorted(relpath(path, root) for path in walkFiles(paths))
+
+
+  def testIgnoreRule(self):
+    """Verify that gitignore globs are matched as git would."""
+    def doTest(line, path, expected, is_dir=False):
+      """Match a path against a rule and check the outcome."""
+      self.assertEqual(IgnoreRule(line).matches(path, is_dir), expected,
+                       (line, path))
+
+    doTest("*.o", "a.o", True)
+    doTest("*.o", "dir/a.o", True)
+    doTest("*.o", "a.c", False)
+    doTest("/a.o", "a.o", True)
+    doTest("/a.o", "dir/a.o", False)
+    doTest("dir/*.o", "dir/a.o", True)
+    doTest("dir/*.o", "dir/sub/a.o", False)
+    doTest("dir/*.o", "x/dir/a.o", False)
+    doTest("**/build", "build", True, is_dir=True)
+    doTest("**/build", "x/y/build", True, is_dir=True)
+    doTest("a/**/b", "a/b", True)
+    doTest("a/**/b", "a/x/y/b", True)
+    doTest("a/**", "a/x/y", True)
+    doTest("build/", "build", True, is_dir=True)
+    doTest("build/", "build", False)
+    doTest("file?.[ch]", "file1.c", True)
+    doTest("file?.[!ch]", "file1.c", False)
+    doTest("\\#file", "#file", True)
+    doTest("\\!file", "!file", True)
+
+
+  def testParseIgnoreFile(self):
+    """Verify that comments and empty lines in .gitignore files are skipped."""
+    rules = parseIgnoreFile(["# comment\n", "\n", "*.o  \n", "!a.o\n"])
+    self.assertEqual(len(rules), 2)
+    self.assertFalse(rules[0].negated)
+    self.assertTrue(rules[1].negated)
+    self.assertTrue(rules[0].matches("x.o", False))
+
+
+  def testWalkFiles(self):
+    """Verify that hidden and ignored files are skipped while walking."""
+    self.write("a.c")
+    self.write(".hidden")
+    self.write(".git/config")
+    self.write(".gitignore", "*.o\nbuild/\n!keep.o\n")
+    self.write("a.o")
+    self.write("keep.o")
+    self.write("build/b.c")
+    self.write("src/.hidden/c.c")
+    self.write("src/d.c")
+    self.write("src/d.o")
+    self.write("src/sub/.gitignore", "/e.c\n")
+    self.write("src/sub/e.c")
+    self.write("src/sub/x/e.c")
+    symlink("a.c", join(self._directory.name, "link.c"))
+
+    expected = [
+      "a.c",
+      "keep.o",
+      "src/d.c",
+      "src/sub/x/e.c",
+    ]
+    self.assertEqual(self.walk(), expected)
+    # Files are passed through as they are. The .gitignore file in the
+    # parent of a walked directory is not taken into account.
+    expected = ["a.o", "src/d.c", "src/d.o", "src/sub/x/e.c"]
+    self.assertEqual(self.walk("src", "a.o"), expected)
+
+
+  def testWalkDirectories(self):
+    """Verify that directories are reported along with their ignore rules."""
+    self.write("a/b/c.c")
+    self.write("a/.d/e.c")
+    self.write("a/.gitignore", "f/\n*.o\n")
+    self.write("a/f/g.c")
+    self.write("h.c")
+
+    root = self._directory.name
+    result = list(walkDirectories(root))
+    directories = [relpath(directory, root) for directory, _ in result]
+    self.assertEqual(directories, [".", "a", "a/b"])
+
+    _, rules = result[2]
+    self.assertTrue(isIgnored(rules, "a/b/c.o", False))
+    self.assertFalse(isIgnored(rules, "a/b/c.c", False))
+    self.assertFalse(isIgnored(result[0][1], "c.o", False))
+
+
+  def testWalkTree(self):
+    """Verify that directories are reported before the files they contain."""
+    self.write("a/b/c.c")
+    self.write("a/.gitignore", "*.o\n")
+    self.write("a/d.o")
+    self.write("e.c")
+
+    root = self._directory.name
+    result = [(relpath(path, root), rules is None)
+              for path, rules in walkTree(root)]
+    self.assertEqual(result, [(".", False), ("e.c", True), ("a", False),
+                              ("a/b", False), ("a/b/c.c", True)])
+
+
+  def testRecursiveMain(self):
+    """Verify that the script normalizes directories recursively."""
+    self.write("a.c", "// Copyright 2013")
+    self.write("sub/b.c", "// Copyright 2013")
+    self.write("sub/c.c", "// Copyright 2013")
+    self.write("sub/.gitignore", "c.c\n")
+
+    root = self._directory.name
+    normalizeMain(["normalize", "--recursive", "--year=2015", "--jobs=2", root])
+
+    for path, expected in [("a.c", "2013,2015"), ("sub/b.c", "2013,2015"),
+                           ("sub/c.c", "2013")]:
+      with open(join(root, path)) as f:
+        self.assertEqual(f.read(), "// Copyright %s" % expected)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Tests for the functionality normalizing files as they change."""
+
+from deso.copyright.normalize import (
+  main as normalizeMain,
+  Status,
+)
+from deso.copyright.watch import (
+  iterWatchFiles,
+  Watcher,
+)
+from io import (
+  StringIO,
+)
+from os import (
+  makedirs,
+  rename,
+)
+from os.path import (
+  dirname,
+  join,
+  relpath,
+)
+from sys import (
+  platform,
+)
+from tempfile import (
+  TemporaryDirectory,
+)
+from unittest import (
+  main,
+  skipUnless,
+  TestCase,
+)
+from unittest.mock import (
+  Mock,
+  patch,
+)
+
+
+@skipUnless(platform.startswith("linux"), "inotify is only available on Linux")
+class TestWatch(TestCase):
+  """Tests for the functionality normalizing files as they change."""
+  def setUp(self):
+    """Create a temporary directory for the test to work in."""
+    self._directory = TemporaryDirectory()
+
+
+  def tearDown(self):
+    """Remove the temporary directory."""
+    self._directory.cleanup()
+
+
+  def write(self, path, content="// Copyright 2013\n"):
+    """Write a file below the temporary directory."""
+    path = join(self._directory.name, path)
+    makedirs(dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+      f.write(content)
+
+
+  def read(self, path):
+    """Read a file below the temporary directory."""
+    with open(join(self._directory.name, path)) as f:
+      return f.read()
+
+
+  def watch(self, watcher):
+    """Normalize changed files until no more changes happen."""
+    root = self._directory.name
+    results = iterWatchFiles(watcher, year=2015, delay=0.05, timeout=0.5)
+    return [(relpath(path, root), status) for path, status in results]
+
+
+  def testChangedFilesAreNormalized(self):
+    """Verify that only changed files are normalized."""
+    self.write("a.c")
+    self.write("sub/b.c")
+
+    with Watcher([self._directory.name]) as watcher:
+      self.write("sub/b.c")
+      self.assertEqual(self.watch(watcher), [("sub/b.c", Status.Changed)])
+      self.assertEqual(self.read("a.c"), "// Copyright 2013\n")
+      self.assertEqual(self.read("sub/b.c"), "// Copyright 2013,2015\n")
+
+
+  def testHiddenAndIgnoredFilesAreSkipped(self):
+    """Verify that hidden and ignored files are not normalized."""
+    self.write(".gitignore", "*.o\nbuild/\n")
+    self.write("build/a.c")
+
+    with Watcher([self._directory.name]) as watcher:
+      self.write(".b.c")
+      self.write("c.o")
+      self.write("build/a.c")
+      self.write("d.c")
+      self.assertEqual(self.watch(watcher), [("d.c", Status.Changed)])
+
+
+  def testNewDirectoriesAreWatched(self):
+    """Verify that directories created while watching are watched as well."""
+    with Watcher([self._directory.name]) as watcher:
+      makedirs(join(self._directory.name, "a", "b"))
+      self.write("c.c")
+
+      results = iterWatchFiles(watcher, year=2015, delay=0.05, timeout=0.5)
+      self.assertEqual(next(results)[1], Status.Changed)
+
+      self.write("a/b/d.c")
+      path, status = next(results)
+      self.assertEqual(relpath(path, self._directory.name), "a/b/d.c")
+      self.assertEqual(status, Status.Changed)
+
+
+  def testFilesInNewDirectoriesAreNormalized(self):
+    """Verify that files written to a directory before it is watched are normalized."""
+    with Watcher([self._directory.name]) as watcher:
+      # No event is read before all files are written, so none of the
+      # new directories is watched by the time the files are created.
+      self.write("a/b.c")
+      self.write("a/c/d.c")
+      self.write("a/c/.e.c")
+
+      # A directory moved into the watched tree is handled the same way.
+      with TemporaryDirectory(dir=dirname(self._directory.name)) as other:
+        makedirs(join(other, "f"))
+        with open(join(other, "f", "g.c"), "w") as f:
+          f.write("// Copyright 2013\n")
+        rename(join(other, "f"), join(self._directory.name, "f"))
+
+      expected = [
+        ("a/b.c", Status.Changed),
+        ("a/c/d.c", Status.Changed),
+        ("f/g.c", Status.Changed),
+      ]
+      self.assertEqual(sorted(self.watch(watcher)), expected)
+      self.assertEqual(self.read("a/c/d.c"), "// Copyright 2013,2015\n")
+      self.assertEqual(self.read("a/c/.e.c"), "// Copyright 2013\n")
+
+
+  def testBurstsAreDebounced(self):
+    """Verify that a file written repeatedly is normalized only once."""
+    with Watcher([self._directory.name]) as watcher:
+      for _ in range(10):
+        self.write("a.c", "// Copyright 2014\n")
+
+      # Many editors save a file by writing a temporary one and renaming
+      # it.
+      self.write("b.tmp")
+      rename(join(self._directory.name, "b.tmp"),
+             join(self._directory.name, "b.c"))
+
+      expected = [("a.c", Status.Changed), ("b.c", Status.Changed)]
+      self.assertEqual(sorted(self.watch(watcher)), expected)
+      self.assertEqual(self.read("a.c"), "// Copyright 2014-2015\n")
+
+
+  def testOwnWritesAreIgnored(self):
+    """Verify that files are not processed again because of our own writes."""
+    with Watcher([self._directory.name]) as watcher:
+      self.write("a.c")
+      self.write("b.c", "// Copyright 2015\n")
+
+      # Normalizing a file opens it for writing, which is reported as a
+      # change. Had these changes not been ignored, watching would not
+      # have ended.
+      expected = [("a.c", Status.Changed), ("b.c", Status.Unchanged)]
+      self.assertEqual(sorted(self.watch(watcher)), expected)
+
+      # Changes made by somebody else are picked up, though.
+      self.write("a.c")
+      self.assertEqual(self.watch(watcher), [("a.c", Status.Changed)])
+
+
+  def testOwnWritesReportedLaterAreIgnored(self):
+    """Verify that own writes are recognized when reported batches later."""
+    self.write("a.c")
+    self.write("b.c")
+    a = join(self._directory.name, "a.c")
+    b = join(self._directory.name, "b.c")
+
+    # Many changes may be split across batches, delaying the events
+    # caused by normalizing files.
+    watcher = Mock(batches=lambda delay, timeout: iter([[a], [b], [a], [b]]))
+    results = iterWatchFiles(watcher, year=2015)
+    self.assertEqual(list(results), [(a, Status.Changed), (b, Status.Changed)])
+
+
+  def testErrorsDoNotEndWatching(self):
+    """Verify that a file failing to be processed does not end watching."""
+    with Watcher([self._directory.name]) as watcher:
+      self.write("a.c", "// Copyright 2015-2013\n")
+      self.write("b.c")
+
+      with patch("deso.copyright.watch.stderr", new=StringIO()) as error:
+        results = self.watch(watcher)
+
+      self.assertEqual(results, [("b.c", Status.Changed)])
+      self.assertEqual(self.read("b.c"), "// Copyright 2013,2015\n")
+      self.assertIn("a.c", error.getvalue())
+
+
+  def testMainRejectsInvalidArguments(self):
+    """Verify that only directories can be watched and not in filter mode."""
+    self.write("a.c")
+
+    for args in (["--watch", join(self._directory.name, "a.c")],
+                 ["--watch", "--filter"]):
+      with self.assertRaises(SystemExit):
+        normalizeMain(["normalize"] + args)
+
+
+if __name__ == "__main__":
+  main()
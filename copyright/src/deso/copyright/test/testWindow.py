@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Tests for the scan window functionality."""
+
+from deso.copyright.window import (
+  BYTES,
+  headerEnd,
+  LINES,
+  readHeader,
+  ScanLimit,
+  scanLimitStringToLimit,
+)
+from io import (
+  BufferedReader,
+  BytesIO,
+)
+from unittest import (
+  main,
+  TestCase,
+)
+
+
+class TestWindow(TestCase):
+  """Tests for the scan window functionality."""
+  def testScanLimitParsing(self):
+    """Verify that scan limit strings are parsed correctly."""
+    self.assertEqual(scanLimitStringToLimit("50"), ScanLimit(50, LINES))
+    self.assertEqual(scanLimitStringToLimit("7l"), ScanLimit(7, LINES))
+    self.assertEqual(scanLimitStringToLimit("4096b"), ScanLimit(4096, BYTES))
+    self.assertEqual(scanLimitStringToLimit("0"), ScanLimit(0, LINES))
+
+    for string in ("", "b", "-1", "12x", "1.5"):
+      with self.assertRaises(ValueError):
+        scanLimitStringToLimit(string)
+
+
+  def testHeaderEnd(self):
+    """Test the calculation of the end of the scan window."""
+    content = "line1\nline2\nline3"
+
+    self.assertEqual(headerEnd(content), len(content))
+    self.assertEqual(headerEnd(content, ScanLimit(0)), 0)
+    self.assertEqual(headerEnd(content, ScanLimit(1)), 6)
+    self.assertEqual(headerEnd(content, ScanLimit(2)), 12)
+    self.assertEqual(headerEnd(content, ScanLimit(3)), len(content))
+    self.assertEqual(headerEnd(content, ScanLimit(5, BYTES)), 0)
+    self.assertEqual(headerEnd(content, ScanLimit(6, BYTES)), 6)
+    self.assertEqual(headerEnd(content, ScanLimit(11, BYTES)), 6)
+    self.assertEqual(headerEnd(content, ScanLimit(100, BYTES)), len(content))
+    self.assertEqual(headerEnd(content.encode(), ScanLimit(2)), 12)
+
+
+  def testReadHeader(self):
+    """Verify that reading the scan window from a file works as expected."""
+    def doTest(limit, expected, rest, complete):
+      """Read the header of a file and compare it against the expectation."""
+      data = b"line1\nline2\nline3\n"
+      file_ = BufferedReader(BytesIO(data))
+      self.assertEqual(readHeader(file_, limit), (expected, rest, complete))
+      # The file is positioned right after the data read.
+      self.assertEqual(expected + rest + file_.read(), data)
+
+    doTest(None, b"line1\nline2\nline3\n", b"", True)
+    doTest(ScanLimit(1), b"line1\n", b"", False)
+    doTest(ScanLimit(3), b"line1\nline2\nline3\n", b"", True)
+    doTest(ScanLimit(4), b"line1\nline2\nline3\n", b"", True)
+    doTest(ScanLimit(8, BYTES), b"line1\n", b"li", False)
+    doTest(ScanLimit(100, BYTES), b"line1\nline2\nline3\n", b"", True)
+    doTest(ScanLimit(18, BYTES), b"line1\nline2\nline3\n", b"", True)
+
+
+  def testReadHeaderWithoutFinalLineBreak(self):
+    """Verify that a window in bytes covering a file entirely is not cut."""
+    data = b"// Copyright 2010 Foo"
+    limit = ScanLimit(len(data), BYTES)
+    self.assertEqual(headerEnd(data, limit), len(data))
+    self.assertEqual(readHeader(BufferedReader(BytesIO(data)), limit),
+                     (data, b"", True))
+
+    # With a single byte more the last line is incomplete.
+    file_ = BufferedReader(BytesIO(data + b"\n"))
+    self.assertEqual(readHeader(file_, limit), (b"", data, False))
+
+
+  def testContinuedYears(self):
+    """Verify that windows are extended over lines continuing copyright years."""
+    def doTest(limit, expected):
+      """Check the window of some content against the expectation."""
+      data = b"# Copyright 2010,\n#\n2011 -\n\n 2012\nx\n2013\n"
+      self.assertEqual(headerEnd(data, limit), len(expected))
+      self.assertEqual(headerEnd(data.decode(), limit), len(expected))
+      file_ = BufferedReader(BytesIO(data))
+      header, rest, complete = readHeader(file_, limit)
+      self.assertEqual(header, expected)
+      self.assertFalse(complete)
+      self.assertEqual(header + rest + file_.read(), data)
+
+    # The line "#" cannot continue the years.
+    doTest(ScanLimit(1), b"# Copyright 2010,\n")
+    doTest(ScanLimit(19, BYTES), b"# Copyright 2010,\n")
+    # Neither can "x".
+    doTest(ScanLimit(3), b"# Copyright 2010,\n#\n2011 -\n\n 2012\n")
+    doTest(ScanLimit(30, BYTES), b"# Copyright 2010,\n#\n2011 -\n\n 2012\n")
+
+    # Without the copyright keyword there is nothing to continue.
+    self.assertEqual(headerEnd("2010,\n2011\n", ScanLimit(1)), 6)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,254 @@
+# walk.py
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Functionality for finding the files below a set of directories.
+
+  Directories are walked lazily, meaning that files are reported as
+  soon as they are found. Hidden files and directories are skipped, as
+  are symbolic links and everything excluded by the rules of the
+  .gitignore files encountered along the way.
+"""
+
+from os import (
+  scandir,
+)
+from os.path import (
+  isdir,
+  join,
+)
+from re import (
+  compile as regex,
+  escape,
+)
+
+
+# The name of the files containing ignore rules.
+GITIGNORE = ".gitignore"
+
+
+def _translateGlob(glob):
+  """Translate a gitignore glob into a regular expression.
+
+    The glob must not contain a leading or trailing slash any more.
+  """
+  parts = []
+  i = 0
+  n = len(glob)
+  while i < n:
+    c = glob[i]
+    if glob.startswith("**/", i) and (i == 0 or glob[i - 1] == "/"):
+      # A "**/" at the start of the glob or following a slash matches
+      # zero or more directories.
+      parts.append(r"(?:.*/)?")
+      i += 3
+      continue
+    elif glob.startswith("/**", i) and i + 3 == n:
+      # A trailing "/**" matches everything inside a directory.
+      parts.append(r"/.*")
+      i += 3
+      continue
+    elif c == "*":
+      parts.append(r"[^/]*")
+    elif c == "?":
+      parts.append(r"[^/]")
+    elif c == "[":
+      end = glob.find("]", i + 2)
+      if end < 0:
+        parts.append(escape(c))
+      else:
+        class_ = glob[i + 1:end].replace("\\", "\\\\")
+        if class_.startswith("!"):
+          class_ = "^" + class_[1:]
+        parts.append("[%s]" % class_)
+        i = end
+    elif c == "\\" and i + 1 < n:
+      i += 1
+      parts.append(escape(glob[i]))
+    else:
+      parts.append(escape(c))
+    i += 1
+
+  return "".join(parts)
+
+
+class IgnoreRule:
+  """A single rule from a .gitignore file.
+
+    A rule is matched against the path of an entry relative to the
+    directory containing the .gitignore file it stems from.
+  """
+  def __init__(self, line):
+    """Parse a line of a .gitignore file into a rule."""
+    self.negated = line.startswith("!")
+    if self.negated:
+      line = line[1:]
+
+    self.directory = line.endswith("/")
+    line = line.rstrip("/")
+
+    # A glob containing a slash anywhere but at its end is anchored at
+    # the directory of the .gitignore file. Otherwise it matches at
+    # any level below it.
+    anchored = "/" in line
+    line = line.lstrip("/")
+
+    prefix = "" if anchored else r"(?:.*/)?"
+    self._regex = regex(r"%s%s\Z" % (prefix, _translateGlob(line)))
+
+
+  def matches(self, path, is_dir):
+    """Check whether the rule matches the given relative path."""
+    if self.directory and not is_dir:
+      return False
+
+    return self._regex.match(path) is not None
+
+
+def parseIgnoreFile(lines):
+  """Parse the lines of a .gitignore file into a list of rules."""
+  rules = []
+  for line in lines:
+    line = line.rstrip("\n")
+    if line.endswith("\\ "):
+      # An escaped trailing space is kept.
+      line = line[:-2].rstrip(" ") + "\\ "
+    else:
+      line = line.rstrip(" ")
+
+    # Escaped characters such as a leading "\#" or "\!" are taken care
+    # of when translating the glob.
+    if line and not line.startswith("#"):
+      rules.append(IgnoreRule(line))
+
+  return rules
+
+
+def _loadIgnoreFile(directory):
+  """Load the rules of the .gitignore file in a directory, if any."""
+  try:
+    with open(join(directory, GITIGNORE), "r", encoding="utf-8",
+              errors="surrogateescape") as f:
+      return parseIgnoreFile(f)
+  except (FileNotFoundError, NotADirectoryError):
+    return []
+
+
+def isIgnored(rules, path, is_dir):
+  """Check whether an entry is ignored by a list of rules.
+
+    The rules are given as (base, rule) tuples, with 'base' being the
+    prefix to strip from the path to make it relative to the rule's
+    .gitignore file. Just like with git, the last matching rule wins.
+  """
+  for base, rule in reversed(rules):
+    if rule.matches(path[len(base):], is_dir):
+      return not rule.negated
+
+  return False
+
+
+def _walk(root, start, rules):
+  """Walk a directory yielding (path, rules) tuples for all entries to consider.
+
+    Each directory, including the root, is reported before its content
+    along with the ignore rules in effect inside of it. Files are
+    reported with rules being None. The paths matched against the rules
+    have the first 'start' characters stripped.
+  """
+  # We walk the tree iteratively using a stack of directories along with
+  # the ignore rules in effect for them. Entries are yielded as soon as
+  # they are encountered.
+  stack = [(root, rules)]
+  while stack:
+    directory, rules = stack.pop()
+    local = _loadIgnoreFile(directory)
+    if local:
+      base = join(directory[start:], "")
+      rules = rules + [(base, rule) for rule in local]
+
+    yield directory, rules
+
+    with scandir(directory) as entries:
+      directories = []
+      for entry in entries:
+        # Hidden entries, including .git, are never of interest.
+        if entry.name.startswith(".") or entry.is_symlink():
+          continue
+
+        is_dir = entry.is_dir(follow_symlinks=False)
+        relative = entry.path[start:]
+        if rules and isIgnored(rules, relative, is_dir):
+          continue
+
+        if is_dir:
+          directories.append(entry.path)
+        elif entry.is_file(follow_symlinks=False):
+          yield entry.path, None
+
+    # Push directories in reverse order so that they are visited in the
+    # order in which they were reported.
+    stack.extend((path, rules) for path in reversed(directories))
+
+
+def _walkDirectory(root):
+  """Walk a directory yielding the paths of all files to consider."""
+  for path, rules in _walk(root, len(join(root, "")), []):
+    if rules is None:
+      yield path
+
+
+def walkTree(root, start=None, rules=None):
+  """Find all directories and files below a directory.
+
+    The function yields (path, rules) tuples. For directories, including
+    the root itself, 'rules' are the ignore rules in effect inside the
+    directory, as understood by isIgnored, and a directory is reported
+    before any of its content. For files 'rules' is None. If the
+    directory is part of a larger tree, 'start' is the length of the
+    tree's root path (including the trailing separator) and 'rules' are
+    the ignore rules in effect in the directory's parent.
+  """
+  start = len(join(root, "")) if start is None else start
+  rules = [] if rules is None else rules
+  yield from _walk(root, start, rules)
+
+
+def walkDirectories(root, start=None, rules=None):
+  """Find all directories below a directory, including the directory itself.
+
+    The function yields (directory, rules) tuples, just like walkTree,
+    but skips all files.
+  """
+  for path, inner in walkTree(root, start, rules):
+    if inner is not None:
+      yield path, inner
+
+
+def walkFiles(paths):
+  """Find all files below a list of paths.
+
+    Paths referring to directories are walked recursively, all others
+    are yielded as they are. Only .gitignore files located in the walked
+    directories are honored, not those in any of their parents.
+  """
+  for path in paths:
+    if isdir(path):
+      yield from _walkDirectory(path)
+    else:
+      yield path
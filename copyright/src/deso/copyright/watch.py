@@ -0,0 +1,379 @@
+# watch.py
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Functionality for normalizing files as they change.
+
+  Directories are watched for changes using the inotify interface of
+  Linux. Changed files are collected until no further change happened
+  for a short while, so that a burst of changes, as caused by saving a
+  file or checking out a branch, is handled at once. Only the changed
+  files are normalized then. Memory use does not depend on the number of
+  files in the watched trees or the number of changes, only on the
+  number of directories, each of which requires a watch.
+"""
+
+from ctypes import (
+  CDLL,
+  c_char_p,
+  c_int,
+  c_uint32,
+  get_errno,
+)
+from deso.copyright.normalize import (
+  normalizeContent,
+  Normalizer,
+)
+from deso.copyright.report import (
+  FileReport,
+)
+from deso.copyright.walk import (
+  isIgnored,
+  walkTree,
+)
+from errno import (
+  ENOSYS,
+)
+from os import (
+  close,
+  fsdecode,
+  fsencode,
+  lstat,
+  read,
+  strerror,
+)
+from os.path import (
+  join,
+)
+from select import (
+  select,
+)
+from stat import (
+  S_ISREG,
+)
+from struct import (
+  Struct,
+)
+from sys import (
+  stderr,
+)
+from time import (
+  monotonic,
+)
+
+
+# Flags and event masks of the inotify interface, as defined in
+# <sys/inotify.h>.
+IN_CLOEXEC = 0o2000000
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+# The events we watch directories for. A file is considered changed
+# once it is closed after being written or when it is moved into a
+# directory, which is how many editors save files. New directories
+# need to be watched as well.
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_ONLYDIR |\
+             IN_DONT_FOLLOW | IN_EXCL_UNLINK
+# The fixed size part of an event, struct inotify_event: the watch
+# descriptor, the mask, a cookie, and the length of the name following.
+EVENT = Struct("iIII")
+# The size of the buffer events are read into. It has to be able to
+# hold at least one event with a name of the maximum length.
+EVENT_BUFFER_SIZE = 64 * 1024
+# The time in seconds without any further change after which changed
+# files are normalized.
+DEBOUNCE_DELAY = 0.1
+# The maximum time in seconds changed files are held back while changes
+# keep happening.
+MAX_DELAY = 2.0
+# The maximum number of changed files held back at any time.
+MAX_PENDING = 1024
+
+
+def _check(result, path=None):
+  """Check the result of a libc function, raising an OSError on failure."""
+  if result < 0:
+    errno = get_errno()
+    raise OSError(errno, strerror(errno), path)
+
+  return result
+
+
+class Inotify:
+  """A thin wrapper around an inotify instance of the Linux kernel."""
+  def __init__(self):
+    """Create a new inotify instance."""
+    try:
+      libc = CDLL(None, use_errno=True)
+      init = libc.inotify_init1
+      self._add_watch = libc.inotify_add_watch
+    except (AttributeError, OSError, TypeError):
+      raise OSError(ENOSYS, "inotify is not supported on this system") from None
+
+    init.argtypes = [c_int]
+    self._add_watch.argtypes = [c_int, c_char_p, c_uint32]
+    self._fd = _check(init(IN_CLOEXEC))
+
+
+  def __enter__(self):
+    """The block enter handler returning the inotify instance."""
+    return self
+
+
+  def __exit__(self, type_, value, traceback):
+    """The block exit handler closing the inotify instance."""
+    self.close()
+
+
+  def close(self):
+    """Close the inotify instance, removing all watches."""
+    if self._fd is not None:
+      close(self._fd)
+      self._fd = None
+
+
+  def fileno(self):
+    """Retrieve the file descriptor of the inotify instance."""
+    return self._fd
+
+
+  def addWatch(self, path, mask):
+    """Watch a path for the given events, returning the watch descriptor."""
+    return _check(self._add_watch(self._fd, fsencode(path), mask), path)
+
+
+  def read(self):
+    """Read the available events, blocking if there are none.
+
+      The function returns a list of (watch descriptor, mask, name)
+      tuples.
+    """
+    data = read(self._fd, EVENT_BUFFER_SIZE)
+    events = []
+    offset = 0
+    while offset < len(data):
+      wd, mask, _, length = EVENT.unpack_from(data, offset)
+      offset += EVENT.size
+      # The name is padded with NUL bytes.
+      name = data[offset:offset + length].rstrip(b"\0")
+      offset += length
+      events.append((wd, mask, fsdecode(name)))
+
+    return events
+
+
+class Watcher:
+  """A watcher reporting files changed below a set of directories.
+
+    Just as when walking directories, hidden files and directories as
+    well as those ignored by .gitignore files are skipped. Directories
+    created in the watched trees are watched as well.
+  """
+  def __init__(self, directories):
+    """Create a watcher for the given directories, watching them recursively."""
+    self._inotify = Inotify()
+    # A mapping from watch descriptors to (directory, start, rules)
+    # tuples, with 'start' and 'rules' describing how to check whether
+    # an entry of the directory is ignored.
+    self._directories = {}
+    try:
+      for directory in directories:
+        self._addTree(directory, len(join(directory, "")), [])
+    except BaseException:
+      self.close()
+      raise
+
+
+  def __enter__(self):
+    """The block enter handler returning the watcher."""
+    return self
+
+
+  def __exit__(self, type_, value, traceback):
+    """The block exit handler closing the watcher."""
+    self.close()
+
+
+  def close(self):
+    """Stop watching."""
+    self._inotify.close()
+    self._directories.clear()
+
+
+  def _addTree(self, root, start, rules, pending=None):
+    """Watch a directory and all directories below it.
+
+      If 'pending' is given, the files found in the tree are added to
+      it. Each directory is watched before its content is looked at, so
+      that no file created in the meantime is missed.
+    """
+    for path, inner in walkTree(root, start, rules):
+      if inner is None:
+        if pending is not None:
+          pending[path] = None
+        continue
+
+      wd = self._inotify.addWatch(path, WATCH_MASK)
+      self._directories[wd] = (path, start, inner)
+
+
+  def _read(self, pending):
+    """Read available events, adding the changed files to 'pending'."""
+    for wd, mask, name in self._inotify.read():
+      if mask & IN_Q_OVERFLOW:
+        print("Warning: Too many changes at once, some of them are missed",
+              file=stderr)
+        continue
+
+      entry = self._directories.get(wd)
+      if entry is None:
+        continue
+
+      if mask & IN_IGNORED:
+        # The directory was removed and so was the watch.
+        del self._directories[wd]
+        continue
+
+      directory, start, rules = entry
+      if name.startswith("."):
+        continue
+
+      path = join(directory, name)
+      is_dir = bool(mask & IN_ISDIR)
+      if rules and isIgnored(rules, path[start:], is_dir):
+        continue
+
+      if is_dir:
+        # Files may have been written to the directory before we got to
+        # watch it, so we have to consider all of them changed.
+        try:
+          self._addTree(path, start, rules, pending)
+        except (FileNotFoundError, NotADirectoryError):
+          # The directory vanished before we got to watch it.
+          pass
+      elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+        pending[path] = None
+
+
+  def batches(self, delay=DEBOUNCE_DELAY, timeout=None):
+    """Wait for changes, yielding lists of the files changed.
+
+      A list is yielded once no further change happened for 'delay'
+      seconds. While changes keep happening, it is yielded after at
+      most MAX_DELAY seconds or once it contains MAX_PENDING files. If
+      'timeout' is given, the iteration ends once no change happened
+      for that many seconds.
+    """
+    pending = {}
+    deadline = None
+    while True:
+      if pending:
+        wait = max(0.0, min(delay, deadline - monotonic()))
+      else:
+        wait = timeout
+
+      readable, _, _ = select([self._inotify], [], [], wait)
+      if readable:
+        self._read(pending)
+        if not pending:
+          continue
+
+        if deadline is None:
+          deadline = monotonic() + max(delay, MAX_DELAY)
+
+        if len(pending) < MAX_PENDING and monotonic() < deadline:
+          continue
+      elif not pending:
+        return
+
+      yield list(pending)
+      pending = {}
+      deadline = None
+
+
+def _signature(path):
+  """Retrieve a tuple identifying the state of a regular file, or None."""
+  try:
+    stat = lstat(path)
+  except (FileNotFoundError, NotADirectoryError):
+    return None
+
+  if not S_ISREG(stat.st_mode):
+    return None
+
+  return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def iterWatchFiles(watcher, normalize_fn=normalizeContent, year=None,
+                   ignore=None, limit=None, mapped=False, report=None,
+                   delay=DEBOUNCE_DELAY, timeout=None, plausible=None):
+  """Normalize the copyright headers of files as they are changed.
+
+    The function returns an iterator over (file, status) tuples for the
+    files reported by the given Watcher, produced as soon as a file has
+    been processed. Changes caused by the normalization itself are
+    recognized and do not cause files to be processed again. Files that
+    cannot be processed are reported on stderr and skipped. See
+    Watcher.batches for a description of 'delay' and 'timeout' and
+    iterNormalizeFiles for the remaining parameters.
+  """
+  # Prepare the normalization only once for all files.
+  normalizer = Normalizer(normalize_fn, year, ignore, plausible)
+  # The signatures of processed files whose own change event has not
+  # been seen yet. Such an event may be reported in any of the following
+  # batches, and a file still having the signature it had after being
+  # processed has not been changed by anybody else since.
+  processed = {}
+
+  for files in watcher.batches(delay, timeout):
+    for file_ in files:
+      signature = _signature(file_)
+      if processed.pop(file_, None) == signature or signature is None:
+        continue
+
+      file_report = FileReport(file_) if report is not None else None
+      try:
+        status = normalizer.normalizeFile(file_, limit=limit, mapped=mapped,
+                                          report=file_report)
+      except FileNotFoundError:
+        continue
+      except Exception as e:
+        # A single file that cannot be processed must not end watching.
+        print("Error: Failed to process file %s: \"%s\"" % (file_, e),
+              file=stderr)
+        status = None
+
+      # Even a failed attempt may have opened the file for writing,
+      # causing an event of its own.
+      signature = _signature(file_)
+      if signature is not None:
+        processed[file_] = signature
+
+      if status is None:
+        continue
+
+      if report is not None:
+        report.write(file_report)
+
+      yield file_, status
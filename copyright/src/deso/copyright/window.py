@@ -0,0 +1,263 @@
+# window.py
+
+#/***************************************************************************
+# *   Copyright (C) 2026 Daniel Mueller (deso@posteo.net)                   *
+# *                                                                         *
+# *   This program is free software: you can redistribute it and/or modify  *
+# *   it under the terms of the GNU General Public License as published by  *
+# *   the Free Software Foundation, either version 3 of the License, or     *
+# *   (at your option) any later version.                                   *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU General Public License for more details.                          *
+# *                                                                         *
+# *   You should have received a copy of the GNU General Public License     *
+# *   along with this program.  If not, see <http://www.gnu.org/licenses/>. *
+# ***************************************************************************/
+
+"""Functionality for restricting the scan for copyright headers to a window.
+
+  Copyright headers are typically located at the very beginning of a
+  file. By restricting the search to the first lines or bytes of a file
+  the cost of processing it becomes independent of its size.
+"""
+
+from collections import (
+  namedtuple,
+)
+from deso.copyright.range import (
+  YEAR_SEPARATOR,
+)
+from deso.copyright.ranges import (
+  RANGES_SEPARATOR,
+)
+from functools import (
+  lru_cache,
+)
+from re import (
+  compile as regex,
+)
+
+
+# The unit representing a limit in terms of lines.
+LINES = "lines"
+# The unit representing a limit in terms of bytes.
+BYTES = "bytes"
+# A mapping from unit suffixes as accepted in scan limit strings to the
+# actual units.
+SUFFIX_TO_UNIT_MAP = {
+  "": LINES,
+  "l": LINES,
+  "b": BYTES,
+}
+SCAN_LIMIT_R = r"^([0-9]+)([a-z]*)$"
+# The copyright keyword, in lower case.
+KEYWORD = "copyright"
+# The characters copyright years may end or continue with.
+YEAR_CHARS = "0123456789" + YEAR_SEPARATOR + RANGES_SEPARATOR
+YEAR_CHARS_BYTES = YEAR_CHARS.encode("ascii")
+
+
+class ScanLimit(namedtuple("ScanLimit", ["count", "unit"])):
+  """A class representing the size of a scan window.
+
+    A scan limit is a tuple (count, unit) describing the window at the
+    start of a file that is searched for copyright headers. The unit is
+    either LINES or BYTES. Only complete lines are ever part of a
+    window, i.e., a limit in bytes is rounded down to the last line
+    break contained in the window.
+  """
+  def __new__(cls, count, unit=LINES):
+    """Create a new instance of ScanLimit."""
+    if count < 0:
+      raise ValueError("Scan limit must not be negative: %d" % count)
+
+    if unit not in (LINES, BYTES):
+      raise ValueError("Unsupported scan limit unit: \"%s\"" % unit)
+
+    return tuple.__new__(cls, (count, unit))
+
+
+  def __str__(self):
+    """Convert a scan limit into a string."""
+    return "%d %s" % (self.count, self.unit)
+
+
+def scanLimitStringToLimit(string, ErrorType=ValueError):
+  """Convert a string such as '50' (lines) or '4096b' (bytes) into a ScanLimit."""
+  m = regex(SCAN_LIMIT_R).match(string.strip().lower())
+  if m is None or m.group(2) not in SUFFIX_TO_UNIT_MAP:
+    error = "Invalid scan limit: \"{limit}\". Expected a number of lines "\
+            "(e.g., \"50\") or bytes (e.g., \"4096b\")"
+    raise ErrorType(error.format(limit=string))
+
+  count, suffix = m.groups()
+  return ScanLimit(int(count), SUFFIX_TO_UNIT_MAP[suffix])
+
+
+def _yearChars(data):
+  """Retrieve the characters copyright years consist of, as str or bytes."""
+  return YEAR_CHARS if isinstance(data, str) else YEAR_CHARS_BYTES
+
+
+def isContinuation(line):
+  """Check whether a line could continue copyright years on the line before it."""
+  line = line.lstrip()
+  return not line or line[:1] in _yearChars(line)
+
+
+def _isOpen(data, open_=True):
+  """Check whether copyright years at the end of some data could continue.
+
+    Data consisting of whitespace only leave the given state unchanged.
+  """
+  data = data.rstrip()
+  return data[-1:] in _yearChars(data) if data else open_
+
+
+def _mayContinue(window):
+  """Check whether a window may end with copyright years continuing after it."""
+  keyword = KEYWORD if isinstance(window, str) else KEYWORD.encode("ascii")
+  return _isOpen(window, False) and keyword in window.lower()
+
+
+@lru_cache(maxsize=None)
+def _newlineRegex(text):
+  """Retrieve a regular expression finding line breaks in str or bytes-like objects."""
+  # The regular expressions are compiled on first use only, as loading
+  # this module is part of the start up of the pre-commit hook.
+  return regex("\n" if text else b"\n")
+
+
+def _windowEnd(content, limit):
+  """Find the index at which the scan window ends, not considering continuations."""
+  text = isinstance(content, str)
+  if limit.unit == LINES:
+    # Note that we use a regular expression for finding line breaks,
+    # because not all bytes-like objects provide a find method.
+    newline_re = _newlineRegex(text)
+    end = 0
+    for _ in range(limit.count):
+      match = newline_re.search(content, end)
+      if match is None:
+        return len(content)
+
+      end = match.end()
+
+    return end
+  else:
+    if len(content) <= limit.count:
+      return len(content)
+
+    # Only consider complete lines. A copyright header cut in half could
+    # otherwise be "normalized" to something with a different meaning.
+    window = content[:limit.count]
+    if text:
+      return window.rfind("\n") + 1
+    else:
+      return bytes(window).rfind(b"\n") + 1
+
+
+def headerEnd(content, limit=None):
+  """Find the index at which the scan window for the given content ends.
+
+    The content may be a str or any bytes-like object. The window is
+    extended over the lines following it that could continue copyright
+    years at its end. A header cut in half could otherwise be
+    "normalized" to something with a different meaning.
+  """
+  if limit is None:
+    return len(content)
+
+  end = _windowEnd(content, limit)
+  if end >= len(content):
+    return end
+
+  text = isinstance(content, str)
+  window = content[:end] if text else bytes(content[:end])
+  if not _mayContinue(window):
+    return end
+
+  newline_re = _newlineRegex(text)
+  open_ = True
+  while open_ and end < len(content):
+    match = newline_re.search(content, end)
+    next_ = len(content) if match is None else match.end()
+    line = content[end:next_] if text else bytes(content[end:next_])
+    if not isContinuation(line):
+      break
+
+    end = next_
+    open_ = _isOpen(line, open_)
+
+  return end
+
+
+def _readContinuation(file_, header, rest):
+  """Extend a window read from a file over lines that could continue years in it.
+
+    The function returns the extended window along with the data read
+    beyond it.
+  """
+  open_ = True
+  while open_:
+    end = rest.find(b"\n") + 1
+    if not end:
+      rest += file_.readline()
+      end = rest.find(b"\n") + 1 or len(rest)
+
+    line = rest[:end]
+    if not line or not isContinuation(line):
+      break
+
+    header += line
+    rest = rest[end:]
+    open_ = _isOpen(line, open_)
+
+  return header, rest
+
+
+def readHeader(file_, limit=None):
+  """Read the scan window from a file object opened in buffered binary mode.
+
+    The function returns a tuple of the data in the window, the data
+    read beyond the window, and a boolean indicating whether the data
+    represent the file's entire content. The file is positioned right
+    after the data read. Just as with headerEnd, the window is extended
+    over lines continuing copyright years at its end, which requires
+    reading beyond it. With a limit in bytes, the window is rounded
+    down to the last complete line, which does as well.
+  """
+  if limit is None:
+    return file_.read(), b"", True
+
+  if limit.unit == LINES:
+    lines = []
+    for _ in range(limit.count):
+      line = file_.readline()
+      if not line:
+        return b"".join(lines), b"", True
+
+      lines.append(line)
+
+    header = b"".join(lines)
+    rest = b""
+  else:
+    data = file_.read(limit.count)
+    if len(data) < limit.count or not file_.peek(1):
+      # The window covers the entire file, with its last line being
+      # complete even if it does not end in a line break.
+      return data, b"", True
+
+    # The data fill the window entirely, but we only consider complete
+    # lines.
+    end = data.rfind(b"\n") + 1
+    header = data[:end]
+    rest = data[end:]
+
+  if _mayContinue(header):
+    header, rest = _readContinuation(file_, header, rest)
+
+  return header, rest, not rest and not file_.peek(1)
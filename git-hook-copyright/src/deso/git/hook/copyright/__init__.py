@@ -1,7 +1,7 @@
 # __init__.py
 
 #/***************************************************************************
-# *   Copyright (C) 2015,2017 Daniel Mueller (deso@posteo.net)              *
+# *   Copyright (C) 2015,2017,2026 Daniel Mueller (deso@posteo.net)         *
 # *                                                                         *
 # *   This program is free software: you can redistribute it and/or modify  *
 # *   it under the terms of the GNU General Public License as published by  *
@@ -37,6 +37,24 @@ KEY_POLICY = "policy"
 # The key identifying the property defining whether a copyright header
 # is required to exist or not.
 KEY_COPYRIGHT_REQUIRED = "copyright-required"
+# The key specifying the number of lines at the start of a file that
+# are searched for copyright headers.
+KEY_SCAN_LINES = "scan-lines"
+# The key specifying whether the outcome of normalizing staged blobs is
+# cached across invocations of the hook.
+KEY_CACHE = "cache"
+# The key specifying whether statistics about the processed files are
+# printed.
+KEY_STATS = "stats"
+# The key specifying the path to a file a report about each processed
+# file is appended to.
+KEY_REPORT = "report"
+
+# The environment variable enabling the profiling of the hook.
+ENV_PROFILE = "COPYRIGHT_PROFILE"
+# The environment variable specifying a file to dump cProfile statistics
+# about the hook to.
+ENV_PROFILE_DUMP = "COPYRIGHT_PROFILE_DUMP"
 
 
 class Action(Enum):
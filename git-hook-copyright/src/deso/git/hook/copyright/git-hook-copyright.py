@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 
 #/***************************************************************************
-# *   Copyright (C) 2015,2017-2018 Daniel Mueller (deso@posteo.net)         *
+# *   Copyright (C) 2015,2017-2018,2026 Daniel Mueller (deso@posteo.net)    *
 # *                                                                         *
 # *   This program is free software: you can redistribute it and/or modify  *
 # *   it under the terms of the GNU General Public License as published by  *
@@ -19,49 +19,97 @@
 
 """A pre-commit hook normalizing the copyright year strings of all to-be-committed files."""
 
-from datetime import (
-  datetime,
+from collections import (
+  Counter,
+)
+from contextlib import (
+  nullcontext,
 )
 from deso.copyright import (
+  IgnoreSet,
+  isBinary,
   normalizeContent,
+  Normalizer,
   policyStringToFunction,
+  ScanLimit,
+  sniffBinary,
+  Status,
+)
+from deso.copyright.normalize import (
+  formatStatistics,
+  normalizerFingerprint,
+)
+from deso.copyright.profiler import (
+  Profiler,
+)
+from deso.copyright.report import (
+  FileReport,
+  measure,
+  ReportWriter,
 )
 from deso.copyright.util import (
   listToEnglishEnumeration,
   stringToBool,
 )
+from deso.copyright.window import (
+  readHeader,
+)
 from deso.execute import (
   execute,
   findCommand,
+  formatCommands,
   ProcessError,
 )
 from deso.git.hook.copyright import (
   Action,
+  ENV_PROFILE,
+  ENV_PROFILE_DUMP,
   KEY_ACTION,
+  KEY_CACHE,
   KEY_COPYRIGHT_REQUIRED,
   KEY_IGNORE,
   KEY_POLICY,
+  KEY_REPORT,
+  KEY_SCAN_LINES,
+  KEY_STATS,
   SECTION,
 )
+from functools import (
+  lru_cache,
+)
+from os import (
+  environ,
+)
 from os.path import (
+  abspath,
   basename,
   isdir,
   islink,
+  join,
 )
 from sys import (
   exit as exit_,
   stderr,
 )
-from tempfile import (
-  NamedTemporaryFile,
-)
-from traceback import (
-  print_exc,
+from time import (
+  localtime,
 )
 
 
-# The command for invoking git.
-GIT = findCommand("git")
+# The profiler recording the time spent in the individual phases of the
+# hook. It is enabled by setting the COPYRIGHT_PROFILE environment
+# variable. COPYRIGHT_PROFILE_DUMP may specify a file to dump cProfile
+# statistics to.
+PROFILER = Profiler(enabled=bool(environ.get(ENV_PROFILE)),
+                    dump=environ.get(ENV_PROFILE_DUMP) or None)
+# The name of the file in git's common directory caching the outcome of
+# normalizing staged blobs.
+CACHE_FILE = "copyright-cache"
+# The maximum number of blobs remembered in the cache. The cache file is
+# read on every invocation of the hook, so it has to be kept small. A
+# few thousand entries cover the blobs of the commits being worked on,
+# which is what the cache is about.
+CACHE_CAPACITY = 4 * 1024
 
 
 # A dictionary for converting action strings into the proper action
@@ -73,6 +121,12 @@ STRING_TO_ACTION_MAP = {
 }
 
 
+@lru_cache(maxsize=None)
+def git():
+  """Retrieve the path to the git command, looking it up on first use."""
+  return findCommand("git")
+
+
 def stringToAction(string):
   """Convert a string into an action type."""
   if not string in STRING_TO_ACTION_MAP:
@@ -84,19 +138,29 @@ def stringToAction(string):
   return STRING_TO_ACTION_MAP[string]
 
 
-def changedFiles():
-  """Retrieve a list of changed files."""
+@PROFILER.profiled("stagedFiles")
+def stagedFiles():
+  """Retrieve a list of (path, mode, blob) tuples for the changed files."""
   # We only care for Added (A) and Modified (M) files.
-  cmd = [GIT, "diff", "--staged", "--name-only", "--diff-filter=AM", "--no-color", "--no-prefix"]
+  cmd = [git(), "diff", "--staged", "--raw", "-z", "--no-abbrev", "--diff-filter=AM", "--no-color"]
   out, _ = execute(*cmd, stdout=b"")
-  return out.decode("utf-8").splitlines()
+  # The output consists of NUL terminated pairs of a line of the form
+  # ":<old mode> <new mode> <old blob> <new blob> <status>" and a path.
+  fields = out.decode("utf-8").split("\0")
+  files = []
+  for info, path in zip(fields[0:-1:2], fields[1::2]):
+    _, mode, _, blob, _ = info.split(" ")
+    files.append((path, mode, blob))
 
+  return files
 
+
+@PROFILER.profiled("config")
 def retrieveConfigValue(key, *args):
   """Retrieve a git configuration value associated with a key."""
   try:
     name = "%s.%s" % (SECTION, key)
-    cmd = [GIT, "config", "--null"] + list(args) + [name]
+    cmd = [git(), "config", "--null"] + list(args) + [name]
     out, _ = execute(*cmd, stdout=b"")
     # The output is guaranteed to be terminated by a NUL byte. We want
     # to discard that.
@@ -117,12 +181,12 @@ def retrieveActionType():
 
 
 def retrieveIgnoreList():
-  """Retrieve the list of patterns to ignore."""
+  """Retrieve the set of patterns to ignore, compiled and ready for use."""
   ignore = retrieveConfigValue(KEY_IGNORE, "--get-all")
   if ignore is None:
     return None
 
-  return ignore.split("\0")
+  return IgnoreSet(ignore.split("\0"))
 
 
 def retrieveNormalizationFunction():
@@ -144,18 +208,107 @@ def copyrightHeaderMustExist():
   return stringToBool(required)
 
 
-def stagedFileContent(path):
-  """Retrieve the file content of a file in a git repository including any staged changes."""
-  out, _ = execute(GIT, "cat-file", "--textconv", ":%s" % path, stdout=b"")
-  return out.decode("utf-8")
+def retrieveScanLimit():
+  """Retrieve the number of lines at the start of a file to search for copyright headers."""
+  lines = retrieveConfigValue(KEY_SCAN_LINES, "--int")
+  if lines is None:
+    # By default files are searched in their entirety.
+    return None
+
+  return ScanLimit(int(lines))
+
+
+def printStatistics():
+  """Check whether statistics about the processed files are to be printed."""
+  stats = retrieveConfigValue(KEY_STATS, "--bool")
+  if stats is None:
+    return False
+
+  return stringToBool(stats)
 
 
+def retrieveReportPath():
+  """Retrieve the path of the file to append a report about the processed files to, if any."""
+  return retrieveConfigValue(KEY_REPORT, "--path")
+
+
+def retrieveCache(normalizer, limit):
+  """Retrieve the cache for the outcome of normalizing staged blobs, if enabled.
+
+    The cache is stored in git's common directory, meaning that it is
+    shared among all worktrees of a repository. It is only used if
+    enabled explicitly, as it leaves files behind in that directory.
+  """
+  enabled = retrieveConfigValue(KEY_CACHE, "--bool")
+  if enabled is None or not stringToBool(enabled):
+    return None
+
+  # The cache is disabled by default, so we only import the module if
+  # enabled.
+  from deso.copyright.cache import (
+    Cache,
+  )
+
+  out, _ = execute(git(), "rev-parse", "--git-common-dir", stdout=b"")
+  path = join(abspath(out.decode("utf-8").rstrip("\n")), CACHE_FILE)
+  settings = normalizerFingerprint(normalizer, limit)
+  return Cache(path, settings, capacity=CACHE_CAPACITY)
+
+
+@PROFILER.profiled("stagedFileContent")
+def stagedFileContent(path):
+  """Retrieve the file content of a file in a git repository including any staged changes."""
+  out, _ = execute(git(), "cat-file", "--textconv", ":%s" % path, stdout=b"")
+  return out
+
+
+@PROFILER.profiled("stagedFileContent")
+def stagedFileHeader(path, limit):
+  """Retrieve the scan window of a file's content including any staged changes.
+
+    The function returns a tuple of the data read and a boolean
+    indicating whether the data represent the entire content. Only as
+    much of the content as required is read from git. If the beginning
+    of the content reveals it to be binary, None is returned without
+    reading any further.
+  """
+  # We may need to stop reading the output early, something our execute
+  # functionality does not support. Hence, we resort to a plain Popen
+  # object here. The subprocess module and everything it pulls in is
+  # only needed once a file actually has to be read, though.
+  from subprocess import (
+    PIPE,
+    Popen,
+  )
+
+  cmd = [git(), "cat-file", "--textconv", ":%s" % path]
+  with Popen(cmd, stdout=PIPE, stderr=PIPE) as process:
+    if sniffBinary(process.stdout):
+      process.kill()
+      return None
+
+    header, _, complete = readHeader(process.stdout, limit)
+    if not complete:
+      # We are not interested in the remainder of the content. Terminate
+      # git instead of having it produce data nobody is going to read.
+      process.kill()
+      return header, False
+
+    _, err = process.communicate()
+    if process.returncode != 0:
+      raise ProcessError(process.returncode, formatCommands([cmd]),
+                         err.decode("utf-8"))
+
+  return header, True
+
+
+@PROFILER.profiled("stagedChangesRevertFileContent")
 def stagedChangesRevertFileContent(path):
   """Check whether the staged changes revert the changes of the HEAD commit for the given file."""
   try:
     # By using the --exit-code option git will return 1 in case the diff
     # is not empty and 0 if it is.
-    execute(GIT, "diff", "--staged", "--quiet", "--exit-code", "HEAD^", path)
+    execute(git(), "diff", "--staged", "--quiet", "--exit-code", "HEAD^", path)
     # If the git invocation succeeded the diff was empty and the
     # currently staged changes for the given file revert the ones made
     # in the HEAD commit.
@@ -167,13 +320,59 @@ def stagedChangesRevertFileContent(path):
     return False
 
 
+@PROFILER.profiled("stageFile")
 def stageFile(path):
-  """Stage a file in git."""
-  execute(GIT, "add", path)
+  """Stage a file in git and retrieve the blob it got staged as."""
+  execute(git(), "add", path)
+  out, _ = execute(git(), "rev-parse", ":%s" % path, stdout=b"")
+  return out.decode("utf-8").strip()
+
+
+@PROFILER.profiled("stageFile")
+def blobExists(blob):
+  """Check whether a blob exists in the object database."""
+  try:
+    execute(git(), "cat-file", "-e", blob)
+  except ProcessError:
+    return False
+
+  return True
+
+
+def stageBlob(path, mode, blob):
+  """Stage an existing blob as the new content of a file."""
+  execute(git(), "update-index", "--cacheinfo", "%s,%s,%s" % (mode, blob, path))
 
 
-def normalizeStagedFile(path, normalize_fn, year, action, ignore=None):
-  """Normalize a file in a git repository staged for commit."""
+def reportUnnormalized(path, action):
+  """Report a file with copyright years that are not normalized, if requested."""
+  if action == Action.Check or action == Action.Warn:
+    print("Copyright years in %s are not properly normalized" % path,
+          file=stderr)
+    if action == Action.Check:
+      exit_(1)
+
+
+def normalizeWorkingFile(path, normalizer, limit=None):
+  """Normalize a file in the working tree."""
+  with open(path, "rb+") as file_git:
+    original_content = file_git.read()
+    with PROFILER.phase("normalize"):
+      content, _ = normalizer.normalizeData(original_content, limit=limit)
+    if content is not original_content:
+      file_git.seek(0)
+      file_git.write(content)
+      file_git.truncate()
+
+
+def normalizeStagedFile(path, normalizer, action, limit=None, report=None):
+  """Normalize a file in a git repository staged for commit.
+
+    The function returns a tuple of the number of copyright headers
+    found and the blob the normalized content got staged as, which is
+    None if nothing changed. If the file is a binary file and was not
+    looked at, None is returned instead.
+  """
   # The procedure for normalizing an already staged file is not as
   # trivial as it might seem at first glance. Things get complicated
   # when considering that only parts of the changes to a file might be
@@ -186,53 +385,152 @@ def normalizeStagedFile(path, normalize_fn, year, action, ignore=None):
   # original content (including any unstaged changes), normalize it as
   # well, and write that into the original file.
 
-  # We use a temporary file for backing up the original content of the
-  # file we work on in the git repository. We could keep the content
-  # in memory only, but as a safety measure (in case Python crashes in
-  # which case proper exception handling does not help) it might be
-  # worthwhile to have it on disk (well, in a file; it could just reside
-  # in a ramdisk, but that really is out of our control and not that
-  # important).
-  # Note that we open all files in text mode (as opposed to binary
-  # mode). That is because we only want to work on text files. If a
-  # binary file is committed we will get some sort of decoding error and
-  # bail out.
-  with NamedTemporaryFile(mode="w", prefix=basename(path)) as file_tmp:
-    staged_content = stagedFileContent(path)
-    normalized_content, found = normalize_fn(staged_content, year=year,
-                                             ignore=ignore)
-
-    # In many cases we expect the normalization to cause no change to
-    # the content. We essentially special-case for that expectation and
-    # only cause additional I/O if something truly changed.
-    if found > 0 and normalized_content != staged_content:
-      if action == Action.Check or action == Action.Warn:
-        print("Copyright years in %s are not properly normalized" % path,
-              file=stderr)
-        if action == Action.Check:
-          exit_(1)
-
-      # We need to copy the file of interest from the git repository
-      # into some other location.
-      with open(path, "r+") as file_git:
-        original_content = file_git.read()
-        file_tmp.write(original_content)
-        file_git.seek(0)
-        file_git.write(normalized_content)
-        file_git.truncate()
-
-      # Stage the normalized file. It is now in the state we want it to
-      # be committed.
-      stageFile(file_git.name)
-
-      with open(path, "w") as file_git:
-        # Last we need to write back the original content. However, we
-        # normalize it as well.
-        content, _ = normalize_fn(original_content, year=year, ignore=ignore)
-        file_git.write(content)
-        file_git.truncate()
-
-    return found
+  # Note that we work on binary data throughout and never decode the
+  # content. That way files in encodings other than UTF-8 are supported
+  # and they are written back exactly as they were, except for the
+  # copyright years. We only want to work on text files, though, and
+  # binary files are skipped.
+  with measure(report, "read"):
+    result = stagedFileHeader(path, limit)
+    if result is None:
+      return None
+
+    staged_header, complete = result
+    if report is not None:
+      report.bytes_read = len(staged_header)
+
+    if isBinary(staged_header):
+      return None
+
+  with measure(report, "normalize"), PROFILER.phase("normalize"):
+    normalized_header, found = normalizer.normalizeData(staged_header)
+
+  # In many cases we expect the normalization to cause no change to
+  # the content. We essentially special-case for that expectation and
+  # only cause additional I/O if something truly changed.
+  if normalized_header is staged_header:
+    return found, None
+
+  reportUnnormalized(path, action)
+  with measure(report, "read"):
+    if complete:
+      normalized_content = normalized_header
+    else:
+      # We only got to see the beginning of the file. Now that we know
+      # that we have to change it, retrieve the full content.
+      staged_content = stagedFileContent(path)
+      normalized_content = normalized_header + staged_content[len(staged_header):]
+      if report is not None:
+        report.bytes_read = len(staged_content)
+
+  with measure(report, "write"):
+    # We use a temporary file for backing up the original content of the
+    # file we work on in the git repository. We could keep the content
+    # in memory only, but as a safety measure (in case Python crashes in
+    # which case proper exception handling does not help) it might be
+    # worthwhile to have it on disk (well, in a file; it could just reside
+    # in a ramdisk, but that really is out of our control and not that
+    # important).
+    # The temporary file is only needed in the rare case of a change, so
+    # we import the module lazily.
+    from tempfile import (
+      NamedTemporaryFile,
+    )
+
+    # We need to copy the file of interest from the git repository
+    # into some other location.
+    with NamedTemporaryFile(prefix=basename(path)) as file_tmp, \
+         open(path, "rb+") as file_git:
+      original_content = file_git.read()
+      file_tmp.write(original_content)
+      file_git.seek(0)
+      file_git.write(normalized_content)
+      file_git.truncate()
+
+    # Stage the normalized file. It is now in the state we want it to
+    # be committed.
+    blob = stageFile(file_git.name)
+
+    with open(path, "wb") as file_git:
+      # Last we need to write back the original content. However, we
+      # normalize it as well.
+      with PROFILER.phase("normalize"):
+        content, _ = normalizer.normalizeData(original_content, limit=limit)
+      file_git.write(content)
+      file_git.truncate()
+
+  return found, blob
+
+
+def normalizeStagedBlob(path, mode, blob, normalizer, action, limit=None,
+                        cache=None, report=None):
+  """Normalize a file staged for commit, using the outcome cached for its blob.
+
+    The function returns a tuple of a Status value describing the
+    outcome and the number of copyright headers found.
+  """
+  if cache is None:
+    result = normalizeStagedFile(path, normalizer, action, limit=limit,
+                                 report=report)
+    return stagedFileStatus(result)
+
+  # An entry is one of "binary", "unchanged <found>", or "changed
+  # <found> <blob>", the latter referencing the blob the normalized
+  # content got staged as.
+  entry = cache.get(blob)
+  if entry is not None:
+    if report is not None:
+      report.cached = True
+
+    outcome, *values = entry.split(" ")
+    if outcome == "binary":
+      return Status.Binary, 0
+    elif outcome == "unchanged":
+      found = int(values[0])
+      return Status.Unchanged if found > 0 else Status.NoHeader, found
+
+    found, normalized_blob = int(values[0]), values[1]
+    # The normalized blob no longer exists if it got garbage collected.
+    # We then normalize the file from scratch, which reports it as well.
+    if blobExists(normalized_blob):
+      reportUnnormalized(path, action)
+      with measure(report, "write"):
+        stageBlob(path, mode, normalized_blob)
+        normalizeWorkingFile(path, normalizer, limit=limit)
+      return Status.Changed, found
+
+    if report is not None:
+      report.cached = False
+
+  result = normalizeStagedFile(path, normalizer, action, limit=limit,
+                               report=report)
+  if result is None:
+    cache.set(blob, "binary")
+  else:
+    found, normalized_blob = result
+    if normalized_blob is None:
+      cache.set(blob, "unchanged %d" % found)
+    else:
+      cache.set(blob, "changed %d %s" % (found, normalized_blob))
+      # The normalized content is likely to be staged again, e.g., when
+      # amending the commit.
+      cache.set(normalized_blob, "unchanged %d" % found)
+
+  return stagedFileStatus(result)
+
+
+def stagedFileStatus(result):
+  """Convert the result of normalizeStagedFile into a (status, found) tuple."""
+  if result is None:
+    return Status.Binary, 0
+
+  found, normalized_blob = result
+  if normalized_blob is not None:
+    return Status.Changed, found
+  elif found > 0:
+    return Status.Unchanged, found
+  else:
+    return Status.NoHeader, found
 
 
 def isValidFile(path):
@@ -246,17 +544,20 @@ def isValidFile(path):
          not basename(path).startswith(".")
 
 
-def main():
-  """Find all files to commit and normalize them before the commit takes place."""
-  action = retrieveActionType()
-  ignore = retrieveIgnoreList()
-  normalize_fn = retrieveNormalizationFunction()
-  required = copyrightHeaderMustExist()
-  # We always want to extend the copyright year range with the current
-  # year.
-  year = datetime.now().year
+def normalizeStagedFiles(normalizer, action, required, limit=None, cache=None,
+                         report=None):
+  """Normalize all files staged for commit.
+
+    The function returns a Counter mapping each Status to the number of
+    files for which it was the outcome. If 'report' is given, it has to
+    be an object such as a ReportWriter, which receives a FileReport for
+    each file processed.
+  """
+  stats = Counter()
+  for file_git_path, mode, blob in stagedFiles():
+    if not isValidFile(file_git_path):
+      continue
 
-  for file_git_path in filter(isValidFile, changedFiles()):
     # When amending commits it is possible that all changes to a file
     # are reverted. In this case we want to omit this file from
     # normalization because we effectively made no changes to the file
@@ -267,25 +568,65 @@ def main():
       continue
 
     try:
-      found = normalizeStagedFile(file_git_path, normalize_fn, year,
-                                  action, ignore=ignore)
+      file_report = FileReport(file_git_path) if report is not None else None
+      status, found = normalizeStagedBlob(file_git_path, mode, blob,
+                                          normalizer, action, limit=limit,
+                                          cache=cache, report=file_report)
+      stats[status] += 1
+      if file_report is not None:
+        file_report.status = status
+        file_report.found = found
+        report.write(file_report)
+      if status == Status.Binary:
+        # Binary files are something we simply cannot handle properly.
+        # We want to ignore those files silently.
+        continue
+
       # If a copyright header is required but we did not find one we
       # signal that to the user and abort.
       if required and found <= 0:
         print("Error: No copyright header found in %s" % file_git_path,
               file=stderr)
         exit_(1)
-    except UnicodeDecodeError:
-      # We may get a decode error in case of a binary file that we
-      # simply cannot handle properly. We want to ignore those files
-      # silently.
-      pass
     except Exception as e:
       print("The copyright pre-commit hook encountered an error while "
             "processing file %s: \"%s\"" % (file_git_path, e), file=stderr)
+      # Only import the traceback module when actually needed.
+      from traceback import (
+        print_exc,
+      )
+
       print_exc(file=stderr)
       exit_(1)
 
+  return stats
+
+
+def main():
+  """Find all files to commit and normalize them before the commit takes place."""
+  action = retrieveActionType()
+  ignore = retrieveIgnoreList()
+  normalize_fn = retrieveNormalizationFunction()
+  required = copyrightHeaderMustExist()
+  limit = retrieveScanLimit()
+  # We always want to extend the copyright year range with the current
+  # year.
+  year = localtime().tm_year
+  # The normalization is prepared once and used for all staged files.
+  normalizer = Normalizer(normalize_fn, year, ignore)
+  cache = retrieveCache(normalizer, limit)
+  path = retrieveReportPath()
+
+  with cache if cache is not None else nullcontext(),\
+       open(path, "a") if path is not None else nullcontext() as f:
+    report = ReportWriter(f) if f is not None else None
+    stats = normalizeStagedFiles(normalizer, action, required, limit=limit,
+                                 cache=cache, report=report)
+
+  if printStatistics():
+    print(formatStatistics(stats), file=stderr)
+
 
 if __name__ == "__main__":
-  main()
+  with PROFILER:
+    main()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 
 #/***************************************************************************
-# *   Copyright (C) 2015,2017-2018 Daniel Mueller (deso@posteo.net)         *
+# *   Copyright (C) 2015,2017-2018,2026 Daniel Mueller (deso@posteo.net)    *
 # *                                                                         *
 # *   This program is free software: you can redistribute it and/or modify  *
 # *   it under the terms of the GNU General Public License as published by  *
@@ -28,10 +28,15 @@ from deso.execute import (
 )
 from deso.git.hook.copyright import (
   Action,
+  ENV_PROFILE,
   KEY_ACTION,
+  KEY_CACHE,
   KEY_COPYRIGHT_REQUIRED,
   KEY_IGNORE,
   KEY_POLICY,
+  KEY_REPORT,
+  KEY_SCAN_LINES,
+  KEY_STATS,
   SECTION,
 )
 from deso.git.repo import (
@@ -41,17 +46,34 @@ from deso.git.repo import (
   Repository,
   write,
 )
+from json import (
+  loads,
+)
 from os import (
   chmod,
+  environ,
   symlink,
+  unlink,
 )
 from os.path import (
   dirname,
+  exists,
   join,
 )
 from shutil import (
   copyfile,
 )
+from subprocess import (
+  check_output,
+  DEVNULL,
+  STDOUT,
+)
+from sys import (
+  executable,
+)
+from tempfile import (
+  TemporaryDirectory,
+)
 from unittest import (
   main,
   TestCase,
@@ -60,6 +82,29 @@ from unittest import (
 
 GIT = findCommand("git")
 YEAR = datetime.now().year
+HOOK = join(dirname(__file__), "..", "git-hook-copyright.py")
+# The maximum time in microseconds loading the hook may spend importing
+# modules, as reported by -X importtime.
+IMPORT_TIME_BUDGET = 15000
+
+
+def importTimes(output):
+  """Retrieve the cumulative import times of all top level modules.
+
+    'output' is the output of the interpreter run with -X importtime.
+    Modules imported by other modules are accounted for in the
+    cumulative time of the importing one and hence skipped.
+  """
+  times = {}
+  for line in output.decode("utf-8").splitlines():
+    if not line.startswith("import time:"):
+      continue
+
+    _, cumulative, name = line.split("|")
+    if cumulative.strip().isdigit() and not name.startswith("  "):
+      times[name.strip()] = int(cumulative)
+
+  return times
 
 
 class GitRepository(PathMixin, PythonMixin, Repository):
@@ -77,9 +122,8 @@ class GitRepository(PathMixin, PythonMixin, Repository):
     # TODO: Using a relative path based on this file might break once we
     #       install things properly, in which case the pre-commit script
     #       could reside somewhere else.
-    src = join(dirname(__file__), "..", "git-hook-copyright.py")
     dst = self.path(".git", "hooks", "pre-commit")
-    copyfile(src, dst)
+    copyfile(HOOK, dst)
     # The hook script is required to be executable.
     chmod(dst, 0o755)
 
@@ -171,6 +215,73 @@ class TestGitHook(TestCase):
       repo.commit()
 
 
+  def testStatistics(self):
+    """Verify that skipped binary files are reported in the statistics."""
+    with GitRepository() as repo:
+      repo.config(SECTION, KEY_STATS, "true")
+      copyfile(join(dirname(__file__), "data", "file.bin"), repo.path("file.bin"))
+      write(repo, "test.c", data="// Copyright (c) 2013 All Right Reserved.\n")
+      repo.add("file.bin", "test.c")
+
+      _, err = repo.commit(stderr=b"")
+      self.assertRegex(err.decode("utf-8"), r"2 files: 1 changed, .*, 1 binary")
+
+
+  def testReport(self):
+    """Verify that a report about each processed file is written."""
+    with GitRepository() as repo:
+      report = repo.path(".git", "copyright-report")
+      repo.config(SECTION, KEY_REPORT, report)
+      copyfile(join(dirname(__file__), "data", "file.bin"), repo.path("file.bin"))
+      write(repo, "test.c", data="// Copyright (c) 2013 All Right Reserved.\n")
+      repo.add("file.bin", "test.c")
+      repo.commit()
+
+      with open(report) as f:
+        reports = {r["path"]: r for r in map(loads, f)}
+
+      self.assertEqual(reports["file.bin"]["status"], "binary")
+      self.assertEqual(reports["test.c"]["status"], "changed")
+      self.assertEqual(reports["test.c"]["found"], 1)
+      self.assertEqual(reports["test.c"]["bytes_read"], 42)
+      self.assertFalse(reports["test.c"]["cached"])
+      self.assertGreater(reports["test.c"]["write_time"], 0)
+
+
+  def testProfile(self):
+    """Verify that the hook can be profiled."""
+    with GitRepository() as repo:
+      write(repo, "test.c", data="// Copyright (c) 2013 All Right Reserved.\n")
+      repo.add("test.c")
+
+      env = {ENV_PROFILE: "1"}
+      _, err = repo.commit(env=env, stderr=b"")
+      err = err.decode("utf-8")
+
+      for phase in ("config", "stagedFiles", "stagedFileContent",
+                    "stagedChangesRevertFileContent", "normalize",
+                    "stageFile", "total"):
+        self.assertRegex(err, r"\n%s +[0-9]+ +[0-9.]+\n" % phase)
+
+      self.assertRegex(err, r"peak memory: [0-9.]+ KiB")
+
+
+  def testLatin1FileIsNormalized(self):
+    """Verify that files not encoded in UTF-8 are normalized as well."""
+    with GitRepository() as repo:
+      content = "// Copyright (c) 2013 D\xe4niel M\xfcller\r\n"
+      expected = "// Copyright (c) 2013,%d D\xe4niel M\xfcller\r\n" % YEAR
+
+      with open(repo.path("test.c"), "wb") as f:
+        f.write(content.encode("latin-1"))
+
+      repo.add("test.c")
+      repo.commit()
+
+      with open(repo.path("test.c"), "rb") as f:
+        self.assertEqual(f.read(), expected.encode("latin-1"))
+
+
   def testCopyrightHeaderRequired(self):
     """Test that the copyright.copyright-required setting is handled correctly."""
     def doTest(content, fail, required=None):
@@ -301,6 +412,112 @@ class TestGitHook(TestCase):
       self.assertEqual(new_content, expected)
 
 
+  def testScanLines(self):
+    """Verify that the copyright.scan-lines setting is handled correctly."""
+    with GitRepository() as repo:
+      content = "// Copyright (c) 2013 foo\n" + "\n" * 5 + "// Copyright (c) 2013 bar\n"
+      expected = "// Copyright (c) 2013,%d foo\n" % YEAR + "\n" * 5 + "// Copyright (c) 2013 bar\n"
+      repo.config(SECTION, KEY_SCAN_LINES, "3")
+
+      write(repo, "test.c", data=content)
+      repo.add("test.c")
+      repo.commit()
+
+      self.assertEqual(read(repo, "test.c"), expected)
+      # The committed content must be normalized as well.
+      repo.reset("--hard")
+      self.assertEqual(read(repo, "test.c"), expected)
+
+      # A file with no header within the scan window is treated like a
+      # file without header.
+      write(repo, "test.h", data="\n" * 3 + "// Copyright (c) 2013 baz\n")
+      repo.add("test.h")
+      with self.assertRaisesRegex(ProcessError, r"No copyright header found"):
+        repo.commit()
+
+
+  def testCache(self):
+    """Verify that the outcome of normalizing staged blobs is cached."""
+    with GitRepository() as repo:
+      repo.config(SECTION, KEY_CACHE, "true")
+      content = "// Copyright (c) 2013 All Right Reserved.\n"
+      expected = "// Copyright (c) 2013,%d All Right Reserved.\n" % YEAR
+
+      write(repo, "test1.c", data=content)
+      repo.add("test1.c")
+      repo.commit()
+
+      cache = repo.path(".git", "copyright-cache")
+      self.assertTrue(exists(cache))
+      self.assertEqual(read(repo, "test1.c"), expected)
+
+      # The same blob staged under a different path is fixed up using
+      # the cached outcome, both in the index and in the working tree.
+      write(repo, "test2.c", data=content)
+      repo.add("test2.c")
+      repo.commit()
+
+      self.assertEqual(read(repo, "test2.c"), expected)
+      repo.reset("--hard")
+      self.assertEqual(read(repo, "test2.c"), expected)
+
+      # With the check action a cached blob requiring normalization has
+      # to be reported as well.
+      repo.config(SECTION, KEY_ACTION, str(Action.Check))
+      write(repo, "test3.c", data=content)
+      repo.add("test3.c")
+      with self.assertRaisesRegex(ProcessError, r"are not properly normalized"):
+        repo.commit()
+
+      # Already normalized blobs pass the check.
+      write(repo, "test3.c", data=expected)
+      repo.add("test3.c")
+      repo.commit()
+
+
+  def testCacheWithMissingBlob(self):
+    """Verify that a cached blob no longer existing is normalized again."""
+    with GitRepository() as repo:
+      repo.config(SECTION, KEY_CACHE, "true")
+      content = "// Copyright (c) 2013 All Right Reserved.\n"
+      expected = "// Copyright (c) 2013,%d All Right Reserved.\n" % YEAR
+
+      write(repo, "test1.c", data=content)
+      repo.add("test1.c")
+      repo.commit()
+
+      # Remove the normalized blob the cache refers to, just as if it
+      # had been garbage collected.
+      out, _ = repo.hashObject("test1.c", stdout=b"")
+      blob = out.decode("utf-8").rstrip("\n")
+      unlink(repo.path(".git", "objects", blob[:2], blob[2:]))
+
+      repo.config(SECTION, KEY_ACTION, str(Action.Warn))
+      write(repo, "test2.c", data=content)
+      repo.add("test2.c")
+      _, err = repo.commit(stderr=b"")
+
+      self.assertEqual(err.count(b"are not properly normalized"), 1)
+      self.assertEqual(read(repo, "test2.c"), expected)
+      repo.reset("--hard")
+      self.assertEqual(read(repo, "test2.c"), expected)
+
+
+  def testCacheDisabled(self):
+    """Verify that the cache is only used if enabled."""
+    for enabled in (None, "false"):
+      with GitRepository() as repo:
+        if enabled is not None:
+          repo.config(SECTION, KEY_CACHE, enabled)
+
+        write(repo, "test.c", data="// Copyright (c) 2013 All Right Reserved.")
+        repo.add("test.c")
+        repo.commit()
+
+        self.assertFalse(exists(repo.path(".git", "copyright-cache")))
+        self.assertFalse(exists(repo.path(".git", "copyright-cache.lock")))
+
+
   def testSubmoduleHandling(self):
     """Verify that submodules are handled correctly."""
     with GitRepository() as lib,\
@@ -330,5 +547,56 @@ class TestGitHook(TestCase):
       repo.commit()
 
 
+  def testStartupImports(self):
+    """Verify that loading the hook does not import modules it rarely needs."""
+    # The hook runs on every commit and so its start up time matters.
+    # Modules only required for the command line interface, for
+    # profiling, or for the uncommon case of a file actually changing
+    # are supposed to be imported lazily.
+    script = "import runpy, sys; runpy.run_path(%r, run_name='hook'); "\
+             "print(' '.join(sys.modules))" % HOOK
+    modules = check_output([executable, "-c", script]).decode("utf-8").split()
+
+    self.assertIn("deso.copyright.normalize", modules)
+    for module in ("argparse", "cProfile", "json", "multiprocessing",
+                   "subprocess", "tempfile", "tracemalloc", "traceback"):
+      self.assertNotIn(module, modules)
+
+
+  def testStartupImportTime(self):
+    """Verify that loading the hook stays within its import time budget."""
+    with TemporaryDirectory() as directory:
+      # Modules the interpreter loads on its own or for running a script
+      # through runpy are not imported by the hook. To tell them apart we
+      # measure running an empty script as well.
+      empty = join(directory, "empty.py")
+      open(empty, "w").close()
+
+      # Byte code is cached in a directory of our own, so that its
+      # compilation is not measured and no files are left behind.
+      env = dict(environ, PYTHONPYCACHEPREFIX=directory)
+      env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+      def measure(path):
+        """Measure the import times of top level modules when running a script."""
+        script = "import runpy; runpy.run_path(%r, run_name='hook')" % path
+        args = [executable, "-X", "importtime", "-c", script]
+        output = check_output(args, env=env, stdin=DEVNULL, stderr=STDOUT)
+        return importTimes(output)
+
+      measure(HOOK)
+      baseline = measure(empty)
+
+      # Timings vary with the load of the system, so we only consider
+      # the fastest of a few runs.
+      times = []
+      for _ in range(3):
+        imports = measure(HOOK)
+        times.append(sum(t for n, t in imports.items() if n not in baseline))
+
+    self.assertGreater(min(times), 0)
+    self.assertLess(min(times), IMPORT_TIME_BUDGET)
+
+
 if __name__ == "__main__":
   main()